@@ -185,3 +185,140 @@ SSL_REDIRECT_EXEMPT = os.environ.get('SSL_REDIRECT_EXEMPT', '').split(',') if os
 # WARNING: Only enable this in development environments
 FORCE_HTTP_WHEN_SSL_DISABLED = os.environ.get('FORCE_HTTP_WHEN_SSL_DISABLED', 'False') == 'True'
 
+# Backup downloads
+# Offload backup downloads to the front web server instead of streaming them through Django:
+# 'nginx' uses X-Accel-Redirect, 'apache' uses X-Sendfile. Leave empty to serve them from Django.
+BACKUP_DOWNLOAD_OFFLOAD = os.environ.get('BACKUP_DOWNLOAD_OFFLOAD', '')
+# Internal nginx location aliased to the backups directory (only used with 'nginx')
+BACKUP_ACCEL_REDIRECT_PREFIX = os.environ.get('BACKUP_ACCEL_REDIRECT_PREFIX', '/protected-backups/')
+
+# Resumable chunked uploads (backup restore and module install)
+# Default chunk size suggested to clients, in bytes
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+# Abandoned upload sessions (and their chunks) are removed after this many hours without activity
+UPLOAD_SESSION_TTL_HOURS = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', 24))
+
+# Backup storage
+# 'local' keeps backups only in BASE_DIR/backups, 's3' also copies them to an S3-compatible bucket (AWS S3, MinIO...)
+BACKUP_STORAGE_BACKEND = os.environ.get('BACKUP_STORAGE_BACKEND', 'local')
+BACKUP_S3_BUCKET = os.environ.get('BACKUP_S3_BUCKET', '')
+# Leave empty for AWS, e.g. http://minio:9000 for MinIO
+BACKUP_S3_ENDPOINT_URL = os.environ.get('BACKUP_S3_ENDPOINT_URL', '')
+BACKUP_S3_ACCESS_KEY = os.environ.get('BACKUP_S3_ACCESS_KEY', '')
+BACKUP_S3_SECRET_KEY = os.environ.get('BACKUP_S3_SECRET_KEY', '')
+BACKUP_S3_REGION = os.environ.get('BACKUP_S3_REGION', '')
+BACKUP_S3_PREFIX = os.environ.get('BACKUP_S3_PREFIX', 'backups/')
+# Multipart upload: part size in MB and number of parts transferred in parallel
+BACKUP_S3_MULTIPART_CHUNK_MB = int(os.environ.get('BACKUP_S3_MULTIPART_CHUNK_MB', 64))
+BACKUP_S3_MAX_CONCURRENCY = int(os.environ.get('BACKUP_S3_MAX_CONCURRENCY', 8))
+# Local copies of backups older than this are removed from the hot disk (0 = remove right after upload)
+BACKUP_TIER_AFTER_DAYS = int(os.environ.get('BACKUP_TIER_AFTER_DAYS', 7))
+# LRU cache for archives downloaded back from remote storage (restores)
+BACKUP_CACHE_DIR = os.environ.get('BACKUP_CACHE_DIR', '')
+BACKUP_CACHE_MAX_GB = float(os.environ.get('BACKUP_CACHE_MAX_GB', 10))
+
+# Backup/restore throttling
+# Maximum throughput in MB/s for backup and restore streams (0 = unlimited). Instances can override it.
+BACKUP_BANDWIDTH_LIMIT_MB = float(os.environ.get('BACKUP_BANDWIDTH_LIMIT_MB', 0))
+# Back off while host CPU iowait (%) is above this value (0 = disabled)
+BACKUP_IOWAIT_THRESHOLD = float(os.environ.get('BACKUP_IOWAIT_THRESHOLD', 0))
+# CPU and IO priority of pg_dump/pg_restore inside the database containers
+BACKUP_NICE = int(os.environ.get('BACKUP_NICE', 10))
+BACKUP_IONICE = os.environ.get('BACKUP_IONICE', '-c 2 -n 7')
+
+# Instance duplication
+# Parallel pg_restore jobs when copying a database (1 = pure stream, >1 = stream to a file then pg_restore -j)
+CLONE_RESTORE_JOBS = int(os.environ.get('CLONE_RESTORE_JOBS', 1))
+# Seconds a clone waits for pg_restore to finish (0 = no limit)
+CLONE_RESTORE_TIMEOUT = int(os.environ.get('CLONE_RESTORE_TIMEOUT', 0))
+# How filestore blobs are cloned: 'auto' (reflink, then hardlink), 'reflink', 'hardlink' or 'copy'
+CLONE_FILESTORE_STRATEGY = os.environ.get('CLONE_FILESTORE_STRATEGY', 'auto')
+# Extra or overridden clone profiles, same keys as orchestrator/clone_profiles.py
+CLONE_PROFILES = {}
+
+# Backup contents
+# Extra or overridden backup profiles, same keys as orchestrator/backup_profiles.py
+BACKUP_PROFILES = {}
+
+# WAL archiving / PITR
+# WAL segment size of the database containers (initdb --wal-segsize), used to derive LSN ranges from file names
+WAL_SEGMENT_SIZE = int(os.environ.get('WAL_SEGMENT_SIZE_MB', 16)) * 1024 * 1024
+# Enable WAL archiving in new database containers (archive_mode + /wal-archive mount)
+WAL_ARCHIVING_ENABLED = os.environ.get('WAL_ARCHIVING_ENABLED', 'False') == 'True'
+# Compression of archived segments: 'zstd' (falls back to gzip if the image lacks it), 'gzip' or 'none'
+WAL_COMPRESSION = os.environ.get('WAL_COMPRESSION', 'gzip')
+# Compression level (0 = tool default)
+WAL_COMPRESSION_LEVEL = int(os.environ.get('WAL_COMPRESSION_LEVEL', 0))
+# Force a segment switch after this many seconds so idle databases are still archived
+WAL_ARCHIVE_TIMEOUT = int(os.environ.get('WAL_ARCHIVE_TIMEOUT', 60))
+# Hours between automatic base backups (run_auto_backups, 0 = only manual)
+WAL_BASE_BACKUP_INTERVAL_HOURS = int(os.environ.get('WAL_BASE_BACKUP_INTERVAL_HOURS', 24))
+# Completed base backups kept per instance
+WAL_BASE_BACKUP_KEEP = int(os.environ.get('WAL_BASE_BACKUP_KEEP', 3))
+# Expected WAL replay throughput (MB/s), used to estimate restore times
+WAL_REPLAY_RATE_MB = float(os.environ.get('WAL_REPLAY_RATE_MB', 64))
+# Seconds the WAL/archiver status of an instance is cached
+WAL_STATUS_CACHE_SECONDS = int(os.environ.get('WAL_STATUS_CACHE_SECONDS', 10))
+# Query the database containers over the instance network (falls back to docker exec when unreachable)
+WAL_STATS_DIRECT_CONNECTION = os.environ.get('WAL_STATS_DIRECT_CONNECTION', 'True') == 'True'
+# Parallel status queries when collecting many instances
+WAL_STATS_WORKERS = int(os.environ.get('WAL_STATS_WORKERS', 8))
+# Fail a point-in-time recovery when the database log shows no replay progress for this long (seconds)
+WAL_RECOVERY_STALL_SECONDS = int(os.environ.get('WAL_RECOVERY_STALL_SECONDS', 600))
+# Restore points younger than this keep the base backup (and WAL) they need
+WAL_RESTORE_POINT_KEEP_DAYS = int(os.environ.get('WAL_RESTORE_POINT_KEEP_DAYS', 30))
+# Take a restore point automatically before every redeploy and module install
+WAL_PRE_DEPLOY_RESTORE_POINTS = os.environ.get('WAL_PRE_DEPLOY_RESTORE_POINTS', 'True') == 'True'
+
+# Container log streaming (Server-Sent Events)
+# Recent lines kept per container and sent to new subscribers
+LOG_STREAM_BACKLOG = int(os.environ.get('LOG_STREAM_BACKLOG', 200))
+# Seconds between keepalive comments on idle streams
+LOG_STREAM_KEEPALIVE = int(os.environ.get('LOG_STREAM_KEEPALIVE', 15))
+# Threads reserved for streamed responses under ASGI (live log streams, downloads); one per open stream
+STREAMING_THREADS = int(os.environ.get('STREAMING_THREADS', 32))
+
+# Central log store (collect_logs command)
+# Directory of the time-partitioned log segments (default BASE_DIR/logstore)
+LOG_STORE_DIR = os.environ.get('LOG_STORE_DIR', '')
+# Hours older than this are deleted
+LOG_STORE_RETENTION_DAYS = int(os.environ.get('LOG_STORE_RETENTION_DAYS', 14))
+# Oldest hours are deleted while the store is larger than this (0 = no size limit)
+LOG_STORE_MAX_MB = int(os.environ.get('LOG_STORE_MAX_MB', 2048))
+# Seconds between writes of the buffered lines (one compressed block per container)
+LOG_STORE_FLUSH_SECONDS = int(os.environ.get('LOG_STORE_FLUSH_SECONDS', 10))
+# Seconds between looks for new containers
+LOG_STORE_DISCOVER_SECONDS = int(os.environ.get('LOG_STORE_DISCOVER_SECONDS', 30))
+# Lines read from containers seen for the first time
+LOG_STORE_INITIAL_TAIL = int(os.environ.get('LOG_STORE_INITIAL_TAIL', 1000))
+
+# Docker log policy of the Odoo, database and managed containers
+# (per instance fields and template 'logging' sections override it)
+# json-file or local; other drivers make the log tab and collect_logs unusable
+DOCKER_LOG_DRIVER = os.environ.get('DOCKER_LOG_DRIVER', 'json-file')
+# Size of each log file before it is rotated
+DOCKER_LOG_MAX_SIZE = os.environ.get('DOCKER_LOG_MAX_SIZE', '20m')
+# Rotated log files kept per container
+DOCKER_LOG_MAX_FILE = int(os.environ.get('DOCKER_LOG_MAX_FILE', 5))
+# Compress rotated log files
+DOCKER_LOG_COMPRESS = os.environ.get('DOCKER_LOG_COMPRESS', 'True') == 'True'
+
+# Interactive console (WebSocket, needs the ASGI server: uvicorn config.asgi:application)
+# Seconds without input or output before a console session is closed
+CONSOLE_IDLE_TIMEOUT = int(os.environ.get('CONSOLE_IDLE_TIMEOUT', 900))
+# Console sessions open at the same time, in total and per user
+CONSOLE_MAX_SESSIONS = int(os.environ.get('CONSOLE_MAX_SESSIONS', 20))
+CONSOLE_MAX_SESSIONS_PER_USER = int(os.environ.get('CONSOLE_MAX_SESSIONS_PER_USER', 5))
+# Origins (scheme://host) besides the request Host allowed to open a console, e.g. behind a proxy that rewrites Host
+CSRF_TRUSTED_ORIGINS = [origin for origin in os.environ.get('CSRF_TRUSTED_ORIGINS', '').split(',') if origin]
+
+# Python requirements of the Odoo containers
+# Shared pip cache volume (one per Odoo version) mounted in every Odoo container
+PIP_CACHE_ENABLED = os.environ.get('PIP_CACHE_ENABLED', 'True') == 'True'
+PIP_CACHE_VOLUME_PREFIX = os.environ.get('PIP_CACHE_VOLUME_PREFIX', 'odoo-pip-cache')
+# Allow pip to install into the system Python of Debian 12 based images (Odoo 17+)
+PIP_BREAK_SYSTEM_PACKAGES = os.environ.get('PIP_BREAK_SYSTEM_PACKAGES', 'True') == 'True'
+
+# Module installs from uploaded ZIPs (one-shot odoo -i/-u container, then SIGHUP reload)
+MODULE_INSTALL_TIMEOUT = int(os.environ.get('MODULE_INSTALL_TIMEOUT', 1800))
+MODULE_RELOAD_TIMEOUT = int(os.environ.get('MODULE_RELOAD_TIMEOUT', 120))
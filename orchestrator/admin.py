@@ -3,6 +3,8 @@ from .models import Instance
 from .config_models import GitHubConfig
 from .backup_models import Backup
 from .blog_models import BlogPost
+from .retention_models import BackupRetentionPolicy
+from .wal_models import WALArchive, WALScanState, WALBaseBackup
 
 @admin.register(Instance)
 class InstanceAdmin(admin.ModelAdmin):
@@ -21,6 +23,27 @@ class BackupAdmin(admin.ModelAdmin):
     list_filter = ['include_filestore', 'created_at']
     search_fields = ['instance__name', 'filename']
 
+@admin.register(BackupRetentionPolicy)
+class BackupRetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = ['instance', 'keep_last', 'keep_hourly', 'keep_daily', 'keep_weekly', 'keep_monthly', 'updated_at']
+    search_fields = ['instance__name']
+
+@admin.register(WALArchive)
+class WALArchiveAdmin(admin.ModelAdmin):
+    list_display = ['instance', 'wal_file_name', 'file_type', 'timeline_id', 'start_lsn', 'file_size_mb', 'archived_at']
+    list_filter = ['file_type', 'timeline_id']
+    search_fields = ['instance__name', 'wal_file_name']
+
+@admin.register(WALScanState)
+class WALScanStateAdmin(admin.ModelAdmin):
+    list_display = ['instance', 'last_wal_file_name', 'files_tracked', 'last_scan_at', 'last_full_scan_at']
+
+@admin.register(WALBaseBackup)
+class WALBaseBackupAdmin(admin.ModelAdmin):
+    list_display = ['instance', 'label', 'status', 'start_lsn', 'file_size_mb', 'started_at', 'duration_seconds']
+    list_filter = ['status']
+    search_fields = ['instance__name', 'label']
+
 @admin.register(BlogPost)
 class BlogPostAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'published', 'featured', 'created_at']
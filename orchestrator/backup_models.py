@@ -3,11 +3,27 @@ from django.contrib.auth.models import User
 
 class Backup(models.Model):
     """Model to track instance backups"""
+    STORAGE_CHOICES = [
+        ('local', 'Local'),
+        ('s3', 'S3'),
+    ]
+    
     instance = models.ForeignKey('Instance', on_delete=models.CASCADE, related_name='backups')
     filename = models.CharField(max_length=255)
     file_path = models.CharField(max_length=512)
     include_filestore = models.BooleanField(default=True)
     file_size = models.BigIntegerField(help_text="Size in bytes")
+    checksum_sha256 = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the backup archive")
+    storage_backend = models.CharField(max_length=20, choices=STORAGE_CHOICES, default='local', help_text="Where the archive is stored besides the hot disk")
+    storage_key = models.CharField(max_length=512, blank=True, help_text="Object key in the remote storage")
+    tiered_at = models.DateTimeField(null=True, blank=True, help_text="When the local copy was moved off the hot disk")
+    backup_profile = models.CharField(max_length=50, default='full', help_text="Backup profile used for the dump")
+    excluded_tables = models.TextField(blank=True, default='', help_text="Table patterns whose data was left out of the dump")
+    dump_size = models.BigIntegerField(null=True, blank=True, help_text="Size of the database dump in bytes")
+    dump_seconds = models.FloatField(null=True, blank=True, help_text="Time spent running pg_dump")
+    filestore_files = models.IntegerField(null=True, blank=True, help_text="Filestore files included")
+    filestore_size = models.BigIntegerField(null=True, blank=True, help_text="Filestore bytes included")
+    filestore_skipped = models.IntegerField(default=0, help_text="Filestore files left out by the size cap")
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     
@@ -17,6 +33,12 @@ class Backup(models.Model):
     def __str__(self):
         return f"{self.instance.name} - {self.filename}"
     
+    @property
+    def is_local(self):
+        """True if the archive is still on the hot disk"""
+        import os
+        return bool(self.file_path) and os.path.exists(self.file_path)
+    
     @property
     def formatted_size(self):
         if self.file_size < 1024:
@@ -28,6 +50,18 @@ class Backup(models.Model):
         else:
             return f"{round(self.file_size / (1024 * 1024 * 1024), 2)} GB"
             
+    @property
+    def excluded_table_list(self):
+        return [table for table in self.excluded_tables.split(',') if table]
+    
+    @property
+    def dump_size_mb(self):
+        return round(self.dump_size / (1024 * 1024), 2) if self.dump_size is not None else None
+    
+    @property
+    def filestore_size_mb(self):
+        return round(self.filestore_size / (1024 * 1024), 2) if self.filestore_size is not None else None
+    
     @property
     def file_size_mb(self):
         return round(self.file_size / (1024 * 1024), 2)
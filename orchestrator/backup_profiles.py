@@ -0,0 +1,68 @@
+# Backup profiles: tables whose rows are left out of `pg_dump` (the schema is
+# always kept, so a restore recreates them empty). Only data Odoo rebuilds by
+# itself or never needs after a restore belongs here.
+
+from django.conf import settings
+
+# Longpolling notifications, presence, server-side logs and import previews
+TRANSIENT_TABLES = [
+    'bus_bus',
+    'bus_presence',
+    'ir_logging',
+    'base_import_import',
+    'ir_profile',
+]
+
+BACKUP_PROFILES = {
+    'full': {
+        'label': 'Completo',
+        'description': 'Todas las tablas con sus datos',
+        'exclude_table_data': [],
+    },
+    'lean': {
+        'label': 'Sin datos transitorios',
+        'description': 'Sin notificaciones del bus, logs ni previsualizaciones de importación',
+        'exclude_table_data': TRANSIENT_TABLES,
+    },
+    'minimal': {
+        'label': 'Mínimo',
+        'description': 'Como el anterior y además sin seguimiento de cambios ni logs de auditoría',
+        'exclude_table_data': TRANSIENT_TABLES + ['mail_tracking_value', 'auditlog_log', 'auditlog_log_line'],
+    },
+}
+
+
+def get_backup_profiles():
+    profiles = dict(BACKUP_PROFILES)
+    profiles.update(getattr(settings, 'BACKUP_PROFILES', {}))
+    return profiles
+
+
+def get_backup_profile(name):
+    """Returns the profile by key; BACKUP_PROFILES in settings can add or override profiles"""
+    profiles = get_backup_profiles()
+    if name not in profiles:
+        raise ValueError(f"Perfil de backup desconocido: {name}")
+    return profiles[name]
+
+
+def parse_table_list(value):
+    """Table patterns from a comma or newline separated text field"""
+    if not value:
+        return []
+    patterns = []
+    for line in value.replace(',', '\n').splitlines():
+        pattern = line.strip()
+        # Same characters pg_dump accepts in a pattern; anything else would need shell quoting
+        if pattern and all(c.isalnum() or c in '_*?.' for c in pattern):
+            patterns.append(pattern)
+    return patterns
+
+
+def excluded_tables_for(instance):
+    """Table data patterns excluded from the backups of an instance"""
+    patterns = list(get_backup_profile(instance.backup_profile)['exclude_table_data'])
+    for pattern in parse_table_list(instance.backup_exclude_tables):
+        if pattern not in patterns:
+            patterns.append(pattern)
+    return patterns
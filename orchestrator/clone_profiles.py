@@ -0,0 +1,266 @@
+# Clone profiles: how much data is carried over when duplicating an instance
+# or creating one from a backup. Test copies rarely need the message history,
+# bus notifications or old attachments of production.
+
+import re
+import time
+import fnmatch
+from django.conf import settings
+
+# Chatter history and transient tables, listed one by one: configuration such
+# as mail_message_subtype must be kept. Rows of other tables that point to
+# them (ratings, channel members, SMS, ...) are cleaned up by
+# dangling_reference_sql() before the foreign keys are created.
+HISTORY_TABLES = [
+    'mail_message',
+    'mail_message_res_partner_rel',
+    'mail_message_res_partner_needaction_rel',
+    'mail_message_res_partner_starred_rel',
+    'mail_message_reaction',
+    'mail_message_schedule',
+    'mail_message_translation',
+    'mail_tracking_value',
+    'mail_notification',
+    'mail_mail',
+    'mail_mail_res_partner_rel',
+    'message_attachment_rel',
+    'bus_bus',
+    'bus_presence',
+    'ir_logging',
+]
+
+# e.g. "ALTER TABLE ONLY public.rating_rating\n    ADD CONSTRAINT rating_rating_message_id_fkey
+#       FOREIGN KEY (message_id) REFERENCES public.mail_message(id) ON DELETE CASCADE;"
+FOREIGN_KEY_RE = re.compile(
+    r'ALTER TABLE (?:ONLY )?([\w."]+)\s+ADD CONSTRAINT [\w"]+ FOREIGN KEY \(([\w"]+)\) '
+    r'REFERENCES ([\w."]+)\(([\w"]+)\)([^;]*);'
+)
+
+# (table, column, SQL expression) - set-based updates, one statement per column
+ANONYMIZE_COLUMNS = [
+    ('res_partner', 'email', "'partner' || id || '@example.invalid'"),
+    ('res_partner', 'email_normalized', "'partner' || id || '@example.invalid'"),
+    ('res_partner', 'phone', 'NULL'),
+    ('res_partner', 'mobile', 'NULL'),
+    ('res_partner', 'street', 'NULL'),
+    ('res_partner', 'street2', 'NULL'),
+    ('res_partner', 'vat', 'NULL'),
+    ('res_partner', 'comment', 'NULL'),
+    ('hr_employee', 'work_email', "'employee' || id || '@example.invalid'"),
+    ('hr_employee', 'private_email', 'NULL'),
+    ('hr_employee', 'private_phone', 'NULL'),
+    ('hr_employee', 'mobile_phone', 'NULL'),
+    ('hr_employee', 'ssnid', 'NULL'),
+    ('hr_employee', 'identification_id', 'NULL'),
+    ('hr_employee', 'passport_id', 'NULL'),
+    ('res_partner_bank', 'acc_number', "'ANON' || id"),
+    ('res_partner_bank', 'sanitized_acc_number', "'ANON' || id"),
+]
+
+CLONE_PROFILES = {
+    'full': {
+        'label': 'Completo',
+        'description': 'Copia exacta de la base de datos y el filestore',
+        'exclude_table_data': [],
+        'truncate': [],
+        'filestore_max_age_days': None,
+        'filestore_max_size_mb': None,
+        'anonymize': False,
+    },
+    'slim': {
+        'label': 'Ligero',
+        'description': 'Sin historial de mensajes, logs ni adjuntos antiguos o grandes',
+        'exclude_table_data': HISTORY_TABLES,
+        'truncate': ['mail_activity'],
+        'filestore_max_age_days': 90,
+        'filestore_max_size_mb': 10,
+        'anonymize': False,
+    },
+    'anonymized': {
+        'label': 'Anonimizado',
+        'description': 'Como "Ligero" y además sin datos personales de contactos y empleados',
+        'exclude_table_data': HISTORY_TABLES,
+        'truncate': ['mail_activity'],
+        'filestore_max_age_days': 90,
+        'filestore_max_size_mb': 10,
+        'anonymize': True,
+    },
+}
+
+
+def get_clone_profile(name):
+    """Returns the profile by key; CLONE_PROFILES in settings can add or override profiles"""
+    profiles = dict(CLONE_PROFILES)
+    profiles.update(getattr(settings, 'CLONE_PROFILES', {}))
+    if name not in profiles:
+        raise ValueError(f"Perfil de clonado desconocido: {name}")
+    return profiles[name]
+
+
+def list_clone_profiles():
+    profiles = dict(CLONE_PROFILES)
+    profiles.update(getattr(settings, 'CLONE_PROFILES', {}))
+    return [{'key': key, **profile} for key, profile in profiles.items()]
+
+
+def pg_dump_exclude_args(profile):
+    """
+    --exclude-table-data arguments for pg_dump (schema is kept). Patterns are
+    double quoted so they can go inside low_priority()'s single-quoted sh -c.
+    """
+    return ' '.join(f'--exclude-table-data="{pattern}"' for pattern in profile.get('exclude_table_data', []))
+
+
+def filter_restore_list(toc, patterns):
+    """
+    Filters a `pg_restore -l` table of contents, commenting out the TABLE DATA
+    entries of the excluded tables so `pg_restore -L` skips them.
+    Returns (filtered_toc, excluded_tables).
+    """
+    lines = []
+    excluded = []
+    for line in toc.splitlines():
+        parts = line.split()
+        # e.g. "3912; 0 16543 TABLE DATA public mail_message odoo"
+        if not line.startswith(';') and 'TABLE DATA' in line and len(parts) >= 7:
+            table = parts[parts.index('DATA') + 2]
+            if any(fnmatch.fnmatch(table, pattern) for pattern in patterns):
+                lines.append(';' + line)
+                excluded.append(table)
+                continue
+        lines.append(line)
+    return '\n'.join(lines) + '\n', excluded
+
+
+def _table_name(qualified):
+    return qualified.split('.')[-1].strip('"')
+
+
+def foreign_keys(post_data_sql):
+    """
+    Single-column foreign keys of a post-data section (pg_dump/pg_restore SQL).
+    Returns [(table, column, referenced_table, referenced_column, on_delete)].
+    """
+    keys = []
+    for table, column, referenced_table, referenced_column, options in FOREIGN_KEY_RE.findall(post_data_sql):
+        on_delete = re.search(r'ON DELETE (CASCADE|SET NULL|SET DEFAULT|RESTRICT|NO ACTION)', options)
+        keys.append((table, column, referenced_table, referenced_column, on_delete.group(1) if on_delete else 'NO ACTION'))
+    return keys
+
+
+def dangling_reference_sql(post_data_sql, patterns):
+    """
+    SQL run between the data and post-data restore of a profile that leaves
+    table data out: rows still pointing to a missing row get what ON DELETE
+    would have done to them (column set to NULL or row deleted), so every
+    foreign key can be created afterwards. Deleted rows can leave others
+    dangling in turn, so the statements are repeated until nothing changes.
+    """
+    keys = foreign_keys(post_data_sql)
+    affected = {
+        _table_name(referenced_table) for _, _, referenced_table, _, _ in keys
+        if any(fnmatch.fnmatch(_table_name(referenced_table), pattern) for pattern in patterns)
+    }
+    # Tables that lose rows through a cascade become sources of dangling references too
+    while True:
+        grown = affected | {
+            _table_name(table) for table, _, referenced_table, _, on_delete in keys
+            if _table_name(referenced_table) in affected and on_delete not in ('SET NULL', 'SET DEFAULT')
+        }
+        if grown == affected:
+            break
+        affected = grown
+
+    statements = []
+    for table, column, referenced_table, referenced_column, on_delete in keys:
+        if _table_name(referenced_table) not in affected:
+            continue
+        dangling = f"t.{column} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {referenced_table} r WHERE r.{referenced_column} = t.{column})"
+        if on_delete == 'SET NULL':
+            statement = f"UPDATE {table} t SET {column} = NULL WHERE {dangling}"
+        elif on_delete == 'SET DEFAULT':
+            statement = f"UPDATE {table} t SET {column} = DEFAULT WHERE {dangling}"
+        else:
+            statement = f"DELETE FROM {table} t WHERE {dangling}"
+        statements.append(
+            f"        EXECUTE $q${statement}$q$;\n"
+            f"        GET DIAGNOSTICS affected_rows = ROW_COUNT;\n"
+            f"        changed := changed + affected_rows;"
+        )
+
+    if not statements:
+        return ''
+    return (
+        "DO $$\nDECLARE\n    changed bigint;\n    affected_rows bigint;\nBEGIN\n    LOOP\n        changed := 0;\n"
+        + '\n'.join(statements)
+        + "\n        EXIT WHEN changed = 0;\n    END LOOP;\nEND $$;\n"
+    )
+
+
+def blob_filter(profile, now=None):
+    """
+    Returns a callable(path, stat) -> bool deciding which filestore blobs are
+    carried over, or None when the profile keeps the whole filestore.
+    """
+    max_age_days = profile.get('filestore_max_age_days')
+    max_size_mb = profile.get('filestore_max_size_mb')
+    if not max_age_days and not max_size_mb:
+        return None
+
+    now = now or time.time()
+    min_mtime = now - max_age_days * 86400 if max_age_days else None
+    max_size = max_size_mb * 1024 * 1024 if max_size_mb else None
+
+    def keep(path, stat):
+        if max_size is not None and stat.st_size > max_size:
+            return False
+        if min_mtime is not None and stat.st_mtime < min_mtime:
+            return False
+        return True
+    return keep
+
+
+def post_restore_sql(profile):
+    """SQL run in the copy after restoring: truncations, asset cleanup and anonymisation"""
+    statements = []
+    for table in profile.get('truncate', []):
+        statements.append(
+            f"    IF to_regclass('{table}') IS NOT NULL THEN\n"
+            f"        EXECUTE $q$TRUNCATE {table} CASCADE$q$;\n"
+            f"    END IF;"
+        )
+
+    if profile.get('filestore_max_age_days') or profile.get('filestore_max_size_mb'):
+        # Compiled asset bundles may have been filtered out: let Odoo regenerate them
+        statements.append(
+            "    IF to_regclass('ir_attachment') IS NOT NULL THEN\n"
+            "        EXECUTE $q$DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%'$q$;\n"
+            "    END IF;"
+        )
+
+    if profile.get('anonymize'):
+        for table, column, expression in ANONYMIZE_COLUMNS:
+            statements.append(
+                f"    IF EXISTS (SELECT 1 FROM information_schema.columns "
+                f"WHERE table_schema = 'public' AND table_name = '{table}' AND column_name = '{column}') THEN\n"
+                f"        EXECUTE $q$UPDATE {table} SET {column} = {expression} WHERE {column} IS NOT NULL$q$;\n"
+                f"    END IF;"
+            )
+        # Contact names, except users and companies so logins and reports stay recognisable
+        statements.append(
+            "    IF to_regclass('res_partner') IS NOT NULL THEN\n"
+            "        EXECUTE $q$UPDATE res_partner SET name = 'Partner ' || id WHERE is_company IS NOT TRUE\n"
+            "            AND id NOT IN (SELECT partner_id FROM res_users WHERE partner_id IS NOT NULL)\n"
+            "            AND id NOT IN (SELECT partner_id FROM res_company WHERE partner_id IS NOT NULL)$q$;\n"
+            "    END IF;"
+        )
+
+    if not statements:
+        return ''
+    return "DO $$\nBEGIN\n" + '\n'.join(statements) + "\nEND $$;\n"
+
+
+def filestore_entry_allowed(profile, size):
+    """Size check for filestore entries restored from a backup archive"""
+    max_size_mb = profile.get('filestore_max_size_mb')
+    return not max_size_mb or size <= max_size_mb * 1024 * 1024
@@ -0,0 +1,330 @@
+import time
+import queue
+import socket
+import threading
+import docker
+from django.conf import settings
+from .throttle import low_priority
+
+
+class CloneError(Exception):
+    """Raised when a database cannot be streamed between containers"""
+    pass
+
+
+class CloneService:
+    """
+    Copies a PostgreSQL database between instance containers without
+    intermediate files: pg_dump stdout in the source container is piped into
+    pg_restore stdin in the target container through two exec sockets and a
+    bounded in-memory buffer.
+    """
+
+    PG_ENV = {"PGPASSWORD": "odoo"}
+
+    # Disables outgoing mail, incoming mail fetchers and scheduled actions in a copy.
+    # Tables that don't exist in a given Odoo version/module set are skipped.
+    NEUTRALIZE_SQL = """
+DO $$
+BEGIN
+    IF to_regclass('ir_mail_server') IS NOT NULL THEN
+        UPDATE ir_mail_server SET active = false;
+    END IF;
+    IF to_regclass('fetchmail_server') IS NOT NULL THEN
+        UPDATE fetchmail_server SET active = false;
+    END IF;
+    IF to_regclass('ir_cron') IS NOT NULL THEN
+        UPDATE ir_cron SET active = false;
+    END IF;
+    IF to_regclass('ir_config_parameter') IS NOT NULL THEN
+        DELETE FROM ir_config_parameter WHERE key IN ('database.enterprise_code', 'database.uuid');
+        INSERT INTO ir_config_parameter (key, value) VALUES ('database.is_neutralized', 'true')
+            ON CONFLICT (key) DO UPDATE SET value = 'true';
+    END IF;
+END $$;
+"""
+    BUFFER_CHUNKS = 64
+    PROGRESS_EVERY = 64 * 1024 * 1024
+
+    def __init__(self, client=None):
+        self.client = client or docker.from_env()
+        self.api = self.client.api
+
+    def wait_for_postgres(self, container, timeout=60):
+        """Polls pg_isready instead of sleeping a fixed time. Returns seconds waited"""
+        started = time.monotonic()
+        while True:
+            result = container.exec_run("pg_isready -U odoo -d postgres", environment=self.PG_ENV)
+            if result.exit_code == 0:
+                return time.monotonic() - started
+            if time.monotonic() - started > timeout:
+                raise CloneError(f"PostgreSQL en {container.name} no respondió en {timeout}s")
+            time.sleep(0.5)
+
+    def ensure_database(self, container, db_name):
+        """Creates the target database if it does not exist yet"""
+        check = container.exec_run(
+            f"psql -U odoo -d postgres -tAc \"SELECT 1 FROM pg_database WHERE datname = '{db_name}'\"",
+            environment=self.PG_ENV
+        )
+        if check.output.decode('utf-8').strip() != '1':
+            result = container.exec_run(f"createdb -U odoo {db_name}", environment=self.PG_ENV)
+            if result.exit_code != 0:
+                raise CloneError(f"No se pudo crear la base de datos {db_name}: {result.output.decode('utf-8')}")
+
+    def drop_database(self, container, db_name):
+        """Drops a database terminating its open connections first"""
+        result = container.exec_run(
+            f'psql -U odoo -d postgres -c "DROP DATABASE IF EXISTS \\"{db_name}\\" WITH (FORCE)"',
+            environment=self.PG_ENV
+        )
+        if result.exit_code != 0:
+            raise CloneError(f"No se pudo eliminar la base de datos {db_name}: {result.output.decode('utf-8')}")
+
+    def run_sql(self, container, db_name, sql):
+        """Runs SQL in a database through psql stdin (no shell quoting involved)"""
+        exec_id = self.api.exec_create(
+            container.id, f"psql -U odoo -d {db_name} -v ON_ERROR_STOP=1", stdin=True, environment=self.PG_ENV
+        )['Id']
+        sock = self.api.exec_start(exec_id, socket=True)
+        raw_socket = getattr(sock, '_sock', sock)
+        raw_socket.sendall(sql.encode('utf-8'))
+        raw_socket.shutdown(socket.SHUT_WR)
+
+        from docker.utils.socket import frames_iter
+        output = b''.join(data for _, data in frames_iter(sock, tty=False)).decode('utf-8', 'replace')
+        sock.close()
+        exit_code = self._exit_code(exec_id)
+        if exit_code != 0:
+            raise CloneError(f"Error ejecutando SQL en {db_name}: {output}")
+        return output
+
+    def neutralize(self, container, db_name, base_url=None):
+        """Makes a copy safe to run next to production (no mails, no crons)"""
+        sql = self.NEUTRALIZE_SQL
+        if base_url:
+            escaped_url = base_url.replace("'", "''")
+            sql += f"UPDATE ir_config_parameter SET value = '{escaped_url}' WHERE key = 'web.base.url';\n"
+        self.run_sql(container, db_name, sql)
+        print(f"  Database {db_name} neutralized (mail servers, fetchmail and crons disabled)")
+
+    def apply_profile(self, container, db_name, profile):
+        """Post-restore step of a clone profile (truncations, asset cleanup, anonymisation)"""
+        from .clone_profiles import post_restore_sql
+
+        sql = post_restore_sql(profile)
+        if not sql:
+            return
+        started = time.monotonic()
+        self.run_sql(container, db_name, sql)
+        print(
+            f"  Clone profile '{profile.get('label', '')}' applied to {db_name} in {time.monotonic() - started:.1f}s"
+            + (" (personal data anonymized)" if profile.get('anonymize') else "")
+        )
+
+    def stream_database(self, source_container, target_container, source_db, target_db, jobs=None, throttle=None, clean=False, exclude_table_data=None):
+        """
+        Streams source_db into target_db (clean drops existing objects first,
+        for databases that can't be dropped such as 'postgres').
+        exclude_table_data is a list of pg_dump table patterns whose rows are
+        left out (the tables themselves are still created). The schema and
+        data are then restored first, the rows left pointing to excluded ones
+        are cleaned up and only then indexes and foreign keys are created; a
+        failure creating them is an error.
+        With jobs > 1 the dump is streamed to a file inside the target container
+        and restored with `pg_restore -j`, which needs a seekable input.
+        Returns a dict with bytes transferred and timings.
+        """
+        jobs = jobs or getattr(settings, 'CLONE_RESTORE_JOBS', 1)
+        self.ensure_database(target_container, target_db)
+        if not exclude_table_data:
+            return self._stream(source_container, target_container, source_db, target_db, jobs, throttle, clean)
+
+        from .clone_profiles import pg_dump_exclude_args
+        if clean:
+            # --clean limited to some sections cannot drop tables the old foreign keys depend on
+            self.run_sql(target_container, target_db, "DROP SCHEMA IF EXISTS public CASCADE;\nCREATE SCHEMA public;\n")
+        dump_args = '--section=pre-data --section=data ' + pg_dump_exclude_args({'exclude_table_data': exclude_table_data})
+        result = self._stream(source_container, target_container, source_db, target_db, jobs, throttle, dump_args=dump_args)
+
+        post_data = source_container.exec_run(
+            low_priority(f"pg_dump -U odoo --section=post-data {source_db}"), environment=self.PG_ENV, demux=True
+        )
+        stdout, stderr = post_data.output
+        if post_data.exit_code != 0:
+            raise CloneError(f"pg_dump falló: {(stderr or b'').decode('utf-8', 'replace')}")
+        self.clear_dangling_references(target_container, target_db, (stdout or b'').decode('utf-8', 'replace'), exclude_table_data)
+
+        post_result = self._stream(source_container, target_container, source_db, target_db, jobs, throttle, dump_args='--section=post-data')
+        if post_result['restore_exit_code'] != 0:
+            raise CloneError(f"No se pudieron crear los índices y claves foráneas: {post_result['restore_output'][:2000]}")
+        result['bytes'] += post_result['bytes']
+        result['stream_seconds'] += post_result['stream_seconds']
+        result['total_seconds'] += post_result['total_seconds']
+        return result
+
+    def clear_dangling_references(self, container, db_name, post_data_sql, patterns):
+        """Makes rows that point to excluded table data follow their ON DELETE rule (see dangling_reference_sql)"""
+        from .clone_profiles import dangling_reference_sql
+
+        sql = dangling_reference_sql(post_data_sql, patterns)
+        if not sql:
+            return
+        started = time.monotonic()
+        self.run_sql(container, db_name, sql)
+        print(f"  References to excluded table data cleaned up in {time.monotonic() - started:.1f}s")
+
+    def _stream(self, source_container, target_container, source_db, target_db, jobs, throttle=None, clean=False, dump_args=''):
+        """One pg_dump | pg_restore pass (dump_args selects sections and excluded data)"""
+        restore_args = f"-U odoo -d {target_db} --no-owner --no-acl"
+        if clean:
+            restore_args += " --clean --if-exists"
+        if jobs > 1:
+            receive_cmd = "sh -c 'cat > /tmp/clone.dump'"
+        else:
+            receive_cmd = f"pg_restore {restore_args}"
+
+        dump_cmd = f"pg_dump -U odoo -Fc {source_db}"
+        if dump_args:
+            dump_cmd += ' ' + dump_args
+
+        restore_timeout = getattr(settings, 'CLONE_RESTORE_TIMEOUT', 0) or None
+        started = time.monotonic()
+        # The source is a live instance: dump with low CPU/IO priority
+        dump_exec = self.api.exec_create(
+            source_container.id, low_priority(dump_cmd), environment=self.PG_ENV
+        )
+        receive_exec = self.api.exec_create(
+            target_container.id, receive_cmd, stdin=True, environment=self.PG_ENV
+        )
+
+        buffer = queue.Queue(maxsize=self.BUFFER_CHUNKS)
+        stop = threading.Event()
+        dump_errors = []
+        receive_output = []
+
+        def put(item):
+            # Bounded buffer: blocks while the restore side is slower than the dump
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce():
+            try:
+                for stdout, stderr in self.api.exec_start(dump_exec['Id'], stream=True, demux=True):
+                    if stop.is_set():
+                        break
+                    if stderr:
+                        dump_errors.append(stderr)
+                    if stdout:
+                        put(stdout)
+            except Exception as e:
+                dump_errors.append(str(e).encode('utf-8'))
+            finally:
+                put(None)
+
+        receive_socket = self.api.exec_start(receive_exec['Id'], socket=True)
+        raw_socket = getattr(receive_socket, '_sock', receive_socket)
+
+        def drain():
+            # pg_restore output must be consumed or it blocks once the pipe is full
+            from docker.utils.socket import frames_iter
+            try:
+                for _, data in frames_iter(receive_socket, tty=False):
+                    receive_output.append(data)
+            except Exception:
+                pass
+
+        producer = threading.Thread(target=produce, daemon=True)
+        drainer = threading.Thread(target=drain, daemon=True)
+        producer.start()
+        drainer.start()
+
+        transferred = 0
+        next_report = self.PROGRESS_EVERY
+        try:
+            while True:
+                chunk = buffer.get()
+                if chunk is None:
+                    break
+                if throttle is not None:
+                    throttle.throttle(len(chunk))
+                raw_socket.sendall(chunk)
+                transferred += len(chunk)
+                if transferred >= next_report:
+                    elapsed = time.monotonic() - started
+                    print(f"  Streamed {transferred / (1024 * 1024):.0f} MB ({transferred / (1024 * 1024) / elapsed:.1f} MB/s)")
+                    next_report += self.PROGRESS_EVERY
+        except Exception:
+            stop.set()
+            raise
+        finally:
+            # Half-close so pg_restore sees EOF on stdin
+            try:
+                raw_socket.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+            producer.join(timeout=None if not stop.is_set() else 5)
+            # The output stream ends when pg_restore exits (CLONE_RESTORE_TIMEOUT = 0: no limit)
+            drainer.join(timeout=restore_timeout)
+            receive_socket.close()
+
+        stream_seconds = time.monotonic() - started
+        dump_exit = self._exit_code(dump_exec['Id'])
+        if dump_exit != 0:
+            raise CloneError(f"pg_dump falló: {b''.join(dump_errors).decode('utf-8', 'replace')}")
+
+        output = b''.join(receive_output).decode('utf-8', 'replace')
+        restore_exit = self._exit_code(
+            receive_exec['Id'], timeout=max(restore_timeout - (time.monotonic() - started), 0) if restore_timeout else None
+        )
+        if restore_exit is None:
+            raise CloneError(f"pg_restore no terminó en {restore_timeout}s")
+
+        if jobs > 1:
+            print(f"  Dump received, restoring with {jobs} parallel jobs...")
+            result = target_container.exec_run(
+                f"sh -c 'pg_restore {restore_args} -j {jobs} /tmp/clone.dump; status=$?; rm -f /tmp/clone.dump; exit $status'",
+                environment=self.PG_ENV
+            )
+            restore_exit = result.exit_code
+            output = result.output.decode('utf-8', 'replace')
+
+        total_seconds = time.monotonic() - started
+        size_mb = transferred / (1024 * 1024)
+        print(
+            f"  Database streamed: {size_mb:.2f} MB in {stream_seconds:.1f}s "
+            f"({size_mb / max(stream_seconds, 0.001):.1f} MB/s), total {total_seconds:.1f}s"
+        )
+        # pg_restore exits with 1 after errors it skipped (e.g. missing roles or extensions) and
+        # reports them in a summary; any other failure means the database was not restored
+        if restore_exit and (restore_exit > 1 or 'errors ignored on restore' not in output):
+            raise CloneError(f"pg_restore falló (código {restore_exit}): {output[-2000:]}")
+        if restore_exit:
+            print(f"  pg_restore exit code {restore_exit}: {output[:500]}")
+
+        return {
+            'bytes': transferred,
+            'stream_seconds': stream_seconds,
+            'total_seconds': total_seconds,
+            'restore_exit_code': restore_exit,
+            'restore_output': output,
+        }
+
+    def _exit_code(self, exec_id, timeout=None):
+        """
+        Exit code of an exec once it has finished (its stream may close before
+        the process is reported as exited). None when it is still running
+        after `timeout` seconds, which callers treat as a failure.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            info = self.api.exec_inspect(exec_id)
+            if not info.get('Running'):
+                return info.get('ExitCode')
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            time.sleep(0.1)
@@ -31,6 +31,11 @@ class GitHubConfig(models.Model):
     )
     auto_backup_frequency_value = models.IntegerField(default=5, help_text="How often to run backups (e.g., every 5 days)")
     auto_backup_retention = models.IntegerField(default=5, help_text="Number of backups to keep. Older backups will be deleted automatically")
+    # Grandfather-father-son retention (0 = disabled), applied on top of auto_backup_retention
+    auto_backup_keep_hourly = models.IntegerField(default=0, help_text="Keep the newest backup of each of the last N hours")
+    auto_backup_keep_daily = models.IntegerField(default=0, help_text="Keep the newest backup of each of the last N days")
+    auto_backup_keep_weekly = models.IntegerField(default=0, help_text="Keep the newest backup of each of the last N weeks")
+    auto_backup_keep_monthly = models.IntegerField(default=0, help_text="Keep the newest backup of each of the last N months")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
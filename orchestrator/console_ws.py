@@ -0,0 +1,253 @@
+"""
+Interactive container console over WebSocket (ASGI).
+
+Each browser tab gets one `docker exec` session with a TTY, opened when the
+WebSocket connects and ended when it closes. Output is streamed as binary
+frames as soon as the process writes it; input arrives as binary frames
+(keystrokes) and text frames carry JSON control messages:
+
+    {"type": "resize", "cols": 120, "rows": 40}
+
+Backpressure: the thread reading the exec socket hands chunks over through
+a bounded queue, so when the browser does not keep up the reader blocks and
+the process in the container blocks on its TTY instead of filling memory.
+"""
+import re
+import json
+import uuid
+import asyncio
+import threading
+from types import SimpleNamespace
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+CONSOLE_PATH_RE = re.compile(r'^/ws/instance/(?P<pk>\d+)/console/$')
+OUTPUT_QUEUE_CHUNKS = 64
+READ_SIZE = 65536
+
+
+class ConsoleSessions:
+    """Open sessions per user, to enforce CONSOLE_MAX_SESSIONS and CONSOLE_MAX_SESSIONS_PER_USER"""
+
+    _sessions = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def open(cls, user_id):
+        """Registers a session. Returns its id, or None when a limit is reached"""
+        with cls._lock:
+            if len(cls._sessions) >= getattr(settings, 'CONSOLE_MAX_SESSIONS', 20):
+                return None
+            per_user = sum(1 for owner in cls._sessions.values() if owner == user_id)
+            if per_user >= getattr(settings, 'CONSOLE_MAX_SESSIONS_PER_USER', 5):
+                return None
+            session_id = uuid.uuid4().hex[:12]
+            cls._sessions[session_id] = user_id
+            return session_id
+
+    @classmethod
+    def close(cls, session_id):
+        with cls._lock:
+            cls._sessions.pop(session_id, None)
+
+
+def _headers(scope):
+    return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+
+def _origin_allowed(headers):
+    """
+    Same-origin check: browsers send cookies on cross-site WebSocket
+    connections too. The Origin must match the Host of the handshake or be
+    one of CSRF_TRUSTED_ORIGINS (same rules as Django's CSRF check,
+    including "https://*.example.com" entries); ALLOWED_HOSTS is not used
+    because it may be '*'.
+    """
+    from urllib.parse import urlparse
+    from django.utils.http import is_same_domain
+
+    origin = headers.get('origin')
+    if not origin:
+        return True
+    parsed = urlparse(origin)
+    if parsed.netloc and parsed.netloc == headers.get('host'):
+        return True
+    trusted = getattr(settings, 'CSRF_TRUSTED_ORIGINS', [])
+    if origin in trusted:
+        return True
+    wildcards = [urlparse(entry) for entry in trusted if '*' in entry]
+    # "*.example.com" -> ".example.com", which is_same_domain treats as any subdomain
+    return any(
+        entry.scheme == parsed.scheme and is_same_domain(parsed.netloc, entry.netloc[1:])
+        for entry in wildcards
+    )
+
+
+def _authenticate(headers):
+    """User of the Django session cookie of the handshake (AnonymousUser when none)"""
+    from http.cookies import SimpleCookie
+    from importlib import import_module
+    from django.contrib.auth import get_user
+
+    cookie = SimpleCookie()
+    cookie.load(headers.get('cookie', ''))
+    session_key = cookie[settings.SESSION_COOKIE_NAME].value if settings.SESSION_COOKIE_NAME in cookie else None
+    store = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    return get_user(SimpleNamespace(session=store))
+
+
+def _open_exec(instance_pk, token):
+    """Starts a TTY shell in the Odoo container. Returns (api, exec_id, container, raw socket)"""
+    import docker
+    from .models import Instance
+
+    instance = Instance.objects.get(pk=instance_pk)
+    if not instance.container_id:
+        raise LookupError('La instancia no tiene contenedor')
+    client = docker.from_env()
+    container = client.containers.get(instance.container_id)
+    if container.status != 'running':
+        raise LookupError('El contenedor no está en ejecución')
+
+    # The shell records its pid so the session can be hung up when the tab closes
+    shell = (
+        f"echo $$ > /tmp/.console-{token}.pid; "
+        "if command -v bash >/dev/null 2>&1; then exec bash; else exec sh; fi"
+    )
+    exec_id = client.api.exec_create(
+        container.id, ['sh', '-c', shell], stdin=True, tty=True,
+        environment={'TERM': 'xterm-256color'},
+    )['Id']
+    sock = client.api.exec_start(exec_id, socket=True, tty=True)
+    raw = getattr(sock, '_sock', sock)
+    raw.setblocking(True)
+    return client.api, exec_id, container, raw
+
+
+def _hang_up(container, token):
+    """SIGHUP to the session shell: it and its foreground jobs end like on a closed terminal"""
+    try:
+        container.exec_run(['sh', '-c', f"kill -HUP $(cat /tmp/.console-{token}.pid) 2>/dev/null; rm -f /tmp/.console-{token}.pid"])
+    except Exception as e:
+        print(f"Error closing console session: {str(e)}")
+
+
+def _reader(raw, loop, output):
+    """Thread: exec socket -> bounded queue; blocks while the queue is full (backpressure)"""
+    try:
+        while True:
+            data = raw.recv(READ_SIZE)
+            if not data:
+                break
+            asyncio.run_coroutine_threadsafe(output.put(data), loop).result()
+    except Exception:
+        pass
+    asyncio.run_coroutine_threadsafe(output.put(None), loop)
+
+
+async def console_application(scope, receive, send, instance_pk):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    headers = _headers(scope)
+    if not _origin_allowed(headers):
+        await send({'type': 'websocket.close', 'code': 4003})
+        return
+    user = await sync_to_async(_authenticate)(headers)
+    if not user.is_authenticated:
+        await send({'type': 'websocket.close', 'code': 4001})
+        return
+
+    await send({'type': 'websocket.accept'})
+
+    async def close_with(text, code):
+        await send({'type': 'websocket.send', 'text': json.dumps({'type': 'error', 'message': text})})
+        await send({'type': 'websocket.close', 'code': code})
+
+    session_id = ConsoleSessions.open(user.pk)
+    if session_id is None:
+        await close_with('Demasiadas consolas abiertas, cierra alguna e inténtalo de nuevo', 4008)
+        return
+
+    loop = asyncio.get_running_loop()
+    idle_timeout = getattr(settings, 'CONSOLE_IDLE_TIMEOUT', 900)
+    try:
+        try:
+            api, exec_id, container, raw = await sync_to_async(_open_exec, thread_sensitive=False)(instance_pk, session_id)
+        except Exception as e:
+            await close_with(f'No se pudo abrir la consola: {str(e)}', 4004)
+            return
+
+        output = asyncio.Queue(maxsize=OUTPUT_QUEUE_CHUNKS)
+        threading.Thread(target=_reader, args=(raw, loop, output), daemon=True).start()
+        activity = {'last': loop.time()}
+
+        async def pump_output():
+            while True:
+                data = await output.get()
+                if data is None:
+                    return
+                activity['last'] = loop.time()
+                await send({'type': 'websocket.send', 'bytes': data})
+
+        async def pump_input():
+            while True:
+                remaining = idle_timeout - (loop.time() - activity['last'])
+                if remaining <= 0:
+                    await send({'type': 'websocket.send', 'text': json.dumps({
+                        'type': 'error', 'message': f'Sesión cerrada tras {idle_timeout}s sin actividad',
+                    })})
+                    return
+                try:
+                    message = await asyncio.wait_for(receive(), timeout=min(remaining, 30))
+                except asyncio.TimeoutError:
+                    continue
+                if message['type'] == 'websocket.disconnect':
+                    return
+                activity['last'] = loop.time()
+                if message.get('bytes'):
+                    await loop.run_in_executor(None, raw.sendall, message['bytes'])
+                elif message.get('text'):
+                    try:
+                        control = json.loads(message['text'])
+                    except ValueError:
+                        continue
+                    if control.get('type') == 'resize':
+                        await loop.run_in_executor(
+                            None, lambda: api.exec_resize(exec_id, height=int(control['rows']), width=int(control['cols']))
+                        )
+                    elif control.get('type') == 'input':
+                        await loop.run_in_executor(None, raw.sendall, control.get('data', '').encode('utf-8'))
+
+        tasks = [asyncio.ensure_future(pump_output()), asyncio.ensure_future(pump_input())]
+        try:
+            # The shell exiting or the tab closing ends the session
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await loop.run_in_executor(None, _hang_up, container, session_id)
+            try:
+                raw.close()
+            except Exception:
+                pass
+            # Unblocks the reader if it is waiting on a full queue
+            while not output.empty():
+                output.get_nowait()
+        try:
+            await send({'type': 'websocket.close', 'code': 1000})
+        except Exception:
+            pass
+    finally:
+        ConsoleSessions.close(session_id)
+
+
+async def websocket_application(scope, receive, send):
+    """Routes WebSocket connections; only the instance console is served"""
+    match = CONSOLE_PATH_RE.match(scope['path'])
+    if not match:
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    await console_application(scope, receive, send, int(match.group('pk')))
@@ -45,6 +45,9 @@ class Container(models.Model):
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='stopped')
     container_id = models.CharField(max_length=255, blank=True, null=True)
+
+    # Docker log policy (driver, max_size, max_file, compress), from the template 'logging' section
+    log_config = models.JSONField(default=dict, blank=True, help_text="Log policy overrides")
     
     # Metadata
     description = models.TextField(blank=True)
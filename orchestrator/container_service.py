@@ -2,6 +2,7 @@ import docker
 from django.conf import settings
 import os
 from .template_services import get_template_loader
+from .log_policy import container_policy, log_options
 
 class ContainerService:
     """Service for managing generic Docker containers"""
@@ -86,7 +87,8 @@ class ContainerService:
                 labels=labels,
                 user=user_config,
                 detach=True,
-                restart_policy={'Name': 'unless-stopped'}
+                restart_policy={'Name': 'unless-stopped'},
+                **log_options(container_policy(container))
             )
             
             container.container_id = docker_container.id
@@ -0,0 +1,206 @@
+import os
+import re
+import base64
+import hashlib
+import threading
+from urllib.parse import quote
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, content_disposition_header
+from .streaming import streaming_content
+
+
+class DownloadService:
+    """Serves backup archives with HTTP Range, conditional requests and web server offloading"""
+
+    CHUNK_SIZE = 1024 * 1024
+    RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+    # Backups whose missing checksum is being computed in the background
+    _checksums_running = set()
+    _checksums_lock = threading.Lock()
+
+    @staticmethod
+    def compute_sha256(file_path, chunk_size=CHUNK_SIZE):
+        """Computes the SHA-256 of a file reading it in chunks"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def schedule_backup_checksum(cls, backup):
+        """
+        Computes a missing backup checksum in a background thread, so the
+        download that noticed it is not held up hashing the whole archive.
+        The checksum headers are sent once it has been stored.
+        """
+        with cls._checksums_lock:
+            if backup.pk in cls._checksums_running:
+                return
+            cls._checksums_running.add(backup.pk)
+
+        def compute():
+            from django.db import connection
+            from .backup_models import Backup
+            try:
+                checksum = cls.compute_sha256(backup.file_path)
+                Backup.objects.filter(pk=backup.pk, checksum_sha256='').update(checksum_sha256=checksum)
+            except Exception as e:
+                print(f"Error computing checksum of {backup.filename}: {str(e)}")
+            finally:
+                with cls._checksums_lock:
+                    cls._checksums_running.discard(backup.pk)
+                connection.close()
+
+        threading.Thread(target=compute, daemon=True).start()
+
+    @staticmethod
+    def build_etag(file_stat):
+        """Strong ETag derived from size and modification time (cheap, no hashing)"""
+        return f'"{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}"'
+
+    @classmethod
+    def serve_file(cls, request, file_path, filename, sha256='', content_type='application/zip'):
+        """
+        Returns a response for the file honouring Range, If-Range, If-None-Match
+        and If-Modified-Since. When BACKUP_DOWNLOAD_OFFLOAD is set the transfer is
+        delegated to the front web server (nginx X-Accel-Redirect / X-Sendfile).
+        """
+        file_stat = os.stat(file_path)
+        file_size = file_stat.st_size
+        etag = cls.build_etag(file_stat)
+        last_modified = int(file_stat.st_mtime)
+
+        # 1. Conditional requests (304 Not Modified / 412 Precondition Failed)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            cls._add_common_headers(response, filename, etag, last_modified, sha256)
+            return response
+
+        # 2. Offload to the web server, which handles ranges itself
+        offload_header = cls._offload_header(file_path)
+        if offload_header:
+            response = HttpResponse(content_type=content_type)
+            response[offload_header[0]] = offload_header[1]
+            cls._add_common_headers(response, filename, etag, last_modified, sha256)
+            return response
+
+        # 3. Range requests (resume of interrupted downloads)
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if range_header and cls._if_range_matches(request, etag, last_modified):
+            byte_range = cls._parse_range(range_header, file_size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{file_size}'
+            cls._add_common_headers(response, filename, etag, last_modified, sha256)
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            if request.method == 'HEAD':
+                response = HttpResponse(status=206, content_type=content_type)
+            else:
+                response = StreamingHttpResponse(
+                    streaming_content(request, cls._iter_range(file_path, start, length)),
+                    status=206,
+                    content_type=content_type
+                )
+            response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+            response['Content-Length'] = str(length)
+            cls._add_common_headers(response, filename, etag, last_modified, sha256)
+            return response
+
+        # 4. Full download - FileResponse lets the WSGI server use sendfile()
+        response = FileResponse(open(file_path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+        if isinstance(request, ASGIRequest):
+            # Django would read the whole file into memory (WSGI keeps sendfile)
+            response.streaming_content = streaming_content(request, response.streaming_content)
+        response['Content-Length'] = str(file_size)
+        cls._add_common_headers(response, filename, etag, last_modified, sha256)
+        return response
+
+    @classmethod
+    def _parse_range(cls, range_header, file_size):
+        """
+        Parses a single byte range.
+        Returns (start, end), None to serve the whole file (multiple or malformed
+        ranges are ignored as allowed by RFC 9110) or False if unsatisfiable.
+        """
+        match = cls.RANGE_PATTERN.match(range_header.strip())
+        if not match:
+            return None
+
+        start, end = match.groups()
+        if not start and not end:
+            return None
+
+        if not start:
+            # Suffix range: last N bytes
+            suffix_length = int(end)
+            if suffix_length == 0 or file_size == 0:
+                return False
+            return max(file_size - suffix_length, 0), file_size - 1
+
+        start = int(start)
+        if start >= file_size:
+            return False
+        end = int(end) if end else file_size - 1
+        if end < start:
+            return None
+        return start, min(end, file_size - 1)
+
+    @staticmethod
+    def _if_range_matches(request, etag, last_modified):
+        """If-Range: only honour the Range header if the file has not changed"""
+        if_range = request.headers.get('If-Range')
+        if not if_range:
+            return True
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            return if_range == etag
+        if_range_date = parse_http_date_safe(if_range)
+        return if_range_date is not None and last_modified <= if_range_date
+
+    @classmethod
+    def _iter_range(cls, file_path, start, length):
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(cls.CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    @staticmethod
+    def _offload_header(file_path):
+        """Returns (header, value) for web server offloading or None"""
+        offload = getattr(settings, 'BACKUP_DOWNLOAD_OFFLOAD', '')
+        if offload == 'nginx':
+            backups_dir = os.path.join(settings.BASE_DIR, 'backups')
+            relative_path = os.path.relpath(file_path, backups_dir)
+            if relative_path.startswith('..'):
+                # Only files inside the backups directory are exposed to nginx
+                return None
+            prefix = getattr(settings, 'BACKUP_ACCEL_REDIRECT_PREFIX', '/protected-backups/')
+            return 'X-Accel-Redirect', f"{prefix.rstrip('/')}/{quote(relative_path)}"
+        if offload == 'apache':
+            return 'X-Sendfile', str(file_path)
+        return None
+
+    @staticmethod
+    def _add_common_headers(response, filename, etag, last_modified, sha256):
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        if sha256:
+            response['X-Checksum-SHA256'] = sha256
+            response['Digest'] = 'sha-256=' + base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
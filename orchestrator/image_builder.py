@@ -0,0 +1,193 @@
+import io
+import re
+import json
+import hashlib
+import tarfile
+import threading
+import docker
+from django.conf import settings
+
+# Labels of the derived images, used to find them when pruning
+BASE_IMAGE_LABEL = 'orchestrator.base-image'
+HASH_LABEL = 'orchestrator.dependencies-hash'
+
+# Bump when the Dockerfile below changes so existing images are rebuilt
+DOCKERFILE_VERSION = 1
+
+SYSTEM_PACKAGE_RE = re.compile(r'^[a-z0-9][a-z0-9+.\-]*(=[A-Za-z0-9.+~:\-]+)?$')
+
+_build_lock = threading.Lock()
+
+
+def parse_requirements(content):
+    """Requirement lines, deduplicated and sorted: the same set always gives the same image"""
+    lines = {line.strip() for line in (content or '').splitlines()}
+    return sorted((line for line in lines if line and not line.startswith('#')), key=str.lower)
+
+
+def parse_system_packages(content):
+    """apt package names (optionally name=version). Raises ValueError on anything else"""
+    packages = sorted(set((content or '').split()))
+    invalid = [package for package in packages if not SYSTEM_PACKAGE_RE.match(package)]
+    if invalid:
+        raise ValueError(f"Paquetes del sistema no válidos: {', '.join(invalid)}")
+    return packages
+
+
+def merge_requirements(existing, new):
+    """Requirements of `existing` plus `new`; a package in both keeps the line of `new`"""
+    from .requirements_service import package_name
+
+    merged = {package_name(line): line for line in parse_requirements(existing)}
+    merged.update({package_name(line): line for line in parse_requirements(new)})
+    return '\n'.join(parse_requirements('\n'.join(merged.values())))
+
+
+def base_image(instance):
+    return f"odoo:{instance.odoo_version}"
+
+
+def dependencies_hash(instance):
+    """Hash of the base image and dependency set; instances that share it share the image"""
+    payload = json.dumps({
+        'base': base_image(instance),
+        'python': parse_requirements(instance.python_requirements),
+        'system': parse_system_packages(instance.system_packages),
+        'dockerfile': DOCKERFILE_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def image_tag(instance):
+    """Image the Odoo container of an instance runs: the official one when it has no dependencies"""
+    if not parse_requirements(instance.python_requirements) and not parse_system_packages(instance.system_packages):
+        return base_image(instance)
+    return f"{base_image(instance)}-{dependencies_hash(instance)}"
+
+
+def dockerfile(base, requirements, system_packages):
+    """
+    System packages and Python requirements go in separate layers, so a
+    change in the requirements reuses the cached apt layer.
+    """
+    lines = [f"FROM {base}", "USER root"]
+    if system_packages:
+        lines.append(
+            "RUN apt-get update && apt-get install -y --no-install-recommends "
+            f"{' '.join(system_packages)} && rm -rf /var/lib/apt/lists/*"
+        )
+    if requirements:
+        environment = 'PIP_DISABLE_PIP_VERSION_CHECK=1 PIP_NO_CACHE_DIR=1'
+        if getattr(settings, 'PIP_BREAK_SYSTEM_PACKAGES', True):
+            # Debian 12 based images (Odoo 17+) refuse system-wide installs otherwise
+            environment += ' PIP_BREAK_SYSTEM_PACKAGES=1'
+        lines.append("COPY requirements.txt /tmp/requirements.txt")
+        lines.append(
+            "RUN PIP=pip3; command -v pip3 >/dev/null 2>&1 || PIP=pip; "
+            f"{environment} $PIP install -r /tmp/requirements.txt && rm /tmp/requirements.txt"
+        )
+    lines.append("USER odoo")
+    return '\n'.join(lines) + '\n'
+
+
+class ImageBuilder:
+    """
+    Builds and reuses the derived images odoo:<version>-<hash> with the
+    Python requirements and system packages of the instances baked in, so
+    they survive the container being recreated on every redeploy.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or docker.from_env()
+
+    @staticmethod
+    def _context(files):
+        """Build context tar; fixed mtimes keep the COPY layer cache valid between builds"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            for name, content in files.items():
+                data = content.encode('utf-8')
+                info = tarfile.TarInfo(name=name)
+                info.size = len(data)
+                info.mtime = 0
+                tar.addfile(info, io.BytesIO(data))
+        buffer.seek(0)
+        return buffer
+
+    def image_exists(self, tag):
+        try:
+            self.client.images.get(tag)
+            return True
+        except docker.errors.ImageNotFound:
+            return False
+
+    def build(self, instance):
+        """Builds the derived image of an instance. Returns its tag"""
+        import time
+
+        tag = image_tag(instance)
+        base = base_image(instance)
+        requirements = parse_requirements(instance.python_requirements)
+        system_packages = parse_system_packages(instance.system_packages)
+        context = self._context({
+            'Dockerfile': dockerfile(base, requirements, system_packages),
+            'requirements.txt': '\n'.join(requirements) + '\n',
+        })
+
+        print(f"Building image {tag} ({len(requirements)} requirements, {len(system_packages)} system packages)...")
+        started = time.monotonic()
+        build_log = []
+        for chunk in self.client.api.build(
+            fileobj=context,
+            custom_context=True,
+            tag=tag,
+            rm=True,
+            forcerm=True,
+            decode=True,
+            labels={BASE_IMAGE_LABEL: base, HASH_LABEL: dependencies_hash(instance)},
+        ):
+            build_log.append(chunk)
+            if 'stream' in chunk and chunk['stream'].strip():
+                print(chunk['stream'].rstrip())
+            if 'error' in chunk:
+                raise docker.errors.BuildError(chunk['error'].strip(), build_log)
+        print(f"Image {tag} built in {time.monotonic() - started:.1f}s")
+        return tag
+
+    def ensure_image(self, instance):
+        """Tag of the image for an instance, building it first if it does not exist yet"""
+        tag = image_tag(instance)
+        if tag == base_image(instance) or self.image_exists(tag):
+            return tag
+        # One build at a time: concurrent deploys of the same set build it once
+        with _build_lock:
+            if self.image_exists(tag):
+                return tag
+            return self.build(instance)
+
+    def prune(self, dry_run=False):
+        """Removes the derived images no instance uses anymore. Returns the removed tags"""
+        from .models import Instance
+
+        in_use = set()
+        for instance in Instance.objects.all():
+            try:
+                in_use.add(image_tag(instance))
+            except ValueError:
+                continue
+
+        removed = []
+        for image in self.client.images.list(filters={'label': HASH_LABEL}):
+            tags = [tag for tag in image.tags if tag not in in_use]
+            if not tags or len(tags) != len(image.tags):
+                continue
+            for tag in tags:
+                if not dry_run:
+                    try:
+                        self.client.images.remove(tag)
+                    except docker.errors.APIError as e:
+                        # Still used by a container (e.g. an instance not redeployed yet)
+                        print(f"Could not remove image {tag}: {str(e)}")
+                        continue
+                removed.append(tag)
+        return removed
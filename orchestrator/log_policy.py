@@ -0,0 +1,270 @@
+import os
+import docker
+from django.conf import settings
+
+# Drivers whose options are the rotation settings below (and that `docker logs` can read)
+ROTATING_DRIVERS = ('json-file', 'local')
+
+
+def default_policy():
+    """Global policy from the DOCKER_LOG_* settings"""
+    return {
+        'driver': getattr(settings, 'DOCKER_LOG_DRIVER', 'json-file'),
+        'max_size': getattr(settings, 'DOCKER_LOG_MAX_SIZE', '20m'),
+        'max_file': getattr(settings, 'DOCKER_LOG_MAX_FILE', 5),
+        'compress': getattr(settings, 'DOCKER_LOG_COMPRESS', True),
+    }
+
+
+def merge_policy(policy, overrides):
+    """Policy with the non-empty overrides applied; accepts docker style keys (max-size, max-file)"""
+    policy = dict(policy)
+    for key, value in (overrides or {}).items():
+        key = key.replace('-', '_')
+        if key in policy and value not in (None, ''):
+            policy[key] = value
+    return policy
+
+
+def instance_policy(instance):
+    """Policy of the Odoo and database containers of an instance"""
+    return merge_policy(default_policy(), {
+        'driver': instance.log_driver,
+        'max_size': instance.log_max_size,
+        'max_file': instance.log_max_file,
+        'compress': instance.log_compress,
+    })
+
+
+def container_policy(container):
+    """Policy of a managed Container: global, then its template 'logging' section, then its own log_config"""
+    from .template_services import get_template_loader
+    template_logging = get_template_loader().get_template_defaults(container.template).get('logging') or {}
+    return merge_policy(merge_policy(default_policy(), template_logging), container.log_config)
+
+
+def docker_log_config(policy):
+    """Policy as the HostConfig.LogConfig dict of the Docker API"""
+    config = {}
+    if policy['driver'] in ROTATING_DRIVERS:
+        config = {
+            'max-size': str(policy['max_size']),
+            'max-file': str(policy['max_file']),
+            'compress': 'true' if policy['compress'] else 'false',
+        }
+    return {'Type': policy['driver'], 'Config': config}
+
+
+def log_options(policy):
+    """Extra docker run kwargs applying a log policy"""
+    log_config = docker_log_config(policy)
+    return {'log_config': docker.types.LogConfig(type=log_config['Type'], config=log_config['Config'])}
+
+
+class LogPolicyService:
+    """
+    Log policies of the containers already running: which ones differ from
+    their policy, how much disk their logs use, and re-applying the policy.
+    Docker cannot change the log configuration of an existing container, so
+    re-applying recreates it with the same configuration, mounts (including
+    anonymous volumes, e.g. the PostgreSQL data) and networks.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or docker.from_env()
+
+    def managed(self):
+        """[(docker container, policy, owner)] of every instance and managed container that exists"""
+        from .models import Instance
+        from .container_models import Container
+
+        by_name = {container.name: container for container in self.client.containers.list(all=True)}
+        found = []
+        for instance in Instance.objects.all():
+            policy = instance_policy(instance)
+            for prefix in ('odoo_', 'db_'):
+                container = by_name.get(f"{prefix}{instance.name}")
+                if container:
+                    found.append((container, policy, instance))
+        for model in Container.objects.all():
+            container = by_name.get(model.name)
+            if container:
+                found.append((container, container_policy(model), model))
+        return found
+
+    @staticmethod
+    def current(container):
+        log_config = container.attrs['HostConfig'].get('LogConfig') or {}
+        return {'Type': log_config.get('Type', ''), 'Config': log_config.get('Config') or {}}
+
+    @classmethod
+    def complies(cls, container, policy):
+        return cls.current(container) == docker_log_config(policy)
+
+    def log_sizes(self, containers):
+        """
+        {container id: bytes of its log files, rotated ones included}. Read
+        directly when the Docker data directory is accessible, otherwise with
+        stat in a throwaway container that mounts it (Docker-in-Docker).
+        """
+        root = os.path.join(self.client.info().get('DockerRootDir', '/var/lib/docker'), 'containers')
+        sizes = {}
+        missing = []
+        for container in containers:
+            try:
+                sizes[container.id] = self._directory_log_bytes(os.path.join(root, container.id))
+            except OSError:
+                missing.append(container.id)
+
+        if missing:
+            patterns = ' '.join(f"/containers/{cid}/*-json.log* /containers/{cid}/local-logs/*" for cid in missing)
+            try:
+                # postgres:13 is already present: every instance database uses it
+                output = self.client.containers.run(
+                    'postgres:13',
+                    ['sh', '-c', f"stat -c '%s %n' {patterns} 2>/dev/null; true"],
+                    volumes={root: {'bind': '/containers', 'mode': 'ro'}},
+                    remove=True,
+                )
+                for line in output.decode('utf-8', 'replace').splitlines():
+                    size, _, path = line.partition(' ')
+                    cid = path.split('/')[2] if path.count('/') >= 3 else ''
+                    if size.isdigit() and cid:
+                        sizes[cid] = sizes.get(cid, 0) + int(size)
+            except Exception as e:
+                print(f"Could not read container log sizes: {str(e)}")
+        return sizes
+
+    @staticmethod
+    def _directory_log_bytes(path):
+        total = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if '-json.log' in entry.name and entry.is_file():
+                    total += entry.stat().st_size
+                elif entry.name == 'local-logs' and entry.is_dir():
+                    with os.scandir(entry.path) as logs:
+                        total += sum(log.stat().st_size for log in logs if log.is_file())
+        return total
+
+    def report(self):
+        """One row per container: policy, current configuration, log size and whether it complies"""
+        managed = self.managed()
+        sizes = self.log_sizes([container for container, _, _ in managed])
+        rows = []
+        for container, policy, owner in managed:
+            current = self.current(container)
+            size = sizes.get(container.id)
+            rows.append({
+                'name': container.name,
+                'status': container.status,
+                'owner': str(owner),
+                'policy': policy,
+                'driver': current['Type'],
+                'max_size': current['Config'].get('max-size', ''),
+                'max_file': current['Config'].get('max-file', ''),
+                'compress': current['Config'].get('compress', ''),
+                'bytes': size,
+                'size_mb': round(size / (1024 * 1024), 1) if size is not None else None,
+                'complies': current == docker_log_config(policy),
+            })
+        rows.sort(key=lambda row: row['bytes'] or 0, reverse=True)
+        return rows
+
+    def recreate(self, container, policy):
+        """
+        Replaces a container by an identical one with the given log policy.
+        The old one is renamed and kept until the new one is running, and
+        restored if anything fails. Returns the new container.
+        """
+        attrs = container.attrs
+        config = attrs['Config']
+        host_config = dict(attrs['HostConfig'])
+        host_config['LogConfig'] = docker_log_config(policy)
+
+        # Anonymous volumes are not in Binds: mount them again by name so no data is lost
+        binds = list(host_config.get('Binds') or [])
+        bound = {bind.split(':')[1] for bind in binds if ':' in bind}
+        bound |= {mount.get('Target') for mount in host_config.get('Mounts') or []}
+        for mount in attrs.get('Mounts', []):
+            if mount.get('Type') == 'volume' and mount['Destination'] not in bound:
+                binds.append(f"{mount['Name']}:{mount['Destination']}:{'rw' if mount.get('RW', True) else 'ro'}")
+        host_config['Binds'] = binds
+
+        name = container.name
+        was_running = container.status == 'running'
+        networks = list((attrs['NetworkSettings'].get('Networks') or {}).keys())
+        primary = host_config.get('NetworkMode')
+
+        if was_running:
+            container.stop()
+        container.rename(f"{name}_old_logs")
+        try:
+            created = self.client.api.create_container(
+                config['Image'],
+                name=name,
+                command=config.get('Cmd'),
+                entrypoint=config.get('Entrypoint'),
+                environment=config.get('Env'),
+                labels=config.get('Labels'),
+                user=config.get('User') or None,
+                working_dir=config.get('WorkingDir') or None,
+                ports=list((config.get('ExposedPorts') or {}).keys()),
+                volumes=list((config.get('Volumes') or {}).keys()),
+                host_config=host_config,
+            )
+            new_container = self.client.containers.get(created['Id'])
+            for network in networks:
+                if network != primary:
+                    self.client.networks.get(network).connect(new_container)
+            if was_running:
+                new_container.start()
+        except Exception:
+            try:
+                self.client.containers.get(name).remove(force=True)
+            except docker.errors.NotFound:
+                pass
+            container.rename(name)
+            if was_running:
+                container.start()
+            raise
+
+        container.remove()
+        new_container.reload()
+        return new_container
+
+    def apply(self, names=None, dry_run=False):
+        """
+        Recreates the containers whose log configuration differs from their
+        policy (only `names` when given). Returns [(name, result message)].
+        """
+        from .models import Instance
+
+        results = []
+        for container, policy, owner in self.managed():
+            name = container.name
+            if names and name not in names:
+                continue
+            if self.complies(container, policy):
+                continue
+            if dry_run:
+                results.append((name, f"se aplicaría {docker_log_config(policy)}"))
+                continue
+            try:
+                new_container = self.recreate(container, policy)
+            except Exception as e:
+                results.append((name, f"error: {str(e)}"))
+                continue
+
+            # The Odoo container id and its (randomly assigned) host port change
+            if isinstance(owner, Instance) and name.startswith('odoo_'):
+                ports = new_container.attrs['NetworkSettings']['Ports'] or {}
+                if ports.get('8069/tcp'):
+                    owner.port = int(ports['8069/tcp'][0]['HostPort'])
+                owner.container_id = new_container.id
+                owner.save(update_fields=['port', 'container_id'])
+            elif not isinstance(owner, Instance):
+                owner.container_id = new_container.id
+                owner.save(update_fields=['container_id'])
+            results.append((name, 'política aplicada'))
+        return results
@@ -0,0 +1,466 @@
+import os
+import re
+import json
+import gzip
+import time
+import queue
+import shutil
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+
+
+# Odoo: "2026-01-01 10:00:00,123 7 ERROR dbname odoo.addons.sale.models: message"
+ODOO_LINE_RE = re.compile(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d+ \d+ ([A-Z]+) \S+ ([\w.]+): ')
+# PostgreSQL: "2026-01-01 10:00:00.123 UTC [42] ERROR:  message"
+PG_LINE_RE = re.compile(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d[.\d]* \w+ \[\d+\] ([A-Z]+):  ')
+# Anything else: the first level-looking word near the start of the line
+GENERIC_LEVEL_RE = re.compile(r'\b(DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|CRITICAL|FATAL|PANIC)\b')
+
+LEVEL_ALIASES = {'WARN': 'WARNING', 'LOG': 'INFO', 'NOTICE': 'INFO'}
+# PostgreSQL lines that belong to the previous message
+PG_CONTINUATIONS = {'DETAIL', 'HINT', 'STATEMENT', 'CONTEXT', 'QUERY', 'LOCATION'}
+
+INDEX_FILE = 'index.json'
+CURSORS_FILE = 'cursors.json'
+
+
+def store_dir():
+    return getattr(settings, 'LOG_STORE_DIR', '') or os.path.join(settings.BASE_DIR, 'logstore')
+
+
+def timestamp_to_epoch(timestamp):
+    """
+    Docker RFC3339Nano timestamp to seconds since the epoch, rounded down to
+    the microsecond so a `since` built from it never skips a later line.
+    """
+    seconds, _, fraction = timestamp.rstrip('Z').partition('.')
+    epoch = datetime.fromisoformat(seconds).replace(tzinfo=dt_timezone.utc).timestamp()
+    return epoch + int(fraction[:6].ljust(6, '0')) / 1e6 - 1e-6
+
+
+def format_timestamp(value):
+    """Aware datetime to the fixed-width Docker timestamp format, so both compare as strings"""
+    return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f000Z')
+
+
+def source_kind(name):
+    """('odoo'|'db'|'container', instance or container name) of a collected container"""
+    for prefix, kind in (('odoo_', 'odoo'), ('db_', 'db')):
+        if name.startswith(prefix):
+            return kind, name[len(prefix):]
+    return 'container', name
+
+
+class LineParser:
+    """
+    Level and logger of each line of one container. Lines that do not start a
+    message (tracebacks, PostgreSQL DETAIL/STATEMENT) inherit them from the
+    previous message, so searching ERROR finds the whole traceback.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.level = ''
+        self.logger = ''
+
+    def parse(self, text):
+        if self.kind == 'odoo':
+            match = ODOO_LINE_RE.match(text)
+            if match:
+                self.level, self.logger = LEVEL_ALIASES.get(match.group(1), match.group(1)), match.group(2)
+            return self.level, self.logger
+
+        if self.kind == 'db':
+            match = PG_LINE_RE.match(text)
+            if match and match.group(1) not in PG_CONTINUATIONS:
+                self.level, self.logger = LEVEL_ALIASES.get(match.group(1), match.group(1)), 'postgresql'
+            return self.level, self.logger
+
+        match = GENERIC_LEVEL_RE.search(text[:200])
+        level = LEVEL_ALIASES.get(match.group(1), match.group(1)) if match else ''
+        return level, ''
+
+
+class LogStore:
+    """
+    Time-partitioned, compressed store of container logs.
+
+    Every hour is a directory (<LOG_STORE_DIR>/YYYY-MM-DD/HH) with one segment
+    per container. A segment is a sequence of gzip members ("blocks"), one
+    per flush, each holding "timestamp<TAB>level<TAB>logger<TAB>message"
+    lines. The hour's index.json records the offset and time range of every
+    block and an inverted index level/logger/instance -> blocks, so a search
+    only decompresses the blocks that can match.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or store_dir()
+
+    # Writing
+
+    def partition_path(self, timestamp):
+        # "2026-01-01T10:..." -> 2026-01-01/10
+        return os.path.join(self.root, timestamp[:10], timestamp[11:13])
+
+    def load_index(self, partition):
+        try:
+            with open(os.path.join(partition, INDEX_FILE)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'segments': {}, 'level': {}, 'logger': {}, 'instance': {}}
+
+    def save_index(self, partition, index):
+        path = os.path.join(partition, INDEX_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def append(self, source, records):
+        """
+        Writes records (timestamp, level, logger, message) of one container as
+        new blocks, one per hour they span, and indexes them.
+        """
+        kind, instance = source_kind(source)
+        by_partition = {}
+        for record in records:
+            by_partition.setdefault(self.partition_path(record[0]), []).append(record)
+
+        level = getattr(settings, 'LOG_STORE_COMPRESSION_LEVEL', 6)
+        for partition, items in by_partition.items():
+            os.makedirs(partition, exist_ok=True)
+            segment = f"{source}.log.gz"
+            data = gzip.compress(
+                ''.join(f"{ts}\t{lvl}\t{logger}\t{message}\n" for ts, lvl, logger, message in items).encode('utf-8'),
+                compresslevel=level,
+            )
+            with open(os.path.join(partition, segment), 'ab') as f:
+                offset = f.tell()
+                f.write(data)
+
+            index = self.load_index(partition)
+            info = index['segments'].setdefault(segment, {'source': source, 'kind': kind, 'instance': instance, 'blocks': []})
+            block = len(info['blocks'])
+            info['blocks'].append([offset, len(data), items[0][0], items[-1][0], len(items)])
+
+            terms = {
+                'level': {lvl for _, lvl, _, _ in items if lvl},
+                'logger': {logger for _, _, logger, _ in items if logger},
+                'instance': {instance},
+            }
+            for field, values in terms.items():
+                for value in values:
+                    index[field].setdefault(value, {}).setdefault(segment, []).append(block)
+            self.save_index(partition, index)
+
+    # Reading
+
+    def partitions(self, start=None, end=None):
+        """Hour directories overlapping [start, end] (Docker timestamp strings), oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for day in sorted(os.listdir(self.root)):
+            day_path = os.path.join(self.root, day)
+            if not os.path.isdir(day_path):
+                continue
+            for hour in sorted(os.listdir(day_path)):
+                hour_start = f"{day}T{hour}"
+                # Whole hour before start or after end: compare on the hour prefix
+                if start and hour_start < start[:13]:
+                    continue
+                if end and hour_start > end[:13]:
+                    continue
+                found.append(os.path.join(day_path, hour))
+        return found
+
+    def candidate_blocks(self, index, levels=None, logger=None, instances=None):
+        """{segment: set(block)} that contain at least one line matching every filter"""
+        candidates = {segment: set(range(len(info['blocks']))) for segment, info in index['segments'].items()}
+
+        def restrict(postings_list):
+            allowed = {}
+            for postings in postings_list:
+                for segment, blocks in postings.items():
+                    allowed.setdefault(segment, set()).update(blocks)
+            for segment in list(candidates):
+                candidates[segment] &= allowed.get(segment, set())
+
+        if levels:
+            restrict([index['level'].get(level, {}) for level in levels])
+        if logger:
+            # Prefix match: "odoo.addons.sale" includes its submodules
+            restrict([postings for name, postings in index['logger'].items() if name == logger or name.startswith(logger + '.')])
+        if instances:
+            restrict([index['instance'].get(name, {}) for name in instances])
+        return {segment: blocks for segment, blocks in candidates.items() if blocks}
+
+    def search(self, pattern=None, start=None, end=None, levels=None, logger=None, instances=None, limit=500):
+        """
+        Most recent lines matching every filter, in chronological order.
+        `pattern` is a regular expression searched in the message, `start`
+        and `end` aware datetimes. Raises re.error on an invalid pattern.
+        """
+        started = time.monotonic()
+        regex = re.compile(pattern) if pattern else None
+        start_ts = format_timestamp(start) if start else None
+        end_ts = format_timestamp(end) if end else None
+        levels = set(levels or [])
+
+        results = []
+        blocks_read = 0
+        threshold = None
+        for partition in reversed(self.partitions(start_ts, end_ts)):
+            index = self.load_index(partition)
+            blocks = []
+            for segment, numbers in self.candidate_blocks(index, levels, logger, instances).items():
+                info = index['segments'][segment]
+                for number in numbers:
+                    offset, length, first, last, _ = info['blocks'][number]
+                    if (start_ts and last < start_ts) or (end_ts and first > end_ts):
+                        continue
+                    blocks.append((last, segment, offset, length, info))
+
+            # Newest blocks first: once `limit` results are found, a block
+            # ending before the oldest of them (and every older hour) can be skipped
+            for last, segment, offset, length, info in sorted(blocks, key=lambda block: block[0], reverse=True):
+                if threshold and last <= threshold:
+                    break
+                with open(os.path.join(partition, segment), 'rb') as f:
+                    f.seek(offset)
+                    data = gzip.decompress(f.read(length)).decode('utf-8', 'replace')
+                blocks_read += 1
+                for line in data.splitlines():
+                    ts, lvl, line_logger, message = (line.split('\t', 3) + ['', '', ''])[:4]
+                    if (start_ts and ts < start_ts) or (end_ts and ts > end_ts):
+                        continue
+                    if levels and lvl not in levels:
+                        continue
+                    if logger and not (line_logger == logger or line_logger.startswith(logger + '.')):
+                        continue
+                    if regex and not regex.search(message):
+                        continue
+                    results.append({
+                        'timestamp': ts,
+                        'instance': info['instance'],
+                        'source': info['source'],
+                        'kind': info['kind'],
+                        'level': lvl,
+                        'logger': line_logger,
+                        'message': message,
+                    })
+                if len(results) >= limit:
+                    results.sort(key=lambda result: result['timestamp'], reverse=True)
+                    del results[limit:]
+                    threshold = results[-1]['timestamp']
+            if threshold:
+                break
+
+        results.sort(key=lambda result: result['timestamp'])
+        return {
+            'results': results[-limit:],
+            'truncated': threshold is not None,
+            'blocks_read': blocks_read,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+        }
+
+    # Retention
+
+    def prune(self, max_days=None, max_mb=None):
+        """
+        Deletes whole hours older than LOG_STORE_RETENTION_DAYS, then the
+        oldest ones while the store is larger than LOG_STORE_MAX_MB. The
+        current hour is never deleted. Returns (hours deleted, bytes freed).
+        """
+        if max_days is None:
+            max_days = getattr(settings, 'LOG_STORE_RETENTION_DAYS', 14)
+        if max_mb is None:
+            max_mb = getattr(settings, 'LOG_STORE_MAX_MB', 2048)
+
+        partitions = self.partitions()
+        sizes = {}
+        for partition in partitions:
+            with os.scandir(partition) as entries:
+                sizes[partition] = sum(entry.stat().st_size for entry in entries if entry.is_file())
+
+        now = datetime.now(dt_timezone.utc)
+        oldest_kept = format_timestamp(now - timedelta(days=max_days))[:13] if max_days else None
+        current = self.partition_path(format_timestamp(now))
+        total = sum(sizes.values())
+        limit = max_mb * 1024 * 1024 if max_mb else None
+
+        deleted = 0
+        freed = 0
+        for partition in partitions:
+            if partition == current:
+                break
+            day, hour = partition.split(os.sep)[-2:]
+            expired = oldest_kept and f"{day}T{hour}" < oldest_kept
+            if not expired and (limit is None or total <= limit):
+                break
+            shutil.rmtree(partition, ignore_errors=True)
+            deleted += 1
+            freed += sizes[partition]
+            total -= sizes[partition]
+
+        # Remove the emptied day directories
+        for day in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            day_path = os.path.join(self.root, day)
+            if os.path.isdir(day_path) and not os.listdir(day_path):
+                os.rmdir(day_path)
+        return deleted, freed
+
+    def stats(self):
+        """Hours, bytes on disk and lines stored"""
+        hours = 0
+        size = 0
+        lines = 0
+        for partition in self.partitions():
+            hours += 1
+            for segment, info in self.load_index(partition)['segments'].items():
+                lines += sum(block[4] for block in info['blocks'])
+                size += sum(block[1] for block in info['blocks'])
+        return {'hours': hours, 'bytes': size, 'lines': lines}
+
+
+class LogCollector:
+    """
+    Follows the logs of every odoo_*, db_* and managed Container container and
+    writes them to the LogStore. Each container has a cursor (timestamp of
+    the last stored line) in cursors.json, so a restarted collector resumes
+    where it stopped without gaps or duplicates.
+    """
+
+    def __init__(self, store=None, client=None):
+        import docker
+        self.store = store or LogStore()
+        self.client = client or docker.from_env()
+        self.cursors = self._load_cursors()
+        self.lines = queue.Queue()
+        self.followers = {}
+        self.parsers = {}
+        self.buffers = {}
+
+    def _load_cursors(self):
+        try:
+            with open(os.path.join(self.store.root, CURSORS_FILE)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_cursors(self):
+        os.makedirs(self.store.root, exist_ok=True)
+        path = os.path.join(self.store.root, CURSORS_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.cursors, f)
+        os.replace(path + '.tmp', path)
+
+    def containers(self):
+        """Running containers to collect"""
+        from .container_models import Container
+        managed = set(Container.objects.values_list('name', flat=True))
+        return [
+            container for container in self.client.containers.list()
+            if container.name.startswith(('odoo_', 'db_')) or container.name in managed
+        ]
+
+    def _logs_kwargs(self, name):
+        cursor = self.cursors.get(name)
+        if cursor:
+            return {'timestamps': True, 'since': timestamp_to_epoch(cursor)}
+        return {'timestamps': True, 'tail': getattr(settings, 'LOG_STORE_INITIAL_TAIL', 1000)}
+
+    def add_line(self, name, line):
+        """Buffers one raw "timestamp message" line, skipping what is already stored"""
+        timestamp, _, text = line.partition(' ')
+        cursor = self.cursors.get(name)
+        if not timestamp or (cursor and timestamp <= cursor):
+            return
+        parser = self.parsers.setdefault(name, LineParser(source_kind(name)[0]))
+        level, logger = parser.parse(text)
+        self.buffers.setdefault(name, []).append((timestamp, level, logger, text))
+
+    def flush(self):
+        """Writes the buffered lines and advances the cursors. Returns the number of lines written"""
+        written = 0
+        for name, records in list(self.buffers.items()):
+            if not records:
+                continue
+            self.store.append(name, records)
+            self.cursors[name] = records[-1][0]
+            written += len(records)
+        self.buffers = {}
+        if written:
+            self._save_cursors()
+        return written
+
+    def collect_once(self):
+        """Fetches what every container logged since its cursor. Returns the number of lines stored"""
+        for container in self.containers():
+            try:
+                output = container.logs(**self._logs_kwargs(container.name))
+            except Exception as e:
+                print(f"Error reading logs of {container.name}: {str(e)}")
+                continue
+            for line in output.decode('utf-8', 'replace').splitlines():
+                self.add_line(container.name, line)
+        return self.flush()
+
+    def _follow(self, container):
+        """Reader thread: queues (name, line) until the container stops"""
+        buffer = b''
+        try:
+            stream = container.logs(stream=True, follow=True, **self._logs_kwargs(container.name))
+            for chunk in stream:
+                buffer += chunk
+                *complete, buffer = buffer.split(b'\n')
+                for line in complete:
+                    self.lines.put((container.name, line.decode('utf-8', 'replace').rstrip('\r')))
+        except Exception as e:
+            print(f"Log collection of {container.name} stopped: {str(e)}")
+        if buffer:
+            self.lines.put((container.name, buffer.decode('utf-8', 'replace')))
+        self.lines.put((container.name, None))
+
+    def run(self, stop_event=None):
+        """Follows all containers until stop_event is set (or forever), flushing every LOG_STORE_FLUSH_SECONDS"""
+        flush_every = getattr(settings, 'LOG_STORE_FLUSH_SECONDS', 10)
+        discover_every = getattr(settings, 'LOG_STORE_DISCOVER_SECONDS', 30)
+        last_flush = last_discover = last_prune = 0
+        stop_event = stop_event or threading.Event()
+
+        try:
+            while not stop_event.is_set():
+                now = time.monotonic()
+                if now - last_discover >= discover_every:
+                    for container in self.containers():
+                        if container.name not in self.followers:
+                            # The cursor is read when the thread starts: flush first so it is current
+                            self.flush()
+                            thread = threading.Thread(target=self._follow, args=(container,), daemon=True)
+                            self.followers[container.name] = thread
+                            thread.start()
+                    last_discover = now
+
+                try:
+                    name, line = self.lines.get(timeout=1)
+                    while True:
+                        if line is None:
+                            # Container stopped or was replaced: picked up again on the next discovery
+                            self.followers.pop(name, None)
+                        else:
+                            self.add_line(name, line)
+                        name, line = self.lines.get_nowait()
+                except queue.Empty:
+                    pass
+
+                if time.monotonic() - last_flush >= flush_every:
+                    self.flush()
+                    last_flush = time.monotonic()
+                if time.monotonic() - last_prune >= 3600:
+                    deleted, freed = self.store.prune()
+                    if deleted:
+                        print(f"Log store: deleted {deleted} hours ({freed / (1024 * 1024):.1f} MB)")
+                    last_prune = time.monotonic()
+        finally:
+            self.flush()
@@ -0,0 +1,190 @@
+import uuid
+import queue
+import threading
+from collections import deque
+from django.conf import settings
+
+
+class LogSubscription:
+    """Queue of (sequence, line) for one client; None marks the end of the stream"""
+
+    def __init__(self, broadcaster, max_lines):
+        self.broadcaster = broadcaster
+        self.queue = queue.Queue(maxsize=max_lines)
+        self.dropped = 0
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Slow client: drop lines rather than block the shared reader
+            self.dropped += 1
+
+    def get(self, timeout):
+        """Next batch of pending items (blocks up to timeout for the first one), [] on timeout"""
+        try:
+            items = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class LogBroadcaster:
+    """
+    One `logs(follow=True)` reader per container, fanned out to every
+    subscriber (browser tabs, SSE connections). The last LOG_STREAM_BACKLOG
+    lines are kept in memory so new subscribers get the recent log without
+    another Docker API call. The reader stops when the last subscriber leaves
+    or the container stops.
+    """
+
+    _broadcasters = {}
+    _lock = threading.Lock()
+
+    def __init__(self, container_id):
+        self.container_id = container_id
+        self.backlog = deque(maxlen=getattr(settings, 'LOG_STREAM_BACKLOG', 200))
+        self.subscribers = set()
+        self.sequence = 0
+        self.lock = threading.Lock()
+        self.stream = None
+        self.finished = False
+        # Event ids are "<token>-<sequence>": a reconnecting client can resume only on the same reader
+        self.token = uuid.uuid4().hex[:8]
+
+    @classmethod
+    def subscribe(cls, container_id, last_event_id=None):
+        """
+        Subscribes to a container log. Returns (subscription, backlog, resumed):
+        a client reconnecting with the Last-Event-ID of this same reader gets
+        only the lines it missed (resumed=True); otherwise the recent backlog.
+        """
+        with cls._lock:
+            broadcaster = cls._broadcasters.get(container_id)
+            if broadcaster is None or broadcaster.finished:
+                broadcaster = cls(container_id)
+                broadcaster.start()
+                cls._broadcasters[container_id] = broadcaster
+            return broadcaster.add_subscriber(last_event_id)
+
+    def add_subscriber(self, last_event_id=None):
+        after = None
+        if last_event_id:
+            token, _, sequence = last_event_id.partition('-')
+            if token == self.token and sequence.isdigit():
+                after = int(sequence)
+
+        subscription = LogSubscription(self, getattr(settings, 'LOG_STREAM_QUEUE_LINES', 5000))
+        with self.lock:
+            backlog = [item for item in self.backlog if after is None or item[0] > after]
+            self.subscribers.add(subscription)
+            if self.finished:
+                subscription.put(None)
+        return subscription, backlog, after is not None
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+            last = not self.subscribers
+        if last:
+            self.stop()
+
+    def start(self):
+        import docker
+        container = docker.from_env().containers.get(self.container_id)
+        # tail + follow: the recent lines first, then new ones as they are written
+        self.stream = container.logs(
+            stream=True, follow=True, tail=getattr(settings, 'LOG_STREAM_BACKLOG', 200)
+        )
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def stop(self):
+        with LogBroadcaster._lock:
+            if LogBroadcaster._broadcasters.get(self.container_id) is self:
+                del LogBroadcaster._broadcasters[self.container_id]
+        self.finished = True
+        try:
+            self.stream.close()
+        except Exception:
+            pass
+
+    def _publish(self, line):
+        with self.lock:
+            self.sequence += 1
+            item = (self.sequence, line)
+            self.backlog.append(item)
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.put(item)
+
+    def _read(self):
+        buffer = b''
+        try:
+            for chunk in self.stream:
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    self._publish(line.decode('utf-8', 'replace').rstrip('\r'))
+        except Exception:
+            pass
+        if buffer:
+            self._publish(buffer.decode('utf-8', 'replace'))
+
+        # Container stopped or was replaced (redeploy): subscribers reconnect
+        self.finished = True
+        with LogBroadcaster._lock:
+            if LogBroadcaster._broadcasters.get(self.container_id) is self:
+                del LogBroadcaster._broadcasters[self.container_id]
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.put(None)
+
+
+def sse_event(token, items, event=None):
+    """Server-Sent Event with one data line per log line; the id is the last line sequence"""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    if items:
+        lines.append(f"id: {token}-{items[-1][0]}")
+        lines.extend(f"data: {line}" for _, line in items)
+    else:
+        lines.append("data: ")
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_logs(container_id, last_event_id=None):
+    """Generator of SSE messages for a StreamingHttpResponse"""
+    keepalive = getattr(settings, 'LOG_STREAM_KEEPALIVE', 15)
+    subscription, backlog, resumed = LogBroadcaster.subscribe(container_id, last_event_id=last_event_id)
+    token = subscription.broadcaster.token
+    try:
+        # Browsers reconnect after this many ms when the stream ends
+        yield "retry: 3000\n\n"
+        if not resumed:
+            # Client must drop what it shows: the lines that follow are the full recent log
+            yield sse_event(token, [], event='reset')
+        if backlog:
+            yield sse_event(token, backlog)
+        while True:
+            items = subscription.get(timeout=keepalive)
+            if not items:
+                # Comment line: keeps proxies from closing the connection and detects gone clients
+                yield ": keepalive\n\n"
+                continue
+            lines = [item for item in items if item is not None]
+            if lines:
+                yield sse_event(token, lines)
+            if len(lines) != len(items):
+                yield sse_event(token, [], event='end')
+                return
+    finally:
+        subscription.close()
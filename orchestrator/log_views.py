@@ -0,0 +1,128 @@
+import re
+from datetime import datetime, timedelta
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.gzip import gzip_page
+from .models import Instance
+from .log_store import LogStore
+
+LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL', 'FATAL', 'PANIC']
+
+
+def _parse_datetime(value):
+    """ISO date/datetime from a query parameter as an aware datetime, None when empty"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _search(params):
+    """Runs a log store search from GET parameters. Raises ValueError on invalid input"""
+    try:
+        start = _parse_datetime(params.get('start'))
+        end = _parse_datetime(params.get('end'))
+    except ValueError:
+        raise ValueError('Fecha no válida, usa el formato AAAA-MM-DD HH:MM')
+    if start is None and params.get('hours'):
+        start = timezone.now() - timedelta(hours=float(params['hours']))
+
+    try:
+        limit = min(int(params.get('limit', 500)), 5000)
+    except ValueError:
+        limit = 500
+
+    try:
+        return LogStore().search(
+            pattern=params.get('q') or None,
+            start=start,
+            end=end,
+            levels=[level for level in params.getlist('level') if level],
+            logger=params.get('logger') or None,
+            instances=[name for name in params.getlist('instance') if name],
+            limit=limit,
+        )
+    except re.error as e:
+        raise ValueError(f'Expresión regular no válida: {e}')
+
+
+@login_required
+@gzip_page
+def log_search_api(request):
+    """
+    Search across the collected logs of all instances. Parameters: q
+    (regular expression), start/end (ISO datetimes) or hours, level and
+    instance (repeatable), logger (prefix) and limit.
+    """
+    try:
+        return JsonResponse(_search(request.GET))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@login_required
+def log_search(request):
+    """Log search page"""
+    result = None
+    error = None
+    if request.GET:
+        try:
+            result = _search(request.GET)
+        except ValueError as e:
+            error = str(e)
+
+    return render(request, 'orchestrator/log_search.html', {
+        'result': result,
+        'error': error,
+        'levels': LEVELS,
+        'instances': Instance.objects.order_by('name').values_list('name', flat=True),
+        'query': request.GET,
+        'selected_levels': request.GET.getlist('level'),
+        'selected_instances': request.GET.getlist('instance'),
+    })
+
+
+@login_required
+def log_policy(request):
+    """Docker log size and policy of every managed container"""
+    from .log_policy import LogPolicyService, default_policy
+    try:
+        rows = LogPolicyService().report()
+    except Exception as e:
+        messages.error(request, f'Error leyendo los contenedores: {str(e)}')
+        rows = []
+
+    return render(request, 'orchestrator/log_policy.html', {
+        'rows': rows,
+        'default_policy': default_policy(),
+        'pending': sum(1 for row in rows if not row['complies']),
+        'total_mb': round(sum(row['bytes'] or 0 for row in rows) / (1024 * 1024), 1),
+    })
+
+
+@login_required
+def apply_log_policy(request):
+    """Recreates the containers whose log configuration differs from their policy (admin only)"""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para acceder a esta página')
+        return redirect('log-policy')
+
+    if request.method == 'POST':
+        from .log_policy import LogPolicyService
+        names = request.POST.getlist('container') or None
+        results = LogPolicyService().apply(names=names)
+        failed = [f"{name}: {result}" for name, result in results if result.startswith('error')]
+        if failed:
+            messages.error(request, 'No se pudo aplicar la política a: ' + '; '.join(failed))
+        applied = len(results) - len(failed)
+        if applied:
+            messages.success(request, f'Política de logs aplicada a {applied} contenedor(es)')
+        elif not failed:
+            messages.info(request, 'Todos los contenedores cumplen ya la política de logs')
+
+    return redirect('log-policy')
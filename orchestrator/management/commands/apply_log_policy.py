@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from orchestrator.log_policy import LogPolicyService
+
+
+class Command(BaseCommand):
+    help = 'Reports container log sizes and recreates the containers whose log configuration differs from their policy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--container', action='append', help='Only this container (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the containers that would be recreated')
+        parser.add_argument('--report', action='store_true', help='Only print the log size report')
+
+    def handle(self, *args, **options):
+        service = LogPolicyService()
+
+        if options['report']:
+            for row in service.report():
+                size = f"{row['size_mb']} MB" if row['size_mb'] is not None else '?'
+                config = f"{row['driver']} {row['max_size'] or '-'} x{row['max_file'] or '-'}"
+                self.stdout.write(f"{row['name']:40} {size:>12}  {config:24} {'ok' if row['complies'] else 'pending'}")
+            return
+
+        results = service.apply(names=options['container'], dry_run=options['dry_run'])
+        for name, result in results:
+            style = self.style.ERROR if result.startswith('error') else str
+            self.stdout.write(style(f"{name}: {result}"))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} containers {'to update' if options['dry_run'] else 'processed'}"))
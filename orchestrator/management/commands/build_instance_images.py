@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from orchestrator.models import Instance
+from orchestrator.image_builder import ImageBuilder
+
+
+class Command(BaseCommand):
+    help = 'Builds the derived Odoo images with the dependencies of the instances and prunes the unused ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instance', action='append', help='Only this instance (repeatable)')
+        parser.add_argument('--prune', action='store_true', help='Remove the derived images no instance uses')
+        parser.add_argument('--dry-run', action='store_true', help='With --prune, only list the images that would be removed')
+
+    def handle(self, *args, **options):
+        builder = ImageBuilder()
+
+        if options['prune']:
+            removed = builder.prune(dry_run=options['dry_run'])
+            for tag in removed:
+                self.stdout.write(f"{tag}: {'unused' if options['dry_run'] else 'removed'}")
+            self.stdout.write(self.style.SUCCESS(f"{len(removed)} images {'to remove' if options['dry_run'] else 'removed'}"))
+            return
+
+        instances = Instance.objects.all()
+        if options['instance']:
+            instances = instances.filter(name__in=options['instance'])
+        for instance in instances:
+            try:
+                tag = builder.ensure_image(instance)
+                self.stdout.write(f"{instance.name}: {tag}")
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{instance.name}: error {str(e)}"))
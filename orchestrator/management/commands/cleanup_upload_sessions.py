@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from orchestrator.upload_service import ChunkedUploadService
+
+class Command(BaseCommand):
+    help = 'Removes expired resumable upload sessions and their chunks'
+
+    def handle(self, *args, **options):
+        removed = ChunkedUploadService.cleanup_expired()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired upload session(s).'))
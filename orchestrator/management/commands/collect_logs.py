@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from orchestrator.log_store import LogStore, LogCollector
+
+
+class Command(BaseCommand):
+    help = 'Collects the logs of all Odoo, database and managed containers into the central log store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Store what was logged since the last run and exit (for cron)')
+        parser.add_argument('--prune', action='store_true', help='Only apply the retention (LOG_STORE_RETENTION_DAYS, LOG_STORE_MAX_MB)')
+
+    def handle(self, *args, **options):
+        store = LogStore()
+
+        if options['prune']:
+            deleted, freed = store.prune()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} hours of logs ({freed / (1024 * 1024):.1f} MB)"))
+            return
+
+        collector = LogCollector(store)
+        if options['once']:
+            lines = collector.collect_once()
+            deleted, freed = store.prune()
+            self.stdout.write(self.style.SUCCESS(
+                f"Stored {lines} lines" + (f", deleted {deleted} old hours ({freed / (1024 * 1024):.1f} MB)" if deleted else '')
+            ))
+            return
+
+        self.stdout.write(f"Collecting logs into {store.root} (Ctrl+C to stop)")
+        try:
+            collector.run()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Log collector stopped'))
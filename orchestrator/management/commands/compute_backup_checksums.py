@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from orchestrator.backup_models import Backup
+from orchestrator.download_service import DownloadService
+
+
+class Command(BaseCommand):
+    help = 'Computes the SHA-256 of the local backups created before checksums were recorded'
+
+    def handle(self, *args, **options):
+        count = 0
+        for backup in Backup.objects.filter(checksum_sha256=''):
+            if not backup.is_local:
+                continue
+            try:
+                backup.checksum_sha256 = DownloadService.compute_sha256(backup.file_path)
+                backup.save(update_fields=['checksum_sha256'])
+                count += 1
+                self.stdout.write(f"{backup.filename}: {backup.checksum_sha256}")
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{backup.filename}: error {str(e)}"))
+        self.stdout.write(self.style.SUCCESS(f"{count} checksums computed"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from orchestrator.models import Instance
+from orchestrator.wal_basebackup import BaseBackupService
+from orchestrator.wal_retention import WALRetention
+
+
+class Command(BaseCommand):
+    help = 'Takes WAL base backups (pg_basebackup) so point-in-time restores replay less WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instance', help='Only this instance (name)')
+        parser.add_argument(
+            '--if-due', action='store_true',
+            help='Skip instances whose last base backup is newer than WAL_BASE_BACKUP_INTERVAL_HOURS'
+        )
+
+    def handle(self, *args, **options):
+        instances = Instance.objects.all()
+        if options['instance']:
+            instances = instances.filter(name=options['instance'])
+            if not instances.exists():
+                self.stdout.write(self.style.ERROR(f"Instance not found: {options['instance']}"))
+                return
+
+        service = BaseBackupService()
+        for instance in instances:
+            if options['if_due'] and not BaseBackupService.is_due(instance):
+                self.stdout.write(f"{instance.name}: base backup is recent, skipping")
+                continue
+            try:
+                base_backup = service.create(instance)
+                pruned = BaseBackupService.prune(instance)
+                # WAL only the pruned base backups needed can go now
+                reclaimed = WALRetention(instance).collect()['bytes_reclaimed']
+                self.stdout.write(self.style.SUCCESS(
+                    f"{instance.name}: base backup {base_backup.label} ({base_backup.file_size_mb} MB, "
+                    f"{base_backup.duration_seconds:.1f}s), {pruned} old base backup(s) removed, "
+                    f"{reclaimed / (1024 * 1024):.1f} MB of WAL reclaimed"
+                ))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{instance.name}: base backup failed: {str(e)}"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from orchestrator.models import Instance
+from orchestrator.wal_retention import WALRetention
+
+
+class Command(BaseCommand):
+    help = 'Deletes archived WAL files no retained base backup or restore point can replay'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instance', help='Only this instance (name)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        instances = Instance.objects.all()
+        if options['instance']:
+            instances = instances.filter(name=options['instance'])
+
+        total_files = 0
+        total_bytes = 0
+        for instance in instances:
+            try:
+                stats = WALRetention(instance).collect(dry_run=options['dry_run'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{instance.name}: {str(e)}"))
+                continue
+            if stats.get('message'):
+                self.stdout.write(f"{instance.name}: {stats['message']}")
+                continue
+            total_files += stats['files']
+            total_bytes += stats['bytes_reclaimed']
+            cutoffs = ', '.join(f"timeline {timeline} from {lsn}" for timeline, lsn in stats['cutoffs'].items())
+            self.stdout.write(
+                f"{instance.name}: {stats['files']} files, {stats['bytes_reclaimed'] / (1024 * 1024):.1f} MB "
+                f"{'reclaimable' if options['dry_run'] else 'reclaimed'} (keeping {cutoffs})"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_files} WAL files, {total_bytes / (1024 * 1024):.1f} MB {'reclaimable' if options['dry_run'] else 'reclaimed'}"
+        ))
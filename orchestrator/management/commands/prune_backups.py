@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from orchestrator.models import Instance
+from orchestrator.retention_service import RetentionService
+
+class Command(BaseCommand):
+    help = 'Applies the grandfather-father-son retention policy to instance backups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show which backups would be kept or pruned without deleting anything')
+        parser.add_argument('--instance', help='Only process the instance with this name')
+
+    def handle(self, *args, **options):
+        instances = Instance.objects.all()
+        if options['instance']:
+            instances = instances.filter(name=options['instance'])
+
+        total_pruned = 0
+        total_freed = 0
+        for instance in instances:
+            plan = RetentionService.prune(instance, dry_run=options['dry_run'])
+            if not plan['keep'] and not plan['prune']:
+                continue
+
+            policy = ', '.join(f"{key}={value}" for key, value in plan['policy'].items())
+            self.stdout.write(f"{instance.name} ({policy})")
+            for backup, reasons in plan['keep'].items():
+                self.stdout.write(f"  keep   {backup.filename} [{', '.join(reasons)}]")
+            for backup in plan['prune']:
+                self.stdout.write(self.style.WARNING(f"  prune  {backup.filename}"))
+
+            total_pruned += len(plan['prune'])
+            total_freed += plan['freed_bytes']
+
+        action = 'Would prune' if options['dry_run'] else 'Pruned'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {total_pruned} backup(s), {total_freed / (1024 * 1024):.2f} MB"
+        ))
@@ -1,15 +1,26 @@
+from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from orchestrator.models import Instance
 from orchestrator.config_models import GitHubConfig
 from orchestrator.services import DockerService
-from orchestrator.backup_models import Backup
-import os
+from orchestrator.storage_backends import BackupStorageService
+from orchestrator.retention_service import RetentionService
 
 class Command(BaseCommand):
     help = 'Runs automatic backups based on system configuration'
 
     def handle(self, *args, **options):
+        # WAL base backups follow their own interval (WAL_BASE_BACKUP_INTERVAL_HOURS)
+        if getattr(settings, 'WAL_ARCHIVING_ENABLED', False):
+            call_command('create_base_backups', if_due=True, stdout=self.stdout)
+
+        # Move old backups off the hot disk (no-op with local storage), also without auto backups
+        tiered = BackupStorageService.apply_tiering(timezone.now())
+        if tiered:
+            self.stdout.write(self.style.SUCCESS(f"Moved {tiered} backup(s) to remote storage."))
+
         # 1. Find configurations with backup enabled
         configs = GitHubConfig.objects.filter(auto_backup_enabled=True)
         
@@ -22,7 +33,6 @@ class Command(BaseCommand):
         for config in configs:
             unit = config.auto_backup_frequency_unit
             value = config.auto_backup_frequency_value
-            retention = config.auto_backup_retention
             
             should_run = False
             
@@ -47,11 +57,11 @@ class Command(BaseCommand):
             
             if should_run:
                 self.stdout.write(f"Running {unit} backup task (every {value} {unit}s) for config {config}...")
-                self.perform_backups(retention)
+                self.perform_backups(config)
             else:
                  self.stdout.write(f"Skipping {unit} backup task (not time yet).")
 
-    def perform_backups(self, retention):
+    def perform_backups(self, config):
         service = DockerService()
         instances = Instance.objects.filter(status='running') # Only backup running instances? or all? Usually active ones.
         # Maybe backup all valid instances regardless of status, but 'running' is safer for db consistency if we stop/start.
@@ -66,20 +76,15 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS(f"  - Backup created: {backup.filename}"))
                 
                 # Cleanup old backups
-                self.cleanup_backups(instance, retention)
+                self.cleanup_backups(instance, config)
                 
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"  - Failed to backup {instance.name}: {str(e)}"))
 
-    def cleanup_backups(self, instance, retention):
-        backups = Backup.objects.filter(instance=instance).order_by('-created_at')
-        if backups.count() > retention:
-            to_delete = backups[retention:]
-            for backup in to_delete:
-                try:
-                    if os.path.exists(backup.file_path):
-                        os.remove(backup.file_path)
-                    backup.delete()
-                    self.stdout.write(f"  - Pruned old backup: {backup.filename}")
-                except Exception as e:
-                     self.stdout.write(self.style.WARNING(f"  - Failed to prune backup {backup.filename}: {str(e)}"))
+    def cleanup_backups(self, instance, config):
+        try:
+            plan = RetentionService.prune(instance, config=config)
+            for backup in plan['prune']:
+                self.stdout.write(f"  - Pruned old backup: {backup.filename}")
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"  - Failed to prune backups of {instance.name}: {str(e)}"))
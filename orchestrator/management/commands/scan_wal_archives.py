@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from orchestrator.models import Instance
+from orchestrator.wal_scanner import WALArchiveScanner
+
+class Command(BaseCommand):
+    help = 'Ingests archived WAL files into the database (incremental from the last scanned segment)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instance', help='Only scan this instance (name)')
+        parser.add_argument('--full', action='store_true', help='Rescan the whole archive, updating sizes and removing rows of deleted files')
+        parser.add_argument('--watch', action='store_true', help='Keep running and ingest new segments as they are archived')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between scans with --watch (default 5)')
+
+    def handle(self, *args, **options):
+        instances = Instance.objects.all()
+        if options['instance']:
+            instances = instances.filter(name=options['instance'])
+
+        full = options['full']
+        while True:
+            for instance in instances.all():
+                try:
+                    stats = WALArchiveScanner(instance).scan(full=full)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"{instance.name}: {str(e)}"))
+                    continue
+                if stats['created'] or stats['updated'] or stats['deleted'] or not options['watch']:
+                    self.stdout.write(
+                        f"{instance.name}: {stats['created']} new, {stats['updated']} updated, "
+                        f"{stats['deleted']} removed in {stats['seconds']:.2f}s"
+                    )
+
+            if not options['watch']:
+                break
+            # Only the first pass of a watch is a full scan; later passes only look past the high-water mark
+            full = False
+            time.sleep(options['interval'])
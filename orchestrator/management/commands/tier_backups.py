@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from orchestrator.backup_models import Backup
+from orchestrator.storage_backends import BackupStorageService
+
+class Command(BaseCommand):
+    help = 'Uploads backups to remote storage and removes local copies older than BACKUP_TIER_AFTER_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--upload-pending', action='store_true', help='Also upload recent backups that only exist locally')
+
+    def handle(self, *args, **options):
+        if not BackupStorageService.remote_enabled():
+            self.stdout.write(self.style.WARNING('BACKUP_STORAGE_BACKEND is "local", nothing to do.'))
+            return
+
+        if options['upload_pending']:
+            for backup in Backup.objects.filter(storage_backend='local').select_related('instance'):
+                if not backup.is_local:
+                    continue
+                try:
+                    BackupStorageService.offload(backup)
+                    self.stdout.write(f"  - Uploaded {backup.filename}")
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"  - Failed to upload {backup.filename}: {str(e)}"))
+
+        tiered = BackupStorageService.apply_tiering()
+        self.stdout.write(self.style.SUCCESS(f'Moved {tiered} backup(s) off the hot disk.'))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0026_remove_instance_security_password_container_command_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backup',
+            name='checksum_sha256',
+            field=models.CharField(blank=True, help_text='SHA-256 of the backup archive', max_length=64),
+        ),
+    ]
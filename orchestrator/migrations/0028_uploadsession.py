@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-19 06:36
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0027_backup_checksum_sha256'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('purpose', models.CharField(choices=[('restore', 'Restaurar backup'), ('module', 'Instalar módulo')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.BigIntegerField(help_text='Size of the whole file in bytes')),
+                ('chunk_size', models.IntegerField(help_text='Size of every chunk except the last one')),
+                ('total_chunks', models.IntegerField()),
+                ('checksum_sha256', models.CharField(blank=True, help_text='Expected SHA-256 of the whole file (optional)', max_length=64)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('assembling', 'Assembling'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='uploading', max_length=20)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('expires_at', models.DateTimeField(help_text='Abandoned sessions are removed after this date')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='orchestrator.instance')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='orchestrato_status_4bec1a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0028_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backup',
+            name='storage_backend',
+            field=models.CharField(choices=[('local', 'Local'), ('s3', 'S3')], default='local', help_text='Where the archive is stored besides the hot disk', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='storage_key',
+            field=models.CharField(blank=True, help_text='Object key in the remote storage', max_length=512),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='tiered_at',
+            field=models.DateTimeField(blank=True, help_text='When the local copy was moved off the hot disk', null=True),
+        ),
+    ]
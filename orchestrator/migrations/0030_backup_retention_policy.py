@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-19 06:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0029_backup_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubconfig',
+            name='auto_backup_keep_daily',
+            field=models.IntegerField(default=0, help_text='Keep the newest backup of each of the last N days'),
+        ),
+        migrations.AddField(
+            model_name='githubconfig',
+            name='auto_backup_keep_hourly',
+            field=models.IntegerField(default=0, help_text='Keep the newest backup of each of the last N hours'),
+        ),
+        migrations.AddField(
+            model_name='githubconfig',
+            name='auto_backup_keep_monthly',
+            field=models.IntegerField(default=0, help_text='Keep the newest backup of each of the last N months'),
+        ),
+        migrations.AddField(
+            model_name='githubconfig',
+            name='auto_backup_keep_weekly',
+            field=models.IntegerField(default=0, help_text='Keep the newest backup of each of the last N weeks'),
+        ),
+        migrations.CreateModel(
+            name='BackupRetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keep_last', models.PositiveIntegerField(blank=True, help_text='Always keep the N most recent backups', null=True)),
+                ('keep_hourly', models.PositiveIntegerField(blank=True, help_text='Keep the newest backup of each of the last N hours', null=True)),
+                ('keep_daily', models.PositiveIntegerField(blank=True, help_text='Keep the newest backup of each of the last N days', null=True)),
+                ('keep_weekly', models.PositiveIntegerField(blank=True, help_text='Keep the newest backup of each of the last N weeks', null=True)),
+                ('keep_monthly', models.PositiveIntegerField(blank=True, help_text='Keep the newest backup of each of the last N months', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('instance', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to='orchestrator.instance')),
+            ],
+            options={
+                'verbose_name': 'Backup Retention Policy',
+                'verbose_name_plural': 'Backup Retention Policies',
+            },
+        ),
+    ]
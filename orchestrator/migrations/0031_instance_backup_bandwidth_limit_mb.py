@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0030_backup_retention_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instance',
+            name='backup_bandwidth_limit_mb',
+            field=models.FloatField(blank=True, help_text='Límite de MB/s para backups y restauraciones (vacío = valor global, 0 = sin límite)', null=True),
+        ),
+    ]
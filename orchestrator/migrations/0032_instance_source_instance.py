@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 06:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0031_instance_backup_bandwidth_limit_mb'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instance',
+            name='source_instance',
+            field=models.ForeignKey(blank=True, help_text='Instance this one was duplicated from (used to refresh it)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='orchestrator.instance'),
+        ),
+    ]
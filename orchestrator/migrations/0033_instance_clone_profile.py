@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0032_instance_source_instance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instance',
+            name='clone_profile',
+            field=models.CharField(default='full', help_text='Clone profile used to create this copy (full, slim, anonymized)', max_length=50),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-19 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0033_instance_clone_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backup',
+            name='backup_profile',
+            field=models.CharField(default='full', help_text='Backup profile used for the dump', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='dump_seconds',
+            field=models.FloatField(blank=True, help_text='Time spent running pg_dump', null=True),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='dump_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the database dump in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='excluded_tables',
+            field=models.TextField(blank=True, default='', help_text='Table patterns whose data was left out of the dump'),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='filestore_files',
+            field=models.IntegerField(blank=True, help_text='Filestore files included', null=True),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='filestore_size',
+            field=models.BigIntegerField(blank=True, help_text='Filestore bytes included', null=True),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='filestore_skipped',
+            field=models.IntegerField(default=0, help_text='Filestore files left out by the size cap'),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='backup_exclude_tables',
+            field=models.TextField(blank=True, default='', help_text='Tablas adicionales cuyos datos se excluyen del backup (separadas por comas, admite comodines)'),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='backup_filestore_max_mb',
+            field=models.FloatField(blank=True, help_text='Tamaño máximo en MB de cada archivo del filestore incluido en el backup (vacío = sin límite)', null=True),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='backup_profile',
+            field=models.CharField(default='full', help_text='Perfil de backup: tablas cuyos datos se excluyen del dump (full, lean, minimal)', max_length=50),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 6.0 on 2026-10-19 06:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0034_backup_profiles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WALRestorePoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nombre descriptivo del punto de restauración', max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('wal_lsn', models.CharField(help_text='WAL Log Sequence Number (LSN)', max_length=100)),
+                ('wal_file', models.CharField(blank=True, help_text='WAL file name', max_length=255)),
+                ('timeline_id', models.IntegerField(default=1)),
+                ('restore_point_type', models.CharField(choices=[('manual', 'Manual'), ('auto', 'Automático'), ('pre-deploy', 'Pre-Deploy'), ('scheduled', 'Programado')], default='manual', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('git_commit', models.CharField(blank=True, max_length=40)),
+                ('git_branch', models.CharField(blank=True, max_length=100)),
+                ('is_verified', models.BooleanField(default=False, help_text='Si el punto fue verificado')),
+                ('verification_date', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wal_restore_points', to='orchestrator.instance')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PITRRestore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('restore_target', models.DateTimeField(help_text='Target timestamp for restoration')),
+                ('target_lsn', models.CharField(blank=True, help_text='Target LSN if specified', max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('in_progress', 'En Progreso'), ('completed', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=20)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('recovery_logs', models.TextField(blank=True)),
+                ('wal_files_replayed', models.IntegerField(default=0)),
+                ('initiated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pitr_restores', to='orchestrator.instance')),
+                ('restore_point', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='orchestrator.walrestorepoint')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WALScanState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_wal_file_name', models.CharField(blank=True, help_text='Last file name ingested (WAL names sort chronologically)', max_length=255)),
+                ('files_tracked', models.IntegerField(default=0)),
+                ('bytes_tracked', models.BigIntegerField(default=0)),
+                ('last_scan_at', models.DateTimeField(blank=True, null=True)),
+                ('last_full_scan_at', models.DateTimeField(blank=True, null=True)),
+                ('instance', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='wal_scan_state', to='orchestrator.instance')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WALArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wal_file_name', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=512)),
+                ('file_size', models.BigIntegerField(help_text='Size in bytes')),
+                ('file_type', models.CharField(choices=[('segment', 'Segmento'), ('partial', 'Segmento parcial'), ('history', 'Historial de timeline'), ('backup', 'Etiqueta de backup')], default='segment', max_length=20)),
+                ('timeline_id', models.IntegerField(default=1)),
+                ('segment_number', models.BigIntegerField(blank=True, help_text='Absolute segment number (log id * segments per log + segment)', null=True)),
+                ('start_lsn', models.CharField(blank=True, max_length=100)),
+                ('end_lsn', models.CharField(blank=True, max_length=100)),
+                ('archived_at', models.DateTimeField(blank=True, help_text='Modification time of the archived file', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('is_backed_up', models.BooleanField(default=False, help_text='Si fue copiado a backup remoto')),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wal_archives', to='orchestrator.instance')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['instance', '-created_at'], name='orchestrato_instanc_db92d0_idx'), models.Index(fields=['instance', 'timeline_id', 'segment_number'], name='orchestrato_instanc_50f8c7_idx')],
+                'unique_together': {('instance', 'wal_file_name')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='walrestorepoint',
+            index=models.Index(fields=['instance', '-created_at'], name='orchestrato_instanc_3df120_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='walrestorepoint',
+            index=models.Index(fields=['instance', 'wal_lsn'], name='orchestrato_instanc_bf0e66_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pitrrestore',
+            index=models.Index(fields=['instance', '-started_at'], name='orchestrato_instanc_e0e119_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pitrrestore',
+            index=models.Index(fields=['status'], name='orchestrato_status_294860_idx'),
+        ),
+    ]
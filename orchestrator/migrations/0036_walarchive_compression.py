@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0035_wal_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='walarchive',
+            name='compressed_size',
+            field=models.BigIntegerField(blank=True, help_text='Size on disk in bytes when stored compressed', null=True),
+        ),
+        migrations.AddField(
+            model_name='walarchive',
+            name='compression',
+            field=models.CharField(blank=True, default='', help_text='gzip, zstd or empty when stored raw', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='walarchive',
+            name='file_size',
+            field=models.BigIntegerField(help_text='Uncompressed size in bytes'),
+        ),
+    ]
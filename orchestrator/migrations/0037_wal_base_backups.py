@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-19 06:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0036_walarchive_compression'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='estimated_replay_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='estimated_replay_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='WALBaseBackup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=255)),
+                ('file_path', models.CharField(help_text='Compressed tar of the data directory on the host', max_length=512)),
+                ('file_size', models.BigIntegerField(default=0, help_text='Size in bytes')),
+                ('status', models.CharField(choices=[('running', 'En Progreso'), ('completed', 'Completado'), ('failed', 'Fallido')], default='running', max_length=20)),
+                ('error_message', models.TextField(blank=True)),
+                ('timeline_id', models.IntegerField(default=1)),
+                ('start_lsn', models.CharField(blank=True, max_length=100)),
+                ('end_lsn', models.CharField(blank=True, max_length=100)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wal_base_backups', to='orchestrator.instance')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='base_backup',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='orchestrator.walbasebackup'),
+        ),
+        migrations.AddIndex(
+            model_name='walbasebackup',
+            index=models.Index(fields=['instance', 'status', '-completed_at'], name='orchestrato_instanc_2a5c37_idx'),
+        ),
+    ]
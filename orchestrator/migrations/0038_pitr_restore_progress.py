@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-19 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0037_wal_base_backups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='current_wal_file',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='last_progress_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='phase',
+            field=models.CharField(blank=True, choices=[('', '-'), ('base', 'Restaurando backup base'), ('replay', 'Reproduciendo WAL'), ('promote', 'Finalizando recuperación'), ('done', 'Terminado')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='replay_lsn',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='seconds_remaining',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pitrrestore',
+            name='wal_files_expected',
+            field=models.IntegerField(default=0),
+        ),
+    ]
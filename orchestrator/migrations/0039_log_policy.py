@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0038_pitr_restore_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='container',
+            name='log_config',
+            field=models.JSONField(blank=True, default=dict, help_text='Log policy overrides'),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='log_compress',
+            field=models.BooleanField(blank=True, help_text='Comprimir los archivos de log rotados (vacío = valor global)', null=True),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='log_driver',
+            field=models.CharField(blank=True, default='', help_text='Driver de logs de Docker: json-file o local (vacío = valor global)', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='log_max_file',
+            field=models.PositiveIntegerField(blank=True, help_text='Archivos de log rotados que se conservan (vacío = valor global)', null=True),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='log_max_size',
+            field=models.CharField(blank=True, default='', help_text='Tamaño máximo de cada archivo de log, p. ej. 20m (vacío = valor global)', max_length=10),
+        ),
+    ]
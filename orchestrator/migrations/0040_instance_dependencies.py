@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0039_log_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instance',
+            name='python_requirements',
+            field=models.TextField(blank=True, default='', help_text='Dependencias Python en formato requirements.txt'),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='system_packages',
+            field=models.TextField(blank=True, default='', help_text='Paquetes del sistema (apt) separados por espacios o saltos de línea'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 07:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestrator', '0040_instance_dependencies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModuleInstallation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('module_name', models.CharField(max_length=100)),
+                ('mode', models.CharField(choices=[('install', 'Instalación'), ('upgrade', 'Actualización'), ('redeploy', 'Redespliegue completo')], max_length=20)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('database_name', models.CharField(blank=True, max_length=100)),
+                ('sync_seconds', models.FloatField(blank=True, help_text='Extracting the ZIP into the addons path and committing it', null=True)),
+                ('install_seconds', models.FloatField(blank=True, help_text='Running -i/-u in the one-shot container (or the whole redeploy)', null=True)),
+                ('reload_seconds', models.FloatField(blank=True, help_text='From the reload signal until Odoo serves HTTP again', null=True)),
+                ('total_seconds', models.FloatField(blank=True, null=True)),
+                ('exit_code', models.IntegerField(blank=True, null=True)),
+                ('output', models.TextField(blank=True, help_text='Last lines of the Odoo output')),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='module_installations', to='orchestrator.instance')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
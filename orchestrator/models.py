@@ -28,6 +28,8 @@ class Instance(models.Model):
     ], default='17.0')
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.DEPLOYING)
     origin = models.CharField(max_length=50, blank=True, null=True, help_text="Origin of instance creation (manual, backup, duplicate)")
+    source_instance = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates', help_text="Instance this one was duplicated from (used to refresh it)")
+    clone_profile = models.CharField(max_length=50, default='full', help_text="Clone profile used to create this copy (full, slim, anonymized)")
     
     # Github Integration
     github_repo = models.CharField(max_length=255, blank=True, null=True)
@@ -47,6 +49,24 @@ class Instance(models.Model):
     # Database
     database_name = models.CharField(max_length=100, blank=True, null=True, help_text="Nombre de la base de datos de Odoo (dejar vacío para auto-detección)")
     
+    # Backup/restore IO limits
+    backup_bandwidth_limit_mb = models.FloatField(null=True, blank=True, help_text="Límite de MB/s para backups y restauraciones (vacío = valor global, 0 = sin límite)")
+    
+    # Backup contents
+    backup_profile = models.CharField(max_length=50, default='full', help_text="Perfil de backup: tablas cuyos datos se excluyen del dump (full, lean, minimal)")
+    backup_exclude_tables = models.TextField(blank=True, default='', help_text="Tablas adicionales cuyos datos se excluyen del backup (separadas por comas, admite comodines)")
+    backup_filestore_max_mb = models.FloatField(null=True, blank=True, help_text="Tamaño máximo en MB de cada archivo del filestore incluido en el backup (vacío = sin límite)")
+
+    # Docker log policy of the Odoo and database containers (empty = DOCKER_LOG_* settings)
+    log_driver = models.CharField(max_length=20, blank=True, default='', help_text="Driver de logs de Docker: json-file o local (vacío = valor global)")
+    log_max_size = models.CharField(max_length=10, blank=True, default='', help_text="Tamaño máximo de cada archivo de log, p. ej. 20m (vacío = valor global)")
+    log_max_file = models.PositiveIntegerField(null=True, blank=True, help_text="Archivos de log rotados que se conservan (vacío = valor global)")
+    log_compress = models.BooleanField(null=True, blank=True, help_text="Comprimir los archivos de log rotados (vacío = valor global)")
+
+    # Dependencies baked into a derived image odoo:<version>-<hash> (see image_builder.py)
+    python_requirements = models.TextField(blank=True, default='', help_text="Dependencias Python en formato requirements.txt")
+    system_packages = models.TextField(blank=True, default='', help_text="Paquetes del sistema (apt) separados por espacios o saltos de línea")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -82,6 +102,10 @@ class Instance(models.Model):
 from .config_models import GitHubConfig
 from .backup_models import Backup
 from .blog_models import BlogPost
+from .upload_models import UploadSession
+from .module_models import ModuleInstallation
+from .retention_models import BackupRetentionPolicy
+from .wal_models import WALRestorePoint, WALArchive, WALBaseBackup, WALScanState, PITRRestore
 
 class UserProfile(models.Model):
     """Extended user profile with additional information"""
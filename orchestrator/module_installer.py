@@ -0,0 +1,164 @@
+import re
+import time
+import docker
+from django.conf import settings
+
+ADDONS_MOUNT = '/mnt/extra-addons'
+MODULE_NAME_RE = re.compile(r'^[A-Za-z0-9_]+$')
+# Odoo logs this once the HTTP server is up again (threaded and prefork modes)
+READY_RE = re.compile(r'HTTP service \(werkzeug\) running')
+# Module states for which -u is used instead of -i
+INSTALLED_STATES = ('installed', 'to upgrade', 'to remove')
+OUTPUT_TAIL_LINES = 200
+
+
+class ModuleInstaller:
+    """
+    Fast path to install one module: instead of recreating the instance and
+    running -u all, `odoo -i <module>` (or -u when it is already installed)
+    runs in a one-shot container from the instance image against its
+    database, and the running server is then reloaded with SIGHUP.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or docker.from_env()
+
+    def odoo_container(self, instance):
+        """Running Odoo container with the addons path mounted, or None when the fast path cannot be used"""
+        if not instance.container_id:
+            return None
+        try:
+            container = self.client.containers.get(instance.container_id)
+        except docker.errors.NotFound:
+            return None
+        if container.status != 'running':
+            return None
+        if not any(mount.get('Destination') == ADDONS_MOUNT for mount in container.attrs.get('Mounts', [])):
+            # Deployed before the addons checkout existed: only a redeploy mounts it
+            return None
+        return container
+
+    def database_name(self, instance, db_container):
+        from .services import DockerService
+        try:
+            return DockerService().get_database_name(db_container, instance)
+        except Exception:
+            # Older instances keep Odoo data in the default database (as deploy's -u all does)
+            return 'postgres'
+
+    def module_state(self, db_container, db_name, module_name):
+        """State of the module in ir_module_module, None when Odoo does not know it yet"""
+        result = db_container.exec_run(
+            ['psql', '-U', 'odoo', '-d', db_name, '-tAc', f"SELECT state FROM ir_module_module WHERE name = '{module_name}'"],
+            environment={'PGPASSWORD': 'odoo'}
+        )
+        if result.exit_code != 0:
+            return None
+        return result.output.decode('utf-8', 'replace').strip() or None
+
+    def run_once(self, instance, container, db_name, flag, module_name):
+        """Runs odoo <flag> <module> --stop-after-init next to the instance. Returns (exit_code, output)"""
+        from .log_policy import instance_policy, log_options
+
+        name = f"odoo_{instance.name}_module"
+        try:
+            self.client.containers.get(name).remove(force=True)
+        except docker.errors.NotFound:
+            pass
+
+        config = container.attrs['Config']
+        sidecar = self.client.containers.run(
+            config['Image'],
+            # The image entrypoint adds the database connection from HOST/USER/PASSWORD
+            command=['odoo', '-d', db_name, flag, module_name, '--stop-after-init'],
+            name=name,
+            environment=config.get('Env') or [],
+            volumes=container.attrs['HostConfig'].get('Binds') or [],
+            network=f"net_{instance.name}",
+            user='root',
+            detach=True,
+            **log_options(instance_policy(instance))
+        )
+        try:
+            try:
+                exit_code = sidecar.wait(timeout=getattr(settings, 'MODULE_INSTALL_TIMEOUT', 1800))['StatusCode']
+            except Exception:
+                sidecar.kill()
+                raise TimeoutError(f"odoo {flag} {module_name} no terminó a tiempo")
+            output = sidecar.logs(tail=OUTPUT_TAIL_LINES).decode('utf-8', 'replace')
+        finally:
+            try:
+                sidecar.remove(force=True)
+            except Exception:
+                pass
+        return exit_code, output
+
+    def reload(self, container):
+        """
+        SIGHUP makes Odoo restart in place (same process, new registry and
+        code) without recreating the container. Returns the seconds until it
+        serves HTTP again, or None if that was not seen in the logs.
+        """
+        since = int(time.time())
+        started = time.monotonic()
+        container.kill(signal='SIGHUP')
+        deadline = started + getattr(settings, 'MODULE_RELOAD_TIMEOUT', 120)
+        while time.monotonic() < deadline:
+            time.sleep(0.5)
+            logs = container.logs(since=since, stdout=True, stderr=True).decode('utf-8', 'replace')
+            if READY_RE.search(logs):
+                return time.monotonic() - started
+        return None
+
+    def install(self, instance, module_name, sync_seconds=None):
+        """Installs or upgrades a module already synced into the addons path. Returns the ModuleInstallation"""
+        from .models import ModuleInstallation
+
+        if not MODULE_NAME_RE.match(module_name):
+            raise ValueError(f"Nombre de módulo no válido: {module_name}")
+
+        started = time.monotonic()
+        container = self.odoo_container(instance)
+        if container is None:
+            raise LookupError('El contenedor de Odoo no está en ejecución con el directorio de addons montado')
+
+        db_container = self.client.containers.get(f"db_{instance.name}")
+        db_name = self.database_name(instance, db_container)
+        state = self.module_state(db_container, db_name, module_name)
+        mode = 'upgrade' if state in INSTALLED_STATES else 'install'
+
+        installation = ModuleInstallation.objects.create(
+            instance=instance,
+            module_name=module_name,
+            mode=mode,
+            database_name=db_name,
+            sync_seconds=round(sync_seconds, 2) if sync_seconds is not None else None,
+        )
+        print(f"{'Upgrading' if mode == 'upgrade' else 'Installing'} module {module_name} in {instance.name} ({db_name})...")
+
+        try:
+            step_started = time.monotonic()
+            exit_code, output = self.run_once(instance, container, db_name, '-u' if mode == 'upgrade' else '-i', module_name)
+            installation.install_seconds = round(time.monotonic() - step_started, 2)
+            installation.exit_code = exit_code
+            installation.output = output
+            state = self.module_state(db_container, db_name, module_name)
+            if exit_code != 0 or state != 'installed':
+                raise RuntimeError(f"odoo terminó con código {exit_code} y el módulo quedó en estado '{state}'")
+            print(f"Module {module_name} {mode} done in {installation.install_seconds}s")
+
+            reload_seconds = self.reload(container)
+            installation.reload_seconds = round(reload_seconds, 2) if reload_seconds is not None else None
+            installation.status = 'completed'
+        except Exception as e:
+            installation.status = 'failed'
+            installation.error_message = str(e)
+            print(f"Error installing module {module_name}: {str(e)}")
+
+        installation.total_seconds = round(time.monotonic() - started + (sync_seconds or 0), 2)
+        installation.save()
+        print(
+            f"Module {module_name} in {instance.name}: {installation.status} in {installation.total_seconds}s "
+            f"(sync {installation.sync_seconds}s, {mode} {installation.install_seconds}s, reload {installation.reload_seconds}s)"
+        )
+        return installation
@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class ModuleInstallation(models.Model):
+    """A module installed or upgraded from an uploaded ZIP, with the time spent in each step"""
+
+    MODE_CHOICES = [
+        ('install', 'Instalación'),
+        ('upgrade', 'Actualización'),
+        ('redeploy', 'Redespliegue completo'),
+    ]
+
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    instance = models.ForeignKey('Instance', on_delete=models.CASCADE, related_name='module_installations')
+    module_name = models.CharField(max_length=100)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    database_name = models.CharField(max_length=100, blank=True)
+    sync_seconds = models.FloatField(null=True, blank=True, help_text="Extracting the ZIP into the addons path and committing it")
+    install_seconds = models.FloatField(null=True, blank=True, help_text="Running -i/-u in the one-shot container (or the whole redeploy)")
+    reload_seconds = models.FloatField(null=True, blank=True, help_text="From the reload signal until Odoo serves HTTP again")
+    total_seconds = models.FloatField(null=True, blank=True)
+    exit_code = models.IntegerField(null=True, blank=True)
+    output = models.TextField(blank=True, help_text="Last lines of the Odoo output")
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.instance.name} - {self.module_name} ({self.mode}) [{self.status}]"
@@ -0,0 +1,209 @@
+import io
+import re
+import time
+import tarfile
+import docker
+from django.conf import settings
+
+# Where the shared wheel/HTTP cache volume is mounted in the Odoo containers
+PIP_CACHE_MOUNT = '/var/cache/odoo-pip'
+
+
+def cache_volume_name(odoo_version):
+    """Cache volume of an Odoo version: same image, same Python, reusable wheels"""
+    return f"{getattr(settings, 'PIP_CACHE_VOLUME_PREFIX', 'odoo-pip-cache')}-{odoo_version}"
+
+
+def cache_options(instance):
+    """
+    (volumes, environment) to add to an Odoo container so every pip in it
+    uses the shared cache of its Odoo version. Empty when PIP_CACHE_ENABLED is off.
+    """
+    if not getattr(settings, 'PIP_CACHE_ENABLED', True):
+        return {}, {}
+    return (
+        {cache_volume_name(instance.odoo_version): {'bind': PIP_CACHE_MOUNT, 'mode': 'rw'}},
+        {'PIP_CACHE_DIR': PIP_CACHE_MOUNT},
+    )
+
+
+def package_name(requirement):
+    """'Django[argon2]>=4.2 ; python_version>"3"' -> 'django'"""
+    return re.split(r'[\s<>=!~;\[(@]', requirement.strip(), maxsplit=1)[0].lower().replace('_', '-')
+
+
+class PipOutputParser:
+    """
+    Follows `pip install` output line by line and records, per package, where
+    it came from (cache hit, download, source build, already installed) and
+    how long it took: from its "Collecting" line to the next one, plus the
+    wheel build when there is one.
+    """
+
+    COLLECTING_RE = re.compile(r'^Collecting (\S+)')
+    CACHED_RE = re.compile(r'^\s+Using cached (\S+)')
+    DOWNLOADING_RE = re.compile(r'^\s+Downloading (\S+)')
+    BUILD_STARTED_RE = re.compile(r"^\s+Building wheel for (\S+) .*: started")
+    BUILD_FINISHED_RE = re.compile(r"^\s+Building wheel for (\S+) .*: finished with status '(\w+)'")
+    SATISFIED_RE = re.compile(r'^Requirement already satisfied: (\S+)')
+    INSTALLING_RE = re.compile(r'^Installing collected packages')
+
+    def __init__(self, requested=()):
+        self.requested = {package_name(requirement) for requirement in requested}
+        self.packages = {}
+        self.current = None
+        self.current_started = None
+        self.builds = {}
+
+    def _package(self, name):
+        name = package_name(name)
+        return self.packages.setdefault(name, {
+            'name': name, 'source': '', 'seconds': 0.0, 'requested': name in self.requested,
+        })
+
+    def _finish_current(self, now):
+        if self.current is not None:
+            self.current['seconds'] += now - self.current_started
+            self.current = None
+
+    def feed(self, line, now=None):
+        now = time.monotonic() if now is None else now
+
+        match = self.COLLECTING_RE.match(line)
+        if match:
+            self._finish_current(now)
+            self.current = self._package(match.group(1))
+            self.current_started = now
+            return
+
+        match = self.SATISFIED_RE.match(line)
+        if match:
+            self._package(match.group(1))['source'] = 'installed'
+            return
+
+        if self.current is not None:
+            if self.CACHED_RE.match(line):
+                self.current['source'] = 'cache'
+                return
+            if self.DOWNLOADING_RE.match(line):
+                self.current['source'] = 'download'
+                return
+
+        match = self.BUILD_STARTED_RE.match(line)
+        if match:
+            self._finish_current(now)
+            self.builds[package_name(match.group(1))] = now
+            return
+
+        match = self.BUILD_FINISHED_RE.match(line)
+        if match:
+            name = package_name(match.group(1))
+            package = self._package(name)
+            package['seconds'] += now - self.builds.pop(name, now)
+            package['source'] = 'build' if match.group(2) == 'done' else 'build failed'
+            return
+
+        if self.INSTALLING_RE.match(line):
+            self._finish_current(now)
+
+    def summary(self, now=None):
+        self._finish_current(time.monotonic() if now is None else now)
+        packages = sorted(self.packages.values(), key=lambda package: package['seconds'], reverse=True)
+        for package in packages:
+            package['seconds'] = round(package['seconds'], 2)
+        return {
+            'packages': packages,
+            'cache_hits': sum(1 for package in packages if package['source'] == 'cache'),
+            'cache_misses': sum(1 for package in packages if package['source'] in ('download', 'build', 'build failed')),
+        }
+
+
+class RequirementsInstaller:
+    """
+    Installs a requirements.txt in an Odoo container with a single
+    `pip install -r` (one resolver run, one exec), streaming its output.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or docker.from_env()
+
+    @staticmethod
+    def requirements(content):
+        """Requirement lines of a requirements file (no comments or blank lines)"""
+        return [line.strip() for line in content.splitlines() if line.strip() and not line.strip().startswith('#')]
+
+    def _upload(self, container, content, path):
+        data = content.encode('utf-8')
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            info = tarfile.TarInfo(name=path.rsplit('/', 1)[1])
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+        container.put_archive(path.rsplit('/', 1)[0], buffer.getvalue())
+
+    def install(self, instance, content):
+        """
+        Generator of events: {'type': 'output', 'text': line} while pip runs,
+        then {'type': 'result', ...} with the exit code, total time, cache
+        hits/misses and per-package timings.
+        """
+        started = time.monotonic()
+        container = self.client.containers.get(instance.container_id)
+        shared_cache = any(mount.get('Destination') == PIP_CACHE_MOUNT for mount in container.attrs.get('Mounts', []))
+        path = f"/tmp/requirements-{int(time.time() * 1000)}.txt"
+        self._upload(container, content, path)
+
+        # Settings as environment variables: older pips (Odoo 10-12 images) ignore unknown ones
+        environment = {
+            'PIP_PROGRESS_BAR': 'off',
+            'PIP_DISABLE_PIP_VERSION_CHECK': '1',
+            'PYTHONUNBUFFERED': '1',
+        }
+        if getattr(settings, 'PIP_BREAK_SYSTEM_PACKAGES', True):
+            # Debian 12 based images (Odoo 17+) refuse system-wide installs otherwise
+            environment['PIP_BREAK_SYSTEM_PACKAGES'] = '1'
+        if shared_cache:
+            environment['PIP_CACHE_DIR'] = PIP_CACHE_MOUNT
+
+        yield {'type': 'output', 'text': (
+            f"Cache compartida: {cache_volume_name(instance.odoo_version)}" if shared_cache
+            else "Cache compartida no montada en este contenedor (se activa al volver a desplegar)"
+        )}
+
+        parser = PipOutputParser(self.requirements(content))
+        command = f"PIP=pip3; command -v pip3 >/dev/null 2>&1 || PIP=pip; exec $PIP install -r {path}"
+        exec_id = self.client.api.exec_create(container.id, ['sh', '-c', command], environment=environment)['Id']
+        buffer = b''
+        try:
+            for chunk in self.client.api.exec_start(exec_id, stream=True):
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                for raw_line in lines:
+                    line = raw_line.decode('utf-8', 'replace').rstrip('\r')
+                    parser.feed(line)
+                    yield {'type': 'output', 'text': line}
+            if buffer:
+                line = buffer.decode('utf-8', 'replace')
+                parser.feed(line)
+                yield {'type': 'output', 'text': line}
+            exit_code = self.client.api.exec_inspect(exec_id).get('ExitCode')
+        finally:
+            try:
+                container.exec_run(['rm', '-f', path])
+            except Exception:
+                pass
+
+        result = parser.summary()
+        result.update({
+            'type': 'result',
+            'success': exit_code == 0,
+            'exit_code': exit_code,
+            'seconds': round(time.monotonic() - started, 1),
+            'shared_cache': shared_cache,
+        })
+        print(
+            f"pip install -r in {instance.name}: exit {exit_code} in {result['seconds']}s, "
+            f"{result['cache_hits']} cache hits, {result['cache_misses']} misses"
+        )
+        yield result
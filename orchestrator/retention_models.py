@@ -0,0 +1,22 @@
+from django.db import models
+
+class BackupRetentionPolicy(models.Model):
+    """
+    Per-instance override of the global grandfather-father-son retention policy.
+    Empty fields inherit the value configured in the settings page.
+    """
+    instance = models.OneToOneField('Instance', on_delete=models.CASCADE, related_name='retention_policy')
+    keep_last = models.PositiveIntegerField(null=True, blank=True, help_text="Always keep the N most recent backups")
+    keep_hourly = models.PositiveIntegerField(null=True, blank=True, help_text="Keep the newest backup of each of the last N hours")
+    keep_daily = models.PositiveIntegerField(null=True, blank=True, help_text="Keep the newest backup of each of the last N days")
+    keep_weekly = models.PositiveIntegerField(null=True, blank=True, help_text="Keep the newest backup of each of the last N weeks")
+    keep_monthly = models.PositiveIntegerField(null=True, blank=True, help_text="Keep the newest backup of each of the last N months")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Backup Retention Policy"
+        verbose_name_plural = "Backup Retention Policies"
+    
+    def __str__(self):
+        return f"Retention policy for {self.instance.name}"
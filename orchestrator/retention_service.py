@@ -0,0 +1,159 @@
+import os
+from django.utils import timezone
+
+
+class RetentionService:
+    """
+    Grandfather-father-son retention for instance backups.
+
+    A backup is kept when it is one of the `last` most recent backups or the
+    newest backup of one of the last N hours/days/weeks/months. Everything
+    else is pruned with a single bulk delete per instance. These are the
+    logical (pg_dump) archives: WAL replay starts from physical base backups,
+    which BaseBackupService.prune keeps while restore points need them.
+    """
+
+    BUCKETS = ('hourly', 'daily', 'weekly', 'monthly')
+
+    @staticmethod
+    def global_policy(config=None):
+        """Policy configured in the settings page (falls back to keep the last 5 backups)"""
+        if config is None:
+            from .config_models import GitHubConfig
+            config = GitHubConfig.objects.filter(auto_backup_enabled=True).first() or GitHubConfig.objects.first()
+        if config is None:
+            return {'last': 5, 'hourly': 0, 'daily': 0, 'weekly': 0, 'monthly': 0}
+        return {
+            'last': config.auto_backup_retention if config.auto_backup_retention else 5,
+            'hourly': config.auto_backup_keep_hourly,
+            'daily': config.auto_backup_keep_daily,
+            'weekly': config.auto_backup_keep_weekly,
+            'monthly': config.auto_backup_keep_monthly,
+        }
+
+    @staticmethod
+    def policy_for(instance, config=None):
+        """Global policy with the instance overrides applied"""
+        from .retention_models import BackupRetentionPolicy
+
+        policy = RetentionService.global_policy(config)
+        override = BackupRetentionPolicy.objects.filter(instance=instance).first()
+        if override:
+            for key in ('last',) + RetentionService.BUCKETS:
+                value = getattr(override, f'keep_{key}')
+                if value is not None:
+                    policy[key] = value
+        return policy
+
+    @staticmethod
+    def _bucket_key(bucket, created_at):
+        local = timezone.localtime(created_at)
+        if bucket == 'hourly':
+            return (local.year, local.month, local.day, local.hour)
+        if bucket == 'daily':
+            return local.date()
+        if bucket == 'weekly':
+            iso = local.isocalendar()
+            return (iso[0], iso[1])
+        return (local.year, local.month)
+
+    @staticmethod
+    def plan(instance, policy=None, config=None):
+        """
+        Dry-run: decides which backups to keep and which to prune.
+        Returns dict with 'keep' ({backup: [reasons]}) and 'prune' ([backup]),
+        both ordered newest first.
+        """
+        from .backup_models import Backup
+
+        policy = policy or RetentionService.policy_for(instance, config)
+        backups = list(
+            Backup.objects.filter(instance=instance)
+            .only('id', 'instance_id', 'filename', 'file_path', 'file_size', 'storage_backend', 'storage_key', 'created_at')
+            .order_by('-created_at', '-id')
+        )
+
+        reasons = {backup.pk: [] for backup in backups}
+        for backup in backups[:max(policy['last'], 1)]:
+            reasons[backup.pk].append('last')
+
+        for bucket in RetentionService.BUCKETS:
+            limit = policy.get(bucket) or 0
+            seen = set()
+            for backup in backups:
+                if len(seen) >= limit:
+                    break
+                key = RetentionService._bucket_key(bucket, backup.created_at)
+                if key not in seen:
+                    seen.add(key)
+                    reasons[backup.pk].append(bucket)
+
+        return {
+            'policy': policy,
+            'keep': {backup: reasons[backup.pk] for backup in backups if reasons[backup.pk]},
+            'prune': [backup for backup in backups if not reasons[backup.pk]],
+        }
+
+    @staticmethod
+    def prune(instance, policy=None, config=None, dry_run=False):
+        """
+        Applies the retention policy to an instance.
+        Archive files still referenced by a surviving backup row (deduplicated
+        archives) are left untouched. Returns the plan with 'freed_bytes' added.
+        """
+        from .backup_models import Backup
+        from .storage_backends import BackupStorageService, BackupCache
+
+        plan = RetentionService.plan(instance, policy, config)
+        plan['freed_bytes'] = 0
+        to_prune = plan['prune']
+        if not to_prune or dry_run:
+            plan['freed_bytes'] = sum(backup.file_size for backup in to_prune)
+            return plan
+
+        prune_ids = [backup.pk for backup in to_prune]
+
+        # Files shared with backups that survive (any instance) must not be deleted
+        survivors = Backup.objects.exclude(pk__in=prune_ids)
+        referenced_paths = set(
+            survivors.filter(file_path__in=[backup.file_path for backup in to_prune]).values_list('file_path', flat=True)
+        )
+        referenced_keys = set(
+            survivors.filter(storage_key__in=[backup.storage_key for backup in to_prune if backup.storage_key])
+            .values_list('storage_key', flat=True)
+        )
+
+        local_paths = set()
+        remote_keys = {}
+        for backup in to_prune:
+            if backup.file_path not in referenced_paths and os.path.exists(backup.file_path):
+                local_paths.add(backup.file_path)
+                plan['freed_bytes'] += backup.file_size
+            if backup.storage_backend != 'local' and backup.storage_key and backup.storage_key not in referenced_keys:
+                remote_keys.setdefault(backup.storage_backend, {}).setdefault(backup.storage_key, []).append(backup.pk)
+
+        for path in local_paths:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error deleting backup file {path}: {str(e)}")
+
+        if remote_keys:
+            cache = BackupCache()
+            for backend_name, keys in remote_keys.items():
+                try:
+                    BackupStorageService.get_backend(backend_name).delete_many(list(keys))
+                except Exception as e:
+                    # Keep the rows so the remote objects are not orphaned; next run retries
+                    print(f"Error deleting backups from {backend_name}: {str(e)}")
+                    failed_ids = {pk for ids in keys.values() for pk in ids}
+                    prune_ids = [pk for pk in prune_ids if pk not in failed_ids]
+                    continue
+                for key in keys:
+                    cached_path = cache.get(key)
+                    if cached_path:
+                        os.remove(cached_path)
+
+        Backup.objects.filter(pk__in=prune_ids).delete()
+        print(f"Pruned {len(prune_ids)} backup(s) of {instance.name}, freed {plan['freed_bytes'] / (1024 * 1024):.2f} MB")
+        return plan
@@ -6,3 +6,11 @@ class InstanceSerializer(serializers.ModelSerializer):
         model = Instance
         fields = '__all__'
         read_only_fields = ('status', 'container_id', 'port', 'created_at', 'updated_at')
+
+    def validate_system_packages(self, value):
+        # They end up in the RUN line of the instance image
+        from .image_builder import parse_system_packages
+        try:
+            return ' '.join(parse_system_packages(value))
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
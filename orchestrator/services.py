@@ -8,13 +8,18 @@ class DockerService:
     def __init__(self):
         self.client = docker.from_env()
 
-    def deploy_instance(self, instance):
+    def deploy_instance(self, instance, pre_deploy_restore_point=True):
         """
         Deploys an Odoo instance with a companion Postgres container.
+        Redeploys first take a pre-deploy restore point (before pulling the
+        addons and running -u all) unless the caller already took one.
         """
         instance.status = Instance.Status.DEPLOYING
         instance.save()
         
+        if pre_deploy_restore_point:
+            self.create_pre_deploy_restore_point(instance, 'deploy')
+        
         try:
             # 1. Prepare workspace
             workspace_path = os.path.join(settings.BASE_DIR, 'instances', instance.name)
@@ -35,6 +40,9 @@ class DockerService:
             try:
                 self.client.containers.get(db_container_name)
             except docker.errors.NotFound:
+                # WAL archiving (compressed archive_command + /wal-archive mount) when enabled
+                from .wal_archiving import db_container_options
+                from .log_policy import instance_policy, log_options
                 self.client.containers.run(
                     "postgres:13",
                     name=db_container_name,
@@ -44,7 +52,9 @@ class DockerService:
                         "POSTGRES_USER": "odoo",
                     },
                     network=network_name,
-                    detach=True
+                    detach=True,
+                    **log_options(instance_policy(instance)),
+                    **db_container_options(instance)
                 )
 
             # 5. Start Odoo
@@ -97,7 +107,17 @@ class DockerService:
             if os.path.exists(addons_path):
                 # We mount it to /mnt/extra-addons which is standard in Odoo images
                 volumes[get_host_path(addons_path)] = {'bind': '/mnt/extra-addons', 'mode': 'rw'}
+
+            # Shared pip cache of this Odoo version (requirements installs reuse wheels across instances)
+            from .requirements_service import cache_options
+            cache_volumes, cache_environment = cache_options(instance)
+            volumes.update(cache_volumes)
+            
             
+            # Derived image with the instance dependencies baked in (built once per dependency set).
+            # Resolved before the running container is touched, so a failed build leaves it serving
+            from .image_builder import ImageBuilder
+            odoo_image = ImageBuilder(self.client).ensure_image(instance)
             
             # Check if container already exists (redeploy scenario)
             is_redeploy = False
@@ -119,13 +139,15 @@ class DockerService:
                 print(f"Container {odoo_container_name} not found. This is a fresh deployment.")
             
             # Create the container
+            from .log_policy import instance_policy, log_options
             odoo_container = self.client.containers.run(
-                f"odoo:{instance.odoo_version}",
+                odoo_image,
                 name=odoo_container_name,
                 environment={
                     "HOST": db_container_name,
                     "USER": "odoo",
                     "PASSWORD": "odoo",
+                    **cache_environment,
                 },
                 network=network_name,
                 volumes=volumes,
@@ -138,7 +160,8 @@ class DockerService:
                     "traefik.http.routers.odoo_" + instance.name + ".rule": f"Host(`{instance.name}.localhost`)",
                     "traefik.http.routers.odoo_" + instance.name + ".entrypoints": "web",
                     "traefik.http.services.odoo_" + instance.name + ".loadbalancer.server.port": "8069",
-                }
+                },
+                **log_options(instance_policy(instance))
             )
             
             # If this is a redeploy, update all modules
@@ -189,6 +212,18 @@ class DockerService:
         
         return instance
 
+    def create_pre_deploy_restore_point(self, instance, reason, description=''):
+        """Never blocks a deploy: failures are only logged"""
+        try:
+            from .wal_service import WALService
+            restore_point = WALService().create_pre_deploy_restore_point(instance, reason, description)
+            if restore_point:
+                print(f"Pre-deploy restore point {restore_point.name} at {restore_point.wal_lsn}")
+            return restore_point
+        except Exception as e:
+            print(f"Warning: Could not create pre-deploy restore point: {e}")
+            return None
+
     def _clone_repo(self, instance, workspace_path):
         if not instance.github_repo:
             return
@@ -354,14 +389,20 @@ class DockerService:
             import shutil
             shutil.rmtree(workspace_path)
             
-    def copy_instance(self, instance, new_name):
+    def copy_instance(self, instance, new_name, profile='full'):
         """
         Creates a complete copy of an instance including:
         - Database dump and restore
         - Filestore copy
         - Git branch creation
+        The clone profile (see clone_profiles.py) can leave history tables and
+        old/large filestore blobs out and anonymize personal data.
         """
-        print(f"Starting full copy of instance {instance.name} to {new_name}")
+        import time
+        from .clone_profiles import get_clone_profile
+        clone_profile = get_clone_profile(profile)
+        print(f"Starting {profile} copy of instance {instance.name} to {new_name}")
+        copy_started = time.monotonic()
         
         # Create the new instance record
         new_instance = Instance.objects.create(
@@ -370,7 +411,11 @@ class DockerService:
             github_repo=instance.github_repo,
             github_branch=new_name,  # Use new name as branch name
             status=Instance.Status.DEPLOYING,
-            origin='duplicate'
+            origin='duplicate',
+            source_instance=instance,
+            clone_profile=profile,
+            python_requirements=instance.python_requirements,
+            system_packages=instance.system_packages
         )
         
         try:
@@ -381,22 +426,19 @@ class DockerService:
             
             # Get source database container
             try:
-                source_db_container = self.client.containers.get(db_source)
+                from .clone_service import CloneService
+                from .throttle import Throttle
+                clone_service = CloneService(self.client)
+                step_started = time.monotonic()
                 
-                # Create dump file inside the container
-                print("Creating database dump...")
-                dump_result = source_db_container.exec_run(
-                    "pg_dump -U odoo -Fc postgres -f /tmp/db_dump.sql",
-                    environment={"PGPASSWORD": "odoo"}
-                )
-                
-                if dump_result.exit_code != 0:
-                    raise Exception(f"Database dump failed: {dump_result.output.decode('utf-8')}")
-                
-                # Get the dump file from the container
-                dump_stream, dump_stats = source_db_container.get_archive('/tmp/db_dump.sql')
-                dump_data = b''.join(dump_stream)
-                print(f"Database dumped successfully ({len(dump_data)} bytes)")
+                source_db_container = self.client.containers.get(db_source)
+                try:
+                    source_db_name = self.get_database_name(source_db_container, instance)
+                except Exception:
+                    # Older instances keep Odoo data in the default database
+                    source_db_name = 'postgres'
+                new_instance.database_name = source_db_name
+                new_instance.save(update_fields=['database_name'])
                 
                 # Create network for new instance
                 network_name = f"net_{new_name}"
@@ -407,6 +449,8 @@ class DockerService:
                 
                 # Start new PostgreSQL container
                 print("Creating new database container...")
+                from .wal_archiving import db_container_options
+                from .log_policy import instance_policy, log_options
                 new_db_container = self.client.containers.run(
                     "postgres:13",
                     name=db_target,
@@ -416,28 +460,28 @@ class DockerService:
                         "POSTGRES_USER": "odoo",
                     },
                     network=network_name,
-                    detach=True
+                    detach=True,
+                    **log_options(instance_policy(new_instance)),
+                    **db_container_options(new_instance)
                 )
                 
                 # Wait for database to be ready
-                import time
                 print("Waiting for new database to be ready...")
-                time.sleep(5)
+                waited = clone_service.wait_for_postgres(new_db_container)
+                print(f"New database ready after {waited:.1f}s")
                 
-                # Put the dump file into the new container
-                new_db_container.put_archive('/tmp', dump_data)
-                
-                # Restore database
-                print("Restoring database...")
-                restore_result = new_db_container.exec_run(
-                    "pg_restore -U odoo -d postgres -c /tmp/db_dump.sql",
-                    environment={"PGPASSWORD": "odoo"}
+                # Stream pg_dump straight into pg_restore (no intermediate copies)
+                print(f"Streaming database '{source_db_name}' to {db_target}...")
+                clone_service.stream_database(
+                    source_db_container,
+                    new_db_container,
+                    source_db_name,
+                    source_db_name,
+                    throttle=Throttle.for_instance(instance),
+                    exclude_table_data=clone_profile['exclude_table_data']
                 )
-                
-                # Note: pg_restore may have warnings but still work
-                print(f"Database restore completed. Exit code: {restore_result.exit_code}")
-                if restore_result.output:
-                    print(f"Restore output: {restore_result.output.decode('utf-8')[:500]}")
+                clone_service.apply_profile(new_db_container, source_db_name, clone_profile)
+                print(f"Step 1 completed in {time.monotonic() - step_started:.1f}s")
                     
             except docker.errors.NotFound:
                 print(f"Source database container {db_source} not found")
@@ -449,9 +493,12 @@ class DockerService:
             target_workspace = os.path.join(settings.BASE_DIR, 'instances', new_name)
             
             if os.path.exists(source_workspace):
-                import shutil
-                shutil.copytree(source_workspace, target_workspace)
-                print(f"Filestore copied from {source_workspace} to {target_workspace}")
+                # Filestore blobs are shared (reflink/hardlink), mutable files are copied
+                from .workspace_clone import WorkspaceCloner
+                from .clone_profiles import blob_filter
+                cloner = WorkspaceCloner(blob_filter=blob_filter(clone_profile))
+                cloner.clone(source_workspace, target_workspace)
+                print(f"Filestore copied from {source_workspace} to {target_workspace}: {cloner.summary()}")
             
             # 3. Create new Git branch if repo exists
             if instance.github_repo:
@@ -482,7 +529,7 @@ class DockerService:
             print("Step 4: Deploying new instance...")
             self.deploy_instance(new_instance)
             
-            print(f"Successfully copied instance {instance.name} to {new_name}")
+            print(f"Successfully copied instance {instance.name} to {new_name} in {time.monotonic() - copy_started:.1f}s")
             return new_instance
             
         except Exception as e:
@@ -491,6 +538,96 @@ class DockerService:
             new_instance.save()
             raise e
 
+    def refresh_instance(self, instance, neutralize=True):
+        """
+        Re-syncs a duplicate from its source instance:
+        - Database re-streamed from the source (dropped and recreated)
+        - Filestore mirrored (only new or changed blobs are cloned)
+        The branch, addons checkout and domain of the duplicate are kept, and
+        the clone profile it was created with is applied again.
+        """
+        import time
+        from .clone_service import CloneService
+        from .clone_profiles import get_clone_profile, blob_filter
+        from .workspace_clone import WorkspaceCloner
+        from .throttle import Throttle
+        
+        source = instance.source_instance
+        if source is None:
+            raise Exception(f"La instancia {instance.name} no es un duplicado de otra instancia")
+        
+        clone_profile = get_clone_profile(instance.clone_profile)
+        print(f"Refreshing {instance.name} from {source.name} ({instance.clone_profile} profile)...")
+        refresh_started = time.monotonic()
+        clone_service = CloneService(self.client)
+        
+        instance.status = Instance.Status.DEPLOYING
+        instance.save()
+        
+        try:
+            source_db_container = self.client.containers.get(f"db_{source.name}")
+            target_db_container = self.client.containers.get(f"db_{instance.name}")
+            try:
+                source_db_name = self.get_database_name(source_db_container, source)
+            except Exception:
+                source_db_name = 'postgres'
+            target_db_name = instance.database_name or source_db_name
+            
+            # 1. Stop Odoo so nothing holds connections to the database being replaced
+            if instance.container_id:
+                try:
+                    self.client.containers.get(instance.container_id).stop()
+                except docker.errors.NotFound:
+                    pass
+            
+            # 2. Database
+            print("Step 1: Re-syncing database...")
+            step_started = time.monotonic()
+            clone_service.wait_for_postgres(target_db_container)
+            if target_db_name != 'postgres':
+                clone_service.drop_database(target_db_container, target_db_name)
+            clone_service.stream_database(
+                source_db_container,
+                target_db_container,
+                source_db_name,
+                target_db_name,
+                throttle=Throttle.for_instance(source),
+                clean=target_db_name == 'postgres',
+                exclude_table_data=clone_profile['exclude_table_data']
+            )
+            clone_service.apply_profile(target_db_container, target_db_name, clone_profile)
+            if neutralize:
+                clone_service.neutralize(target_db_container, target_db_name, base_url=instance.url)
+            print(f"Step 1 completed in {time.monotonic() - step_started:.1f}s")
+            
+            # 3. Filestore
+            print("Step 2: Syncing filestore...")
+            source_filestore = os.path.join(
+                WorkspaceCloner.filestore_root(os.path.join(settings.BASE_DIR, 'instances', source.name)), source_db_name
+            )
+            target_filestore = os.path.join(
+                WorkspaceCloner.filestore_root(os.path.join(settings.BASE_DIR, 'instances', instance.name)), target_db_name
+            )
+            if os.path.exists(source_filestore):
+                cloner = WorkspaceCloner(blob_filter=blob_filter(clone_profile))
+                stats = cloner.sync(source_filestore, target_filestore)
+                print(f"Filestore synced: {stats['unchanged']} unchanged, {stats['deleted']} deleted, {cloner.summary()}")
+            
+            if not instance.database_name:
+                instance.database_name = target_db_name
+            instance.save()
+            
+            # 4. Start Odoo again
+            self.restart_instance(instance)
+            print(f"Successfully refreshed {instance.name} from {source.name} in {time.monotonic() - refresh_started:.1f}s")
+            return instance
+        
+        except Exception as e:
+            print(f"Error refreshing instance: {str(e)}")
+            instance.status = Instance.Status.ERROR
+            instance.save()
+            raise e
+
     def get_logs(self, instance, lines=100):
         if not instance.container_id:
             return "No container ID found."
@@ -502,6 +639,33 @@ class DockerService:
             return "Container not found."
         except Exception as e:
             return f"Error fetching logs: {str(e)}"
+
+    def get_logs_since(self, instance, since=None, lines=200):
+        """
+        Log lines newer than the `since` cursor (a Docker RFC3339Nano
+        timestamp as returned here before); the last `lines` lines without a
+        cursor. Returns (entries, cursor) where entries are (timestamp, text)
+        and cursor is the timestamp to ask from next time.
+        """
+        from .log_store import timestamp_to_epoch
+
+        container = self.client.containers.get(instance.container_id)
+        kwargs = {'timestamps': True}
+        if since:
+            # Lines at or before the cursor come back (Docker filters by
+            # second fractions) and are skipped below
+            kwargs['since'] = timestamp_to_epoch(since)
+        else:
+            kwargs['tail'] = lines
+
+        entries = []
+        for line in container.logs(**kwargs).decode('utf-8', 'replace').splitlines():
+            timestamp, _, text = line.partition(' ')
+            # Timestamps have a fixed width, so they compare as strings
+            if since and timestamp <= since:
+                continue
+            entries.append((timestamp, text))
+        return entries, entries[-1][0] if entries else since
     
     def execute_command(self, instance, command):
         """Execute a command inside the container and return the output"""
@@ -538,13 +702,61 @@ class DockerService:
         except Exception as e:
             return f"Error executing command: {str(e)}"
     
+    def get_database_name(self, db_container, instance):
+        """
+        Returns the Odoo database name of an instance: the configured
+        database_name or the first non-template database found in the container.
+        """
+        # Check if database_name is specified in instance
+        if instance.database_name:
+            odoo_db_name = instance.database_name
+            print(f"Using specified database name: {odoo_db_name}")
+        else:
+            # List databases to find the Odoo database
+            list_dbs_result = db_container.exec_run(
+                "psql -U odoo -d postgres -t -c \"SELECT datname FROM pg_database WHERE datistemplate = false;\"",
+                environment={"PGPASSWORD": "odoo"}
+            )
+            
+            if list_dbs_result.exit_code == 0:
+                databases = [db.strip() for db in list_dbs_result.output.decode('utf-8').split('\n') if db.strip()]
+                print(f"Available databases: {databases}")
+                
+                # Filter out system databases
+                user_databases = [db for db in databases if db not in ['postgres', 'template0', 'template1']]
+                
+                if user_databases:
+                    # Use the first user database (the Odoo database)
+                    odoo_db_name = user_databases[0]
+                    print(f"Found Odoo database: {odoo_db_name}")
+                else:
+                    raise Exception(
+                        f"No se encontró ninguna base de datos de usuario. "
+                        f"Por favor, especifica el nombre de la base de datos en el campo 'Database Name' de la instancia. "
+                        f"Bases de datos disponibles: {databases}"
+                    )
+                
+                print(f"Using database: {odoo_db_name}")
+            else:
+                raise Exception(
+                    "No se pudo listar las bases de datos. "
+                    "Por favor, especifica el nombre de la base de datos en el campo 'Database Name' de la instancia."
+                )
+        
+        return odoo_db_name
+    
     def backup_instance(self, instance, include_filestore=True, user=None):
         """
         Creates a backup of the instance (database + optionally filestore)
+        Data of the tables excluded by the instance backup profile is left out
+        of the dump and filestore files above its size cap are skipped.
         Returns the Backup model instance
         """
         import zipfile
+        import time
         from datetime import datetime
+        from .backup_profiles import excluded_tables_for
+        from .clone_profiles import pg_dump_exclude_args
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_filename = f"{instance.name}_backup_{timestamp}.zip"
@@ -557,69 +769,59 @@ class DockerService:
         
         print(f"Creating backup for instance {instance.name}...")
         
+        # Limit backup IO so live instances on the same disk stay responsive
+        from .throttle import Throttle, low_priority
+        throttle = Throttle.for_instance(instance)
+        
+        excluded_tables = excluded_tables_for(instance)
+        filestore_max_bytes = instance.backup_filestore_max_mb * 1024 * 1024 if instance.backup_filestore_max_mb else None
+        stats = {'dump_size': None, 'dump_seconds': None, 'filestore_files': None, 'filestore_size': None, 'filestore_skipped': 0}
+        
         try:
             with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                 # 1. Backup Odoo database
                 print(f"Backing up database for {instance.name}...")
                 db_container = self.client.containers.get(f"db_{instance.name}")
                 
-                # Check if database_name is specified in instance
-                if instance.database_name:
-                    odoo_db_name = instance.database_name
-                    print(f"Using specified database name: {odoo_db_name}")
-                else:
-                    # List databases to find the Odoo database
-                    list_dbs_result = db_container.exec_run(
-                        "psql -U odoo -d postgres -t -c \"SELECT datname FROM pg_database WHERE datistemplate = false;\"",
-                        environment={"PGPASSWORD": "odoo"}
-                    )
-                    
-                    if list_dbs_result.exit_code == 0:
-                        databases = [db.strip() for db in list_dbs_result.output.decode('utf-8').split('\n') if db.strip()]
-                        print(f"Available databases: {databases}")
-                        
-                        # Filter out system databases
-                        user_databases = [db for db in databases if db not in ['postgres', 'template0', 'template1']]
-                        
-                        if user_databases:
-                            # Use the first user database (the Odoo database)
-                            odoo_db_name = user_databases[0]
-                            print(f"Found Odoo database: {odoo_db_name}")
-                        else:
-                            raise Exception(
-                                f"No se encontró ninguna base de datos de usuario. "
-                                f"Por favor, especifica el nombre de la base de datos en el campo 'Database Name' de la instancia. "
-                                f"Bases de datos disponibles: {databases}"
-                            )
-                        
-                        print(f"Using database: {odoo_db_name}")
-                    else:
-                        raise Exception(
-                            "No se pudo listar las bases de datos. "
-                            "Por favor, especifica el nombre de la base de datos en el campo 'Database Name' de la instancia."
-                        )
+                odoo_db_name = self.get_database_name(db_container, instance)
                 
-                # Create database dump for the specific database
+                # Create database dump for the specific database (schema of excluded tables is kept)
+                dump_cmd = f"pg_dump -U odoo -Fc {odoo_db_name} -f /tmp/backup.dump"
+                if excluded_tables:
+                    dump_cmd += ' ' + pg_dump_exclude_args({'exclude_table_data': excluded_tables})
+                    print(f"Excluding data of tables: {', '.join(excluded_tables)}")
+                dump_started = time.monotonic()
                 dump_result = db_container.exec_run(
-                    f"pg_dump -U odoo -Fc {odoo_db_name} -f /tmp/backup.dump",
+                    low_priority(dump_cmd),
                     environment={"PGPASSWORD": "odoo"}
                 )
+                stats['dump_seconds'] = time.monotonic() - dump_started
                 
                 if dump_result.exit_code != 0:
                     error_msg = dump_result.output.decode('utf-8')
                     raise Exception(f"Database backup failed: {error_msg}")
                 
-                # Get dump file
-                dump_stream, _ = db_container.get_archive('/tmp/backup.dump')
-                dump_data = b''.join(dump_stream)
-                
-                # Extract the tar archive and get the actual file
+                # Get dump file (streamed to disk instead of joined in memory)
                 import tarfile
-                import io
-                tar = tarfile.open(fileobj=io.BytesIO(dump_data))
-                dump_file = tar.extractfile('backup.dump')
-                zipf.writestr('database.dump', dump_file.read())
-                print(f"Database '{odoo_db_name}' backed up successfully")
+                import shutil
+                import tempfile
+                dump_stream, _ = db_container.get_archive('/tmp/backup.dump')
+                with tempfile.TemporaryFile() as dump_tar:
+                    for chunk in throttle.iter(dump_stream):
+                        dump_tar.write(chunk)
+                    dump_tar.seek(0)
+                    
+                    # Extract the tar archive and get the actual file
+                    with tarfile.open(fileobj=dump_tar) as tar:
+                        stats['dump_size'] = tar.getmember('backup.dump').size
+                        dump_file = tar.extractfile('backup.dump')
+                        with zipf.open('database.dump', 'w', force_zip64=True) as zip_entry:
+                            shutil.copyfileobj(dump_file, zip_entry, 1024 * 1024)
+                db_container.exec_run("rm -f /tmp/backup.dump")
+                print(
+                    f"Database '{odoo_db_name}' backed up successfully: "
+                    f"{stats['dump_size'] / (1024 * 1024):.2f} MB dump in {stats['dump_seconds']:.1f}s"
+                )
                 
                 # 2. Backup filestore if requested
                 if include_filestore:
@@ -642,24 +844,35 @@ class DockerService:
                             # Get filestore archive from container
                             print(f"Extracting filestore from {filestore_path}...")
                             filestore_stream, _ = odoo_container.get_archive(filestore_path)
-                            filestore_data = b''.join(filestore_stream)
-                            print(f"Filestore archive size: {len(filestore_data)} bytes")
-                            
-                            # Extract the tar and add files to backup zip
-                            import tarfile
-                            import io
-                            tar = tarfile.open(fileobj=io.BytesIO(filestore_data))
-                            file_count = 0
-                            for member in tar.getmembers():
-                                if member.isfile():
-                                    file_data = tar.extractfile(member)
-                                    # Store with 'filestore/' prefix
-                                    zip_path = f'filestore/{member.name}'
-                                    zipf.writestr(zip_path, file_data.read())
-                                    file_count += 1
-                                    if file_count <= 3:  # Log first 3 files
-                                        print(f"  Added to ZIP: {zip_path}")
+                            with tempfile.TemporaryFile() as filestore_tar:
+                                for chunk in throttle.iter(filestore_stream):
+                                    filestore_tar.write(chunk)
+                                print(f"Filestore archive size: {filestore_tar.tell()} bytes")
+                                filestore_tar.seek(0)
+                                
+                                # Extract the tar and add files to backup zip
+                                file_count = 0
+                                filestore_bytes = 0
+                                with tarfile.open(fileobj=filestore_tar) as tar:
+                                    for member in tar:
+                                        if member.isfile():
+                                            if filestore_max_bytes is not None and member.size > filestore_max_bytes:
+                                                stats['filestore_skipped'] += 1
+                                                continue
+                                            file_data = tar.extractfile(member)
+                                            # Store with 'filestore/' prefix
+                                            zip_path = f'filestore/{member.name}'
+                                            with zipf.open(zip_path, 'w', force_zip64=True) as zip_entry:
+                                                shutil.copyfileobj(file_data, zip_entry, 1024 * 1024)
+                                            file_count += 1
+                                            filestore_bytes += member.size
+                                            if file_count <= 3:  # Log first 3 files
+                                                print(f"  Added to ZIP: {zip_path}")
+                            stats['filestore_files'] = file_count
+                            stats['filestore_size'] = filestore_bytes
                             print(f"Filestore backed up successfully: {file_count} files from {filestore_path}")
+                            if stats['filestore_skipped']:
+                                print(f"Skipped {stats['filestore_skipped']} filestore files above {instance.backup_filestore_max_mb} MB")
                         else:
                             print(f"Warning: Filestore not found at {filestore_path}")
                     except Exception as e:
@@ -677,28 +890,51 @@ class DockerService:
                     'include_filestore': include_filestore,
                     'database_name': odoo_db_name,
                     'github_repo': instance.github_repo or '',
-                    'github_branch': instance.github_branch or ''
+                    'github_branch': instance.github_branch or '',
+                    'python_requirements': instance.python_requirements,
+                    'system_packages': instance.system_packages,
+                    'backup_profile': instance.backup_profile,
+                    'excluded_tables': excluded_tables
                 }
                 import json
                 zipf.writestr('metadata.json', json.dumps(metadata, indent=2))
                 
-            print(f"Backup created successfully: {backup_path}")
+            print(f"Backup created successfully: {backup_path} (transferred {throttle.summary()})")
             
             # Create backup record in database
             from .backup_models import Backup
+            from .download_service import DownloadService
             file_size = os.path.getsize(backup_path)
             print(f"Backup file size: {file_size} bytes ({file_size / (1024 * 1024):.2f} MB)")
             
+            # Checksum is served with downloads so clients can verify resumed transfers
+            checksum = DownloadService.compute_sha256(backup_path)
+            
             backup_record = Backup.objects.create(
                 instance=instance,
                 filename=backup_filename,
                 file_path=backup_path,
                 include_filestore=include_filestore,
                 file_size=file_size,
-                created_by=user
+                checksum_sha256=checksum,
+                created_by=user,
+                backup_profile=instance.backup_profile,
+                excluded_tables=','.join(excluded_tables),
+                **stats
             )
             print(f"Backup record created: ID={backup_record.pk}, Size={backup_record.file_size} bytes")
             
+            # Copy to remote storage (S3/MinIO) when configured; a failure here keeps the local copy
+            from .storage_backends import BackupStorageService
+            if BackupStorageService.remote_enabled():
+                try:
+                    BackupStorageService.offload(
+                        backup_record,
+                        remove_local=getattr(settings, 'BACKUP_TIER_AFTER_DAYS', 7) == 0
+                    )
+                except Exception as e:
+                    print(f"Error uploading backup to remote storage: {str(e)}")
+            
             return backup_record
             
         except Exception as e:
@@ -707,16 +943,24 @@ class DockerService:
                 os.remove(backup_path)
             raise e
     
-    def restore_instance(self, instance, backup_file_path):
+    def restore_instance(self, instance, backup_file_path, profile=None):
         """
-        Restores an instance from a backup file
+        Restores an instance from a backup file.
+        With a clone profile, excluded table data is skipped through a filtered
+        pg_restore list and filestore entries above the size limit are left out.
         """
         import zipfile
         import tempfile
         import json
+        import io
         
         print(f"Restoring instance {instance.name} from backup...")
         
+        from .throttle import Throttle, low_priority
+        from .clone_profiles import get_clone_profile, filestore_entry_allowed
+        throttle = Throttle.for_instance(instance)
+        clone_profile = get_clone_profile(profile) if profile else None
+        
         try:
             with zipfile.ZipFile(backup_file_path, 'r') as zipf:
                 # List all files in the ZIP for debugging
@@ -729,7 +973,18 @@ class DockerService:
                 
                 # Extract to temp directory
                 temp_dir = tempfile.mkdtemp()
-                zipf.extractall(temp_dir)
+                if clone_profile is None:
+                    zipf.extractall(temp_dir)
+                else:
+                    # Zip entry dates are the backup time, so only the size limit applies here
+                    members = [
+                        info for info in zipf.infolist()
+                        if not info.filename.startswith('filestore/') or filestore_entry_allowed(clone_profile, info.file_size)
+                    ]
+                    skipped = len(zip_contents) - len(members)
+                    if skipped:
+                        print(f"Clone profile skips {skipped} filestore entries above the size limit")
+                    zipf.extractall(temp_dir, members=members)
                 
                 # Read metadata
                 metadata_path = os.path.join(temp_dir, 'metadata.json')
@@ -742,24 +997,16 @@ class DockerService:
                 print("Restoring database...")
                 db_container = self.client.containers.get(f"db_{instance.name}")
                 
-                # Read dump file
-                dump_path = os.path.join(temp_dir, 'database.dump')
-                with open(dump_path, 'rb') as f:
-                    dump_data = f.read()
-                
-                # Create tar archive for docker
+                # Create tar archive for docker on disk (the dump is never loaded in memory)
                 import tarfile
-                import io
-                tar_stream = io.BytesIO()
-                tar = tarfile.open(fileobj=tar_stream, mode='w')
-                tarinfo = tarfile.TarInfo(name='restore.dump')
-                tarinfo.size = len(dump_data)
-                tar.addfile(tarinfo, io.BytesIO(dump_data))
-                tar.close()
-                tar_stream.seek(0)
+                dump_path = os.path.join(temp_dir, 'database.dump')
+                dump_tar_path = os.path.join(temp_dir, 'restore.tar')
+                with tarfile.open(dump_tar_path, mode='w') as tar:
+                    tar.add(dump_path, arcname='restore.dump')
                 
-                # Put file in container
-                db_container.put_archive('/tmp', tar_stream.read())
+                # Put file in container (streamed and throttled)
+                db_container.put_archive('/tmp', throttle.read_file(dump_tar_path))
+                os.remove(dump_tar_path)
                 
                 # Get database name - prioritize instance's database_name if set
                 if instance.database_name:
@@ -783,14 +1030,65 @@ class DockerService:
                 )
                 print(f"Create database result: {create_result.exit_code} - {create_result.output.decode()}")
                 
-                # Restore dump to the database (without -c flag to avoid clean errors)
-                restore_result = db_container.exec_run(
-                    f"pg_restore -U odoo -d {odoo_db_name} --no-owner --no-acl /tmp/restore.dump",
-                    environment={"PGPASSWORD": "odoo"}
-                )
-                print(f"Database restore completed. Exit code: {restore_result.exit_code}")
-                if restore_result.output:
-                    print(f"Restore output: {restore_result.output.decode()}")
+                # Excluded table data is commented out of the archive TOC and
+                # restored with `pg_restore -L` (the tables are still created)
+                list_option = ''
+                if clone_profile and clone_profile['exclude_table_data']:
+                    from .clone_profiles import filter_restore_list
+                    toc_result = db_container.exec_run("pg_restore -l /tmp/restore.dump")
+                    toc, excluded = filter_restore_list(
+                        toc_result.output.decode('utf-8', 'replace'), clone_profile['exclude_table_data']
+                    )
+                    if toc_result.exit_code == 0 and excluded:
+                        toc_tar = io.BytesIO()
+                        with tarfile.open(fileobj=toc_tar, mode='w') as tar:
+                            data = toc.encode('utf-8')
+                            info = tarfile.TarInfo('restore.list')
+                            info.size = len(data)
+                            tar.addfile(info, io.BytesIO(data))
+                        db_container.put_archive('/tmp', toc_tar.getvalue())
+                        list_option = '-L /tmp/restore.list '
+                        print(f"Clone profile skips data of {len(excluded)} tables: {', '.join(excluded)}")
+                
+                if list_option:
+                    # Schema and data first, then the rows left pointing to skipped data are
+                    # cleaned up, and only then indexes and foreign keys are created
+                    from .clone_service import CloneService
+                    restore_result = db_container.exec_run(
+                        low_priority(f"pg_restore -U odoo -d {odoo_db_name} --no-owner --no-acl {list_option}--section=pre-data --section=data /tmp/restore.dump"),
+                        environment={"PGPASSWORD": "odoo"}
+                    )
+                    print(f"Database schema and data restored. Exit code: {restore_result.exit_code}")
+                    if restore_result.output:
+                        print(f"Restore output: {restore_result.output.decode()}")
+                    
+                    post_data = db_container.exec_run("pg_restore --section=post-data -f - /tmp/restore.dump", demux=True)
+                    CloneService(self.client).clear_dangling_references(
+                        db_container, odoo_db_name, (post_data.output[0] or b'').decode('utf-8', 'replace'), clone_profile['exclude_table_data']
+                    )
+                    
+                    constraints_result = db_container.exec_run(
+                        low_priority(f"pg_restore -U odoo -d {odoo_db_name} --no-owner --no-acl {list_option}--section=post-data /tmp/restore.dump"),
+                        environment={"PGPASSWORD": "odoo"}
+                    )
+                    if constraints_result.exit_code != 0:
+                        raise Exception(
+                            f"No se pudieron crear los índices y claves foráneas: {constraints_result.output.decode('utf-8', 'replace')[:2000]}"
+                        )
+                    print("Indexes and foreign keys restored")
+                else:
+                    # Restore dump to the database (without -c flag to avoid clean errors)
+                    restore_result = db_container.exec_run(
+                        low_priority(f"pg_restore -U odoo -d {odoo_db_name} --no-owner --no-acl /tmp/restore.dump"),
+                        environment={"PGPASSWORD": "odoo"}
+                    )
+                    print(f"Database restore completed. Exit code: {restore_result.exit_code}")
+                    if restore_result.output:
+                        print(f"Restore output: {restore_result.output.decode()}")
+                
+                if clone_profile:
+                    from .clone_service import CloneService
+                    CloneService(self.client).apply_profile(db_container, odoo_db_name, clone_profile)
                 
                 # 2. Restore filestore if exists
                 filestore_dir = os.path.join(temp_dir, 'filestore')
@@ -830,9 +1128,9 @@ class DockerService:
                             print("Warning: No files found in filestore directory")
                             raise Exception("No files found in filestore")
                         
-                        # Create tar archive with filestore contents
-                        tar_stream = io.BytesIO()
-                        tar = tarfile.open(fileobj=tar_stream, mode='w')
+                        # Create tar archive with filestore contents (on disk, streamed to the container)
+                        filestore_tar_path = os.path.join(temp_dir, 'filestore.tar')
+                        tar = tarfile.open(filestore_tar_path, mode='w')
                         
                         # Add all files from actual filestore directory
                         files_added = 0
@@ -847,9 +1145,8 @@ class DockerService:
                         print(f"Added {files_added} files to tar archive")
                         tar.close()
                         
-                        tar_size = tar_stream.tell()
+                        tar_size = os.path.getsize(filestore_tar_path)
                         print(f"Tar archive size: {tar_size} bytes")
-                        tar_stream.seek(0)
                         
                         # Create filestore directory in container
                         filestore_path = f"/var/lib/odoo/filestore/{odoo_db_name}"
@@ -858,7 +1155,8 @@ class DockerService:
                         
                         # Put filestore archive in container to the correct database folder
                         print(f"Uploading filestore to container...")
-                        odoo_container.put_archive(filestore_path, tar_stream.read())
+                        odoo_container.put_archive(filestore_path, throttle.read_file(filestore_tar_path))
+                        os.remove(filestore_tar_path)
                         
                         # Verify files were copied
                         verify_result = odoo_container.exec_run(f"ls -la {filestore_path}")
@@ -884,7 +1182,7 @@ class DockerService:
                 import shutil
                 shutil.rmtree(temp_dir)
                 
-                print("Restore completed successfully")
+                print(f"Restore completed successfully (transferred {throttle.summary()})")
                 
         except Exception as e:
             print(f"Error restoring backup: {str(e)}")
@@ -1037,30 +1335,51 @@ class OdooModuleService:
         Returns:
             tuple: (success: bool, message: str, module_name: str or None)
         """
+        import tempfile
+        
+        # 1. Verify instance has GitHub repo configured
+        if not instance.github_repo:
+            return False, "Esta instancia no tiene un repositorio de GitHub configurado", None
+        
+        # 2. Save uploaded file to temporary location
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
+            for chunk in zip_file.chunks():
+                tmp_file.write(chunk)
+            tmp_zip_path = tmp_file.name
+        
+        try:
+            return OdooModuleService.install_module_from_path(instance, tmp_zip_path)
+        finally:
+            # Clean up zip file
+            if os.path.exists(tmp_zip_path):
+                os.unlink(tmp_zip_path)
+    
+    @staticmethod
+    def install_module_from_path(instance, zip_path):
+        """
+        Installs a module from a ZIP file already on disk (e.g. an assembled chunked upload).
+        The module is committed to the addons checkout and, when the Odoo
+        container is running with it mounted, installed (-i) or upgraded (-u)
+        alone by ModuleInstaller; otherwise the instance is redeployed.
+        
+        Returns:
+            tuple: (success: bool, message: str, module_name: str or None)
+        """
+        import time
         import zipfile
         import tempfile
         
         try:
-            # 1. Verify instance has GitHub repo configured
             if not instance.github_repo:
                 return False, "Esta instancia no tiene un repositorio de GitHub configurado", None
             
-            # 2. Save uploaded file to temporary location
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
-                for chunk in zip_file.chunks():
-                    tmp_file.write(chunk)
-                tmp_zip_path = tmp_file.name
-            
             # 3. Extract to temporary directory first
             temp_extract_path = tempfile.mkdtemp()
             print(f"Extrayendo módulo temporalmente en: {temp_extract_path}")
             
-            with zipfile.ZipFile(tmp_zip_path, 'r') as zip_ref:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
                 zip_ref.extractall(temp_extract_path)
             
-            # Clean up zip file
-            os.unlink(tmp_zip_path)
-            
             # 4. Find the actual module directory name
             extracted_module_name = None
             module_temp_path = None
@@ -1079,7 +1398,14 @@ class OdooModuleService:
                 shutil.rmtree(temp_extract_path)
                 return False, "No se pudo identificar el módulo en el ZIP. Asegúrate de que contiene __manifest__.py", None
             
-            # 5. Copy module to GitHub repo addons directory
+            # Rollback point before the module reaches the repo and the database
+            docker_service = DockerService()
+            docker_service.create_pre_deploy_restore_point(
+                instance, 'module', f"Automático antes de instalar el módulo {extracted_module_name}"
+            )
+            sync_started = time.monotonic()
+            
+            # 5. Copy module to GitHub repo addons directory (mounted at /mnt/extra-addons)
             workspace_path = os.path.join(settings.BASE_DIR, 'instances', instance.name)
             addons_path = os.path.join(workspace_path, 'addons')
             os.makedirs(addons_path, exist_ok=True)
@@ -1097,12 +1423,12 @@ class OdooModuleService:
             
             print(f"Módulo copiado a: {module_dest_path}")
             
-            # 6. Commit and push to GitHub
+            # 6. Commit and push to GitHub (the addons directory is the clone)
             try:
-                repo = git.Repo(workspace_path)
+                repo = git.Repo(addons_path)
                 
                 # Add the new module
-                repo.index.add([os.path.join('addons', extracted_module_name)])
+                repo.index.add([extracted_module_name])
                 
                 # Commit
                 commit_message = f"Add module {extracted_module_name}"
@@ -1117,16 +1443,37 @@ class OdooModuleService:
             except Exception as e:
                 print(f"Error en Git: {str(e)}")
                 return False, f"Error al hacer commit/push al repositorio: {str(e)}", extracted_module_name
+            sync_seconds = time.monotonic() - sync_started
             
-            # 7. Deploy/upgrade the instance (this will update all modules)
-            docker_service = DockerService()
+            # 7. Install/upgrade only this module in a one-shot container and reload the server
+            from .module_installer import ModuleInstaller
+            from .models import ModuleInstallation
+            installer = ModuleInstaller(docker_service.client)
+            if installer.odoo_container(instance) is not None:
+                installation = installer.install(instance, extracted_module_name, sync_seconds=sync_seconds)
+                if installation.status != 'completed':
+                    return False, f"Módulo agregado al repo pero error al instalarlo: {installation.error_message}", extracted_module_name
+                action = 'actualizado' if installation.mode == 'upgrade' else 'instalado'
+                return True, f"Módulo '{extracted_module_name}' {action} en {installation.total_seconds}s sin redesplegar", extracted_module_name
+            
+            # Container stopped or without the addons mount: full redeploy (this will update all modules)
+            installation = ModuleInstallation.objects.create(
+                instance=instance, module_name=extracted_module_name, mode='redeploy', sync_seconds=round(sync_seconds, 2)
+            )
+            deploy_started = time.monotonic()
             try:
-                docker_service.deploy_instance(instance)
-                
+                docker_service.deploy_instance(instance, pre_deploy_restore_point=False)
+                installation.status = 'completed'
                 return True, f"Módulo '{extracted_module_name}' agregado al repositorio y desplegado exitosamente", extracted_module_name
                 
             except Exception as e:
+                installation.status = 'failed'
+                installation.error_message = str(e)
                 return False, f"Módulo agregado al repo pero error en deploy: {str(e)}", extracted_module_name
+            finally:
+                installation.install_seconds = round(time.monotonic() - deploy_started, 2)
+                installation.total_seconds = round(installation.install_seconds + sync_seconds, 2)
+                installation.save()
             
         except zipfile.BadZipFile:
             return False, "El archivo no es un ZIP válido", None
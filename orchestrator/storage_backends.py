@@ -0,0 +1,302 @@
+import os
+import time
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+
+
+class StorageError(Exception):
+    """Raised when a backup archive cannot be stored or fetched"""
+    pass
+
+
+class LocalStorage:
+    """Backups kept in BASE_DIR/backups (the hot disk). The key is the absolute path"""
+
+    name = 'local'
+
+    def upload(self, local_path, key):
+        return local_path
+
+    def download(self, key, destination):
+        if not os.path.exists(key):
+            raise StorageError(f"El archivo de respaldo no existe: {key}")
+        return key
+
+    def delete(self, key):
+        if key and os.path.exists(key):
+            os.remove(key)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def exists(self, key):
+        return bool(key) and os.path.exists(key)
+
+    def presigned_url(self, key, filename, expires=3600):
+        return None
+
+
+class S3Storage:
+    """
+    S3-compatible object storage (AWS S3, MinIO, Wasabi...).
+    Uploads and downloads use boto3's managed transfers, which split large
+    archives in parts transferred in parallel and never load them in memory.
+    """
+
+    name = 's3'
+
+    def __init__(self):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise StorageError("boto3 no está instalado. Ejecuta: pip install boto3")
+
+        self.bucket = getattr(settings, 'BACKUP_S3_BUCKET', '')
+        if not self.bucket:
+            raise StorageError("BACKUP_S3_BUCKET no está configurado")
+
+        self.client = boto3.client(
+            's3',
+            endpoint_url=getattr(settings, 'BACKUP_S3_ENDPOINT_URL', '') or None,
+            aws_access_key_id=getattr(settings, 'BACKUP_S3_ACCESS_KEY', '') or None,
+            aws_secret_access_key=getattr(settings, 'BACKUP_S3_SECRET_KEY', '') or None,
+            region_name=getattr(settings, 'BACKUP_S3_REGION', '') or None,
+            # MinIO and most self-hosted services only support path-style addressing
+            config=Config(s3={'addressing_style': 'path'} if getattr(settings, 'BACKUP_S3_ENDPOINT_URL', '') else {})
+        )
+
+        part_size = getattr(settings, 'BACKUP_S3_MULTIPART_CHUNK_MB', 64) * 1024 * 1024
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=getattr(settings, 'BACKUP_S3_MAX_CONCURRENCY', 8),
+            use_threads=True
+        )
+
+    def upload(self, local_path, key):
+        started = time.monotonic()
+        self.client.upload_file(
+            local_path,
+            self.bucket,
+            key,
+            ExtraArgs={'ContentType': 'application/zip'},
+            Config=self.transfer_config
+        )
+        elapsed = time.monotonic() - started
+        size_mb = os.path.getsize(local_path) / (1024 * 1024)
+        print(f"Uploaded {key} to s3://{self.bucket} ({size_mb:.2f} MB in {elapsed:.1f}s)")
+        return key
+
+    def download(self, key, destination):
+        # Download to a unique temporary name (concurrent requests of one process fetch the
+        # same key too) so a partial file is never taken for a complete one
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(destination), prefix=f"{os.path.basename(destination)}.", suffix='.tmp'
+        )
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, key, tmp_path, Config=self.transfer_config)
+            os.replace(tmp_path, destination)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return destination
+
+    def delete(self, key):
+        if key:
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys):
+        """Deletes objects in batches of 1000 (the DeleteObjects API limit)"""
+        keys = [key for key in keys if key]
+        for start in range(0, len(keys), 1000):
+            batch = keys[start:start + 1000]
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def presigned_url(self, key, filename, expires=3600):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': key,
+                'ResponseContentDisposition': f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=expires
+        )
+
+
+class BackupCache:
+    """
+    LRU cache of archives fetched from remote storage, so restoring the same
+    backup several times only downloads it once. The modification time is
+    refreshed on every hit and used as the recency marker.
+    """
+
+    def __init__(self):
+        self.directory = getattr(settings, 'BACKUP_CACHE_DIR', '') or os.path.join(settings.BASE_DIR, 'backups', '.cache')
+        self.max_bytes = int(getattr(settings, 'BACKUP_CACHE_MAX_GB', 10) * 1024 * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key.replace('/', '__'))
+
+    def get(self, key):
+        path = self.path_for(key)
+        if os.path.exists(path):
+            os.utime(path, None)
+            return path
+        return None
+
+    def evict(self, reserve_bytes=0):
+        """Removes least recently used archives until reserve_bytes fit under the limit"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path) and not name.endswith('.tmp'):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total + reserve_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            print(f"Evicted {os.path.basename(path)} from backup cache")
+
+
+class BackupStorageService:
+    """Stores, fetches, tiers and deletes backup archives across storage backends"""
+
+    @staticmethod
+    def get_backend(name=None):
+        name = name or getattr(settings, 'BACKUP_STORAGE_BACKEND', 'local')
+        if name == 's3':
+            return S3Storage()
+        if name == 'local':
+            return LocalStorage()
+        raise StorageError(f"Backend de almacenamiento desconocido: {name}")
+
+    @staticmethod
+    def remote_enabled():
+        return getattr(settings, 'BACKUP_STORAGE_BACKEND', 'local') != 'local'
+
+    @staticmethod
+    def build_key(backup):
+        prefix = getattr(settings, 'BACKUP_S3_PREFIX', 'backups/')
+        return f"{prefix}{backup.instance.name}/{backup.filename}"
+
+    @staticmethod
+    def offload(backup, remove_local=False):
+        """
+        Copies the archive to the configured remote backend.
+        With remove_local the copy on the hot disk is deleted afterwards.
+        """
+        if backup.storage_backend == 'local':
+            if not BackupStorageService.remote_enabled():
+                return backup
+            if not os.path.exists(backup.file_path):
+                raise StorageError(f"El archivo de respaldo no existe: {backup.file_path}")
+
+            backend = BackupStorageService.get_backend()
+            key = BackupStorageService.build_key(backup)
+            backend.upload(backup.file_path, key)
+            backup.storage_backend = backend.name
+            backup.storage_key = key
+            backup.save(update_fields=['storage_backend', 'storage_key'])
+
+        if remove_local and backup.is_local:
+            os.remove(backup.file_path)
+            backup.tiered_at = timezone.now()
+            backup.save(update_fields=['tiered_at'])
+            print(f"Removed local copy of {backup.filename} (kept in {backup.storage_backend})")
+        return backup
+
+    @staticmethod
+    def local_path(backup):
+        """
+        Returns a local path to the archive, downloading it into the LRU cache
+        when it only lives in remote storage.
+        """
+        if backup.is_local:
+            return backup.file_path
+        if backup.storage_backend == 'local':
+            raise StorageError(f"El archivo de respaldo no existe: {backup.file_path}")
+
+        cache = BackupCache()
+        cached_path = cache.get(backup.storage_key)
+        if cached_path:
+            print(f"Backup {backup.filename} served from cache")
+            return cached_path
+
+        cache.evict(reserve_bytes=backup.file_size)
+        destination = cache.path_for(backup.storage_key)
+        print(f"Fetching {backup.filename} from {backup.storage_backend}...")
+        BackupStorageService.get_backend(backup.storage_backend).download(backup.storage_key, destination)
+
+        if backup.checksum_sha256:
+            from .download_service import DownloadService
+            if DownloadService.compute_sha256(destination) != backup.checksum_sha256:
+                os.remove(destination)
+                raise StorageError(f"El checksum de {backup.filename} no coincide tras la descarga")
+        return destination
+
+    @staticmethod
+    def download_url(backup, expires=3600):
+        """Presigned URL for backups that are no longer on the hot disk (None if not applicable)"""
+        if backup.is_local or backup.storage_backend == 'local':
+            return None
+        return BackupStorageService.get_backend(backup.storage_backend).presigned_url(
+            backup.storage_key, backup.filename, expires=expires
+        )
+
+    @staticmethod
+    def delete(backup):
+        """Deletes the archive everywhere it is stored (hot disk, remote storage and cache)"""
+        if os.path.exists(backup.file_path):
+            os.remove(backup.file_path)
+        if backup.storage_backend != 'local' and backup.storage_key:
+            BackupStorageService.get_backend(backup.storage_backend).delete(backup.storage_key)
+            cached_path = BackupCache().get(backup.storage_key)
+            if cached_path:
+                os.remove(cached_path)
+
+    @staticmethod
+    def apply_tiering(now=None):
+        """
+        Moves backups older than BACKUP_TIER_AFTER_DAYS off the hot disk.
+        Returns the number of backups tiered.
+        """
+        from .backup_models import Backup
+
+        if not BackupStorageService.remote_enabled():
+            return 0
+
+        now = now or timezone.now()
+        cutoff = now - timedelta(days=getattr(settings, 'BACKUP_TIER_AFTER_DAYS', 7))
+        tiered = 0
+        for backup in Backup.objects.filter(created_at__lt=cutoff, tiered_at__isnull=True).select_related('instance'):
+            if not backup.is_local:
+                continue
+            try:
+                BackupStorageService.offload(backup, remove_local=True)
+                tiered += 1
+            except Exception as e:
+                print(f"Error tiering backup {backup.filename}: {str(e)}")
+        return tiered
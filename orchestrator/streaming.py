@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+_DONE = object()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _streaming_executor():
+    """
+    Threads reserved for streamed responses. A live stream keeps a thread
+    blocked between items, so they must not come from the loop's default
+    executor, which sync_to_async views and the rest of the app share.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'STREAMING_THREADS', 32), thread_name_prefix='streaming'
+            )
+        return _executor
+
+
+async def _iterate_in_thread(iterator):
+    """Async iterator over a blocking one: each item is produced in a streaming thread"""
+    # A cancelled await leaves its next() running in the thread: close() waits for it
+    lock = threading.Lock()
+    loop = asyncio.get_running_loop()
+    executor = _streaming_executor()
+
+    def produce():
+        with lock:
+            return next(iterator, _DONE)
+
+    def close():
+        with lock:
+            getattr(iterator, 'close', lambda: None)()
+
+    try:
+        while True:
+            item = await loop.run_in_executor(executor, produce)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        # Client gone (the response is cancelled): run the generator's cleanup
+        await loop.run_in_executor(executor, close)
+
+
+def streaming_content(request, iterator):
+    """
+    Content for a StreamingHttpResponse that is sent as it is produced with
+    either server. Under ASGI Django buffers synchronous iterators whole
+    (endless for a live stream), so they are wrapped in an async iterator.
+    """
+    if isinstance(request, ASGIRequest):
+        return _iterate_in_thread(iter(iterator))
+    return iterator
@@ -121,6 +121,7 @@ class ContainerTemplateLoader:
             'labels': template.get('labels', {}),
             'description': template.get('description', ''),
             'command': template.get('command', ''),
+            'logging': template.get('logging', {}),
         }
 
     def get_template_raw(self, template_name):
@@ -0,0 +1,146 @@
+import time
+import threading
+from django.conf import settings
+
+
+class IOWaitMonitor:
+    """
+    Samples the host CPU iowait percentage with psutil (Linux only).
+    Samples are shared between threads and refreshed at most once per interval.
+    """
+
+    _lock = threading.Lock()
+    _last_sample = 0.0
+    _last_value = 0.0
+
+    @classmethod
+    def iowait(cls, interval=1.0):
+        now = time.monotonic()
+        with cls._lock:
+            if now - cls._last_sample >= interval:
+                try:
+                    import psutil
+                    cls._last_value = getattr(psutil.cpu_times_percent(interval=None), 'iowait', 0.0)
+                except Exception:
+                    cls._last_value = 0.0
+                cls._last_sample = now
+            return cls._last_value
+
+
+class TokenBucket:
+    """
+    Token bucket limiter: `rate` bytes per second with bursts up to `capacity`
+    bytes. consume() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount, rate_factor=1.0):
+        rate = self.rate * rate_factor
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+                self.updated = now
+                # Chunks larger than the bucket are let through once it is full
+                needed = min(amount, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return
+                wait = (needed - self.tokens) / rate
+            time.sleep(wait)
+
+
+class Throttle:
+    """
+    Throughput limiter for backup and restore streams.
+
+    Applies a token bucket when a bandwidth limit is configured and backs off
+    (halving the rate, or pausing when unlimited) while host iowait is above
+    BACKUP_IOWAIT_THRESHOLD, recovering gradually once it drops.
+    """
+
+    MIN_RATE_FACTOR = 1 / 16
+    PAUSE_SECONDS = 0.2
+
+    def __init__(self, limit_mb=0, iowait_threshold=0):
+        self.bucket = TokenBucket(limit_mb * 1024 * 1024) if limit_mb else None
+        self.iowait_threshold = iowait_threshold
+        self.rate_factor = 1.0
+        self.transferred = 0
+        self.started = time.monotonic()
+
+    @classmethod
+    def for_instance(cls, instance=None):
+        """Throttle with the instance limit, falling back to BACKUP_BANDWIDTH_LIMIT_MB"""
+        limit_mb = getattr(settings, 'BACKUP_BANDWIDTH_LIMIT_MB', 0)
+        if instance is not None and instance.backup_bandwidth_limit_mb is not None:
+            limit_mb = instance.backup_bandwidth_limit_mb
+        return cls(limit_mb=limit_mb, iowait_threshold=getattr(settings, 'BACKUP_IOWAIT_THRESHOLD', 0))
+
+    @property
+    def enabled(self):
+        return self.bucket is not None or self.iowait_threshold > 0
+
+    def _backoff(self):
+        if not self.iowait_threshold:
+            return
+        iowait = IOWaitMonitor.iowait()
+        if iowait > self.iowait_threshold:
+            if self.bucket is None:
+                time.sleep(self.PAUSE_SECONDS)
+            elif self.rate_factor > self.MIN_RATE_FACTOR:
+                self.rate_factor = max(self.rate_factor / 2, self.MIN_RATE_FACTOR)
+                print(f"Host iowait {iowait:.1f}% > {self.iowait_threshold}%, backup throughput reduced to {self.rate_factor:.0%}")
+        elif self.rate_factor < 1.0:
+            self.rate_factor = min(self.rate_factor * 2, 1.0)
+
+    def throttle(self, size):
+        """Blocks as needed before `size` bytes are transferred"""
+        self.transferred += size
+        if not self.enabled:
+            return
+        self._backoff()
+        if self.bucket is not None:
+            self.bucket.consume(size, self.rate_factor)
+
+    def iter(self, stream):
+        """Wraps an iterable of byte chunks (e.g. docker get_archive streams)"""
+        for chunk in stream:
+            self.throttle(len(chunk))
+            yield chunk
+
+    def read_file(self, path, chunk_size=1024 * 1024):
+        """Generator over a file, suitable as request body for docker put_archive"""
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                self.throttle(len(chunk))
+                yield chunk
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 0.001)
+        size_mb = self.transferred / (1024 * 1024)
+        return f"{size_mb:.2f} MB in {elapsed:.1f}s ({size_mb / elapsed:.2f} MB/s)"
+
+
+def low_priority(command):
+    """
+    Runs a command inside a container with lower CPU (nice) and IO (ionice)
+    priority so helper processes like pg_dump/pg_restore don't starve the
+    live instance. Falls back to nice only when ionice is not available.
+    The command must not contain single quotes.
+    """
+    nice = getattr(settings, 'BACKUP_NICE', 10)
+    ionice = getattr(settings, 'BACKUP_IONICE', '-c 2 -n 7')
+    if not nice and not ionice:
+        return command
+    return (
+        f"sh -c 'if command -v ionice >/dev/null 2>&1; "
+        f"then exec nice -n {nice} ionice {ionice} {command}; "
+        f"else exec nice -n {nice} {command}; fi'"
+    )
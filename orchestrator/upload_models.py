@@ -0,0 +1,57 @@
+import os
+import uuid
+from django.db import models
+from django.conf import settings
+from django.contrib.auth.models import User
+
+class UploadSession(models.Model):
+    """Resumable chunked upload used to restore backups and install modules"""
+
+    PURPOSE_CHOICES = [
+        ('restore', 'Restaurar backup'),
+        ('module', 'Instalar módulo'),
+    ]
+
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('assembling', 'Assembling'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    instance = models.ForeignKey('Instance', on_delete=models.CASCADE, related_name='upload_sessions')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField(help_text="Size of the whole file in bytes")
+    chunk_size = models.IntegerField(help_text="Size of every chunk except the last one")
+    total_chunks = models.IntegerField()
+    checksum_sha256 = models.CharField(max_length=64, blank=True, help_text="Expected SHA-256 of the whole file (optional)")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    error_message = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(help_text="Abandoned sessions are removed after this date")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.instance.name} - {self.filename} [{self.status}]"
+
+    @property
+    def upload_dir(self):
+        return os.path.join(settings.BASE_DIR, 'uploads', str(self.id))
+
+    def expected_chunk_size(self, index):
+        """Size of the chunk at index (the last chunk may be shorter)"""
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * (self.total_chunks - 1)
+        return self.chunk_size
@@ -0,0 +1,240 @@
+import os
+import math
+import shutil
+import hashlib
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .upload_models import UploadSession
+
+
+class UploadError(Exception):
+    """Raised when an upload session or chunk is invalid"""
+    pass
+
+
+class ChunkedUploadService:
+    """
+    Resumable chunked uploads.
+    Chunks are written to BASE_DIR/uploads/<session>/<index>.part once their
+    checksum has been verified, so the files on disk are the source of truth
+    for which chunks were received and chunks can be sent in parallel.
+    """
+
+    READ_SIZE = 64 * 1024
+    MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+    @staticmethod
+    def create_session(instance, purpose, filename, total_size, chunk_size=None, checksum='', user=None):
+        if purpose not in dict(UploadSession.PURPOSE_CHOICES):
+            raise UploadError(f"Tipo de subida inválido: {purpose}")
+        if not filename or not filename.lower().endswith('.zip'):
+            raise UploadError("El archivo debe ser un ZIP")
+
+        total_size = int(total_size)
+        if total_size <= 0:
+            raise UploadError("El tamaño del archivo debe ser mayor que 0")
+
+        chunk_size = int(chunk_size or getattr(settings, 'UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+        if chunk_size <= 0 or chunk_size > ChunkedUploadService.MAX_CHUNK_SIZE:
+            raise UploadError(f"Tamaño de chunk inválido (máximo {ChunkedUploadService.MAX_CHUNK_SIZE} bytes)")
+
+        # Opportunistic cleanup so abandoned uploads don't pile up on disk
+        ChunkedUploadService.cleanup_expired()
+
+        session = UploadSession.objects.create(
+            instance=instance,
+            purpose=purpose,
+            filename=os.path.basename(filename),
+            total_size=total_size,
+            chunk_size=chunk_size,
+            total_chunks=math.ceil(total_size / chunk_size),
+            checksum_sha256=(checksum or '').lower(),
+            created_by=user,
+            expires_at=ChunkedUploadService._next_expiry()
+        )
+        os.makedirs(session.upload_dir, exist_ok=True)
+        print(f"Upload session {session.pk} created: {session.filename} ({total_size} bytes, {session.total_chunks} chunks)")
+        return session
+
+    @staticmethod
+    def store_chunk(session, index, stream, checksum):
+        """
+        Streams a chunk to disk verifying its size and SHA-256.
+        Re-sending an already received chunk simply overwrites it.
+        """
+        if session.status != 'uploading':
+            raise UploadError(f"La sesión no acepta más datos (estado: {session.status})")
+        if index < 0 or index >= session.total_chunks:
+            raise UploadError(f"Índice de chunk fuera de rango: {index}")
+        if not checksum:
+            raise UploadError("Falta el checksum SHA-256 del chunk")
+
+        expected_size = session.expected_chunk_size(index)
+        os.makedirs(session.upload_dir, exist_ok=True)
+        part_path = os.path.join(session.upload_dir, f"{index}.part")
+        # Unique per request: a retry may arrive while the first attempt is still writing
+        fd, tmp_path = tempfile.mkstemp(dir=session.upload_dir, prefix=f"{index}.part.", suffix='.tmp')
+
+        digest = hashlib.sha256()
+        written = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    data = stream.read(ChunkedUploadService.READ_SIZE)
+                    if not data:
+                        break
+                    written += len(data)
+                    if written > expected_size:
+                        raise UploadError(f"El chunk {index} excede el tamaño esperado ({expected_size} bytes)")
+                    digest.update(data)
+                    f.write(data)
+
+            if written != expected_size:
+                raise UploadError(f"Chunk {index} incompleto: {written} de {expected_size} bytes")
+            if digest.hexdigest() != checksum.lower():
+                raise UploadError(f"Checksum inválido para el chunk {index}")
+
+            # Atomic rename: a chunk is only visible once it is complete and verified
+            os.replace(tmp_path, part_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        UploadSession.objects.filter(pk=session.pk).update(
+            updated_at=timezone.now(),
+            expires_at=ChunkedUploadService._next_expiry()
+        )
+        return written
+
+    @staticmethod
+    def received_chunks(session):
+        if not os.path.isdir(session.upload_dir):
+            return []
+        return sorted(
+            int(name[:-len('.part')])
+            for name in os.listdir(session.upload_dir)
+            if name.endswith('.part') and name[:-len('.part')].isdigit()
+        )
+
+    @staticmethod
+    def missing_chunks(session):
+        received = set(ChunkedUploadService.received_chunks(session))
+        return [index for index in range(session.total_chunks) if index not in received]
+
+    @staticmethod
+    def claim(session):
+        """
+        Atomically moves the session from 'uploading' to 'assembling', so a
+        double submit or a client retry cannot assemble or restore it twice.
+        The expiry is pushed back so cleanup leaves it alone while it runs.
+        Returns False when another request already claimed it.
+        """
+        claimed = UploadSession.objects.filter(pk=session.pk, status='uploading').update(
+            status='assembling',
+            updated_at=timezone.now(),
+            expires_at=ChunkedUploadService._next_expiry()
+        )
+        if claimed:
+            session.status = 'assembling'
+        return bool(claimed)
+
+    @staticmethod
+    def assemble(session):
+        """Concatenates all chunks of a claimed session into the final file and verifies the whole-file checksum"""
+        missing = ChunkedUploadService.missing_chunks(session)
+        if missing:
+            raise UploadError(f"Faltan {len(missing)} chunk(s): {missing[:10]}")
+
+        assembled_path = os.path.join(session.upload_dir, 'assembled.zip')
+        digest = hashlib.sha256()
+        with open(assembled_path, 'wb') as output:
+            for index in range(session.total_chunks):
+                part_path = os.path.join(session.upload_dir, f"{index}.part")
+                with open(part_path, 'rb') as part:
+                    for data in iter(lambda: part.read(1024 * 1024), b''):
+                        digest.update(data)
+                        output.write(data)
+                # Free disk space as we go
+                os.remove(part_path)
+
+        if session.checksum_sha256 and digest.hexdigest() != session.checksum_sha256:
+            os.remove(assembled_path)
+            raise UploadError("El checksum del archivo completo no coincide")
+
+        print(f"Upload session {session.pk} assembled at {assembled_path}")
+        return assembled_path
+
+    @staticmethod
+    def complete(session):
+        """
+        Assembles the file and hands it off to the restore pipeline or the module installer.
+        Returns tuple: (success: bool, message: str)
+        """
+        from .services import DockerService, OdooModuleService
+
+        missing = ChunkedUploadService.missing_chunks(session)
+        if missing:
+            # Not an error: the client can still resume the missing chunks
+            return False, f"Faltan {len(missing)} chunk(s) por subir: {missing[:10]}"
+
+        if not ChunkedUploadService.claim(session):
+            return False, 'La sesión ya se está procesando'
+
+        try:
+            assembled_path = ChunkedUploadService.assemble(session)
+
+            session.status = 'processing'
+            session.expires_at = ChunkedUploadService._next_expiry()
+            session.save(update_fields=['status', 'expires_at', 'updated_at'])
+
+            if session.purpose == 'restore':
+                DockerService().restore_instance(session.instance, assembled_path)
+                success, message = True, 'Respaldo restaurado exitosamente'
+            else:
+                success, message, module_name = OdooModuleService.install_module_from_path(session.instance, assembled_path)
+
+            session.status = 'completed' if success else 'failed'
+            session.error_message = '' if success else message
+            session.save(update_fields=['status', 'error_message', 'updated_at'])
+            return success, message
+
+        except Exception as e:
+            session.status = 'failed'
+            session.error_message = str(e)
+            session.save(update_fields=['status', 'error_message', 'updated_at'])
+            return False, str(e)
+        finally:
+            # Chunks are not reusable once assembly started
+            if session.status != 'uploading' and os.path.isdir(session.upload_dir):
+                shutil.rmtree(session.upload_dir, ignore_errors=True)
+
+    @staticmethod
+    def abort(session):
+        if os.path.isdir(session.upload_dir):
+            shutil.rmtree(session.upload_dir, ignore_errors=True)
+        session.delete()
+
+    @staticmethod
+    def cleanup_expired(now=None):
+        """
+        Removes expired sessions and their chunks. Sessions being assembled or
+        processed get a fresh expiry at each step, so once it has passed they
+        were left behind by a crashed worker and are reclaimed too.
+        Returns the number of sessions removed
+        """
+        now = now or timezone.now()
+        expired = list(UploadSession.objects.filter(expires_at__lt=now))
+        for session in expired:
+            if os.path.isdir(session.upload_dir):
+                shutil.rmtree(session.upload_dir, ignore_errors=True)
+        if expired:
+            UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+            print(f"Removed {len(expired)} expired upload session(s)")
+        return len(expired)
+
+    @staticmethod
+    def _next_expiry():
+        ttl_hours = getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24)
+        return timezone.now() + timedelta(hours=ttl_hours)
@@ -0,0 +1,108 @@
+import json
+from django.shortcuts import get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from .models import Instance
+from .upload_models import UploadSession
+from .upload_service import ChunkedUploadService, UploadError
+
+
+def _session_payload(session):
+    received = ChunkedUploadService.received_chunks(session)
+    return {
+        'id': str(session.pk),
+        'instance': session.instance_id,
+        'purpose': session.purpose,
+        'filename': session.filename,
+        'total_size': session.total_size,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'received_chunks': received,
+        'missing_chunks': ChunkedUploadService.missing_chunks(session),
+        'received_bytes': sum(session.expected_chunk_size(index) for index in received),
+        'status': session.status,
+        'error_message': session.error_message,
+        'expires_at': session.expires_at.isoformat(),
+    }
+
+
+@login_required
+def upload_session_create(request, pk):
+    """
+    Starts a resumable upload.
+    Body (JSON): purpose ('restore' | 'module'), filename, total_size, chunk_size (optional), sha256 (optional)
+    """
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        session = ChunkedUploadService.create_session(
+            instance,
+            purpose=data.get('purpose', ''),
+            filename=data.get('filename', ''),
+            total_size=data.get('total_size', 0),
+            chunk_size=data.get('chunk_size'),
+            checksum=data.get('sha256', ''),
+            user=request.user
+        )
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': f'Datos inválidos: {str(e)}'}, status=400)
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse(_session_payload(session), status=201)
+
+
+@login_required
+def upload_session_detail(request, upload_id):
+    """GET returns the session state (used to resume), DELETE aborts it"""
+    session = get_object_or_404(UploadSession, pk=upload_id)
+
+    if request.method == 'GET':
+        return JsonResponse(_session_payload(session))
+
+    if request.method == 'DELETE':
+        ChunkedUploadService.abort(session)
+        return JsonResponse({'success': True})
+
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+
+@login_required
+def upload_session_chunk(request, upload_id, index):
+    """
+    Receives one chunk as the raw request body.
+    The SHA-256 of the chunk must be sent in the X-Chunk-SHA256 header.
+    """
+    session = get_object_or_404(UploadSession, pk=upload_id)
+
+    if request.method not in ('PUT', 'POST'):
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        # The request is read as a stream so the chunk is never held in memory
+        size = ChunkedUploadService.store_chunk(session, index, request, request.headers.get('X-Chunk-SHA256', ''))
+    except UploadError as e:
+        return JsonResponse({'error': str(e), 'index': index}, status=400)
+
+    return JsonResponse({'success': True, 'index': index, 'size': size})
+
+
+@login_required
+def upload_session_complete(request, upload_id):
+    """Assembles the chunks and runs the restore or the module installation"""
+    session = get_object_or_404(UploadSession, pk=upload_id)
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    if session.status != 'uploading':
+        return JsonResponse({'error': f'La sesión ya fue procesada (estado: {session.status})'}, status=400)
+
+    success, message = ChunkedUploadService.complete(session)
+    payload = _session_payload(session)
+    payload.update({'success': success, 'message': message})
+    return JsonResponse(payload, status=200 if success else 400)
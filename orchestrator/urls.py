@@ -9,14 +9,17 @@ from .views import (
     instance_stop,
     instance_restart,
     instance_logs_api,
+    instance_logs_stream,
     instance_console_exec,
     instance_install_requirements,
+    instance_dependencies,
     instance_configure_domain,
     instance_generate_ssl,
     instance_install_module,
     instance_update_name,
     instance_delete,
     instance_duplicate,
+    instance_refresh,
     metrics_view,
     settings_view,
     run_auto_backups_view,
@@ -25,6 +28,7 @@ from .views import (
     instance_backup,
     instance_restore,
     instance_backups_list,
+    instance_backup_settings,
     backup_download,
     backup_delete,
     backup_restore_action,
@@ -51,6 +55,25 @@ from .container_views import (
     container_restart,
     container_delete
 )
+from .wal_views import (
+    instance_wal,
+    create_restore_point,
+    restore_to_point,
+    rollback_deploy,
+    restore_to_timestamp,
+    verify_restore_point,
+    cleanup_wal_files,
+    wal_restore_plan,
+    pitr_restore_status,
+    create_base_backup
+)
+from .log_views import log_search, log_search_api, log_policy, apply_log_policy
+from .upload_views import (
+    upload_session_create,
+    upload_session_detail,
+    upload_session_chunk,
+    upload_session_complete
+)
 
 router = DefaultRouter()
 router.register(r'api/instances', InstanceViewSet, basename='api-instance')
@@ -83,21 +106,43 @@ urlpatterns = [
     path('instance/<int:pk>/restart/', instance_restart, name='instance-restart'),
     path('instance/<int:pk>/delete/', instance_delete, name='instance-delete'),
     path('instance/<int:pk>/duplicate/', instance_duplicate, name='instance-duplicate'),
+    path('instance/<int:pk>/refresh/', instance_refresh, name='instance-refresh'),
     path('instance/<int:pk>/backup/', instance_backup, name='instance-backup'),
     path('instance/<int:pk>/backups/', instance_backups_list, name='instance-backups'),
+    path('instance/<int:pk>/backups/settings/', instance_backup_settings, name='instance-backup-settings'),
+    path('instance/<int:pk>/wal/', instance_wal, name='instance-wal'),
+    path('instance/<int:pk>/wal/restore-point/', create_restore_point, name='create-restore-point'),
+    path('instance/<int:pk>/wal/restore-to-point/', restore_to_point, name='restore-to-point'),
+    path('instance/<int:pk>/wal/rollback-deploy/', rollback_deploy, name='rollback-deploy'),
+    path('instance/<int:pk>/wal/restore-to-timestamp/', restore_to_timestamp, name='restore-to-timestamp'),
+    path('instance/<int:pk>/wal/cleanup/', cleanup_wal_files, name='cleanup-wal-files'),
+    path('instance/<int:pk>/wal/restore-plan/', wal_restore_plan, name='wal-restore-plan'),
+    path('instance/<int:pk>/wal/restore-status/', pitr_restore_status, name='pitr-restore-status'),
+    path('instance/<int:pk>/wal/base-backup/', create_base_backup, name='create-base-backup'),
+    path('restore-point/<int:pk>/verify/', verify_restore_point, name='verify-restore-point'),
     path('instance/<int:pk>/restore/', instance_restore, name='instance-restore'),
     path('backup/<int:backup_id>/download/', backup_download, name='backup-download'),
     path('backup/<int:backup_id>/delete/', backup_delete, name='backup-delete'),
     path('backup/<int:backup_id>/restore/', backup_restore_action, name='backup-restore-action'),
     path('backup/<int:backup_id>/create-instance/', backup_create_instance, name='backup-create-instance'),
     path('instance/<int:pk>/logs/', instance_logs_api, name='instance-logs-api'),
+    path('instance/<int:pk>/logs/stream/', instance_logs_stream, name='instance-logs-stream'),
     path('instance/<int:pk>/console/', instance_console_exec, name='instance-console-exec'),
     path('instance/<int:pk>/install-requirements/', instance_install_requirements, name='instance-install-requirements'),
+    path('instance/<int:pk>/dependencies/', instance_dependencies, name='instance-dependencies'),
     path('instance/<int:pk>/configure-domain/', instance_configure_domain, name='instance-configure-domain'),
     path('instance/<int:pk>/generate-ssl/', instance_generate_ssl, name='instance-generate-ssl'),
     path('instance/<int:pk>/install-module/', instance_install_module, name='instance-install-module'),
+    path('instance/<int:pk>/uploads/', upload_session_create, name='upload-session-create'),
+    path('uploads/<uuid:upload_id>/', upload_session_detail, name='upload-session-detail'),
+    path('uploads/<uuid:upload_id>/chunk/<int:index>/', upload_session_chunk, name='upload-session-chunk'),
+    path('uploads/<uuid:upload_id>/complete/', upload_session_complete, name='upload-session-complete'),
     path('instance/<int:pk>/update-name/', instance_update_name, name='instance-update-name'),
     path('metrics/', metrics_view, name='metrics'),
+    path('logs/', log_search, name='log-search'),
+    path('logs/search/', log_search_api, name='log-search-api'),
+    path('logs/policy/', log_policy, name='log-policy'),
+    path('logs/policy/apply/', apply_log_policy, name='apply-log-policy'),
     path('settings/', settings_view, name='settings'),
     path('settings/generate-ssl/', generate_ssl_certificate, name='generate-ssl'),
     path('settings/run-auto-backups/', run_auto_backups_view, name='run-auto-backups'),
@@ -13,6 +13,9 @@ from django.http import HttpResponseRedirect, JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils.cache import get_conditional_response
+from django.views.decorators.gzip import gzip_page
+import docker
 import os
 
 # API ViewSet
@@ -242,6 +245,14 @@ class InstanceDetailView(LoginRequiredMixin, DetailView):
         from .backup_models import Backup
         context['backups'] = Backup.objects.filter(instance=self.object).order_by('-created_at')
         
+        context['module_installations'] = self.object.module_installations.all()[:5]
+        
+        from .image_builder import image_tag
+        try:
+            context['odoo_image'] = image_tag(self.object)
+        except ValueError:
+            context['odoo_image'] = f"odoo:{self.object.odoo_version}"
+        
         return context
 
 @login_required
@@ -272,11 +283,77 @@ def instance_restart(request, pk):
     return HttpResponseRedirect(reverse_lazy('instance-detail', args=[pk]))
 
 @login_required
+@gzip_page
 def instance_logs_api(request, pk):
+    """
+    Log lines of the Odoo container. Without parameters the last `lines`
+    (default 200); with ?since=<cursor> only the lines after it. The response
+    carries the next cursor, and its ETag lets pollers get a 304 when
+    nothing new was logged.
+    """
     instance = get_object_or_404(Instance, pk=pk)
+    if not instance.container_id:
+        return JsonResponse({'logs': 'No container ID found.', 'lines': [], 'cursor': None})
+
+    since = request.GET.get('since') or None
+    try:
+        lines = min(int(request.GET.get('lines', 200)), 5000)
+    except ValueError:
+        lines = 200
+
     service = DockerService()
-    logs = service.get_logs(instance, lines=200)
-    return JsonResponse({'logs': logs})
+    try:
+        entries, cursor = service.get_logs_since(instance, since=since, lines=lines)
+    except docker.errors.NotFound:
+        return JsonResponse({'logs': 'Container not found.', 'lines': [], 'cursor': since}, status=404)
+    except ValueError:
+        return JsonResponse({'error': 'Cursor no válido'}, status=400)
+
+    # The body also depends on how many lines and whether timestamps were asked for
+    with_timestamps = request.GET.get('timestamps') == '1'
+    etag = f'"{cursor or "empty"}-{lines}-{int(with_timestamps)}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    texts = [f"{timestamp} {text}" if with_timestamps else text for timestamp, text in entries]
+    response = JsonResponse({
+        'logs': '\n'.join(texts),
+        'lines': texts,
+        'cursor': cursor,
+        'count': len(texts),
+    })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+@login_required
+def instance_logs_stream(request, pk):
+    """
+    Server-Sent Events stream of the Odoo container log: the recent lines,
+    then only new ones. All clients of a container share one Docker log reader.
+    """
+    from django.http import StreamingHttpResponse
+    from .log_stream import stream_logs
+    from .streaming import streaming_content
+
+    instance = get_object_or_404(Instance, pk=pk)
+    if not instance.container_id:
+        return JsonResponse({'error': 'No container ID found.'}, status=404)
+    try:
+        import docker
+        docker.from_env().containers.get(instance.container_id)
+    except Exception:
+        return JsonResponse({'error': 'Container not found.'}, status=404)
+
+    response = StreamingHttpResponse(
+        streaming_content(request, stream_logs(instance.container_id, last_event_id=request.headers.get('Last-Event-ID'))),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Disable response buffering in nginx/traefik-style proxies
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 def instance_console_exec(request, pk):
@@ -302,61 +379,73 @@ def instance_console_exec(request, pk):
 
 @login_required
 def instance_install_requirements(request, pk):
-    """Install Python packages from requirements.txt file"""
+    """
+    Installs an uploaded requirements.txt with a single pip run. The response
+    streams one JSON object per line: pip output as it happens, then the
+    result with per-package timings and cache hits. Installed requirements
+    are added to the instance so they persist across redeploys.
+    """
+    import json
+    from django.http import StreamingHttpResponse
+    from .requirements_service import RequirementsInstaller
+    from .streaming import streaming_content
+
     instance = get_object_or_404(Instance, pk=pk)
-    
-    if request.method == 'POST':
-        requirements_file = request.FILES.get('requirements')
-        
-        if not requirements_file:
-            return JsonResponse({'error': 'No requirements file provided'}, status=400)
-        
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    requirements_file = request.FILES.get('requirements')
+    if not requirements_file:
+        return JsonResponse({'error': 'No requirements file provided'}, status=400)
+    if not instance.container_id:
+        return JsonResponse({'error': 'No container ID found.'}, status=400)
+
+    try:
+        content = requirements_file.read().decode('utf-8')
+    except UnicodeDecodeError:
+        return JsonResponse({'error': 'El archivo no es texto UTF-8'}, status=400)
+    if not RequirementsInstaller.requirements(content):
+        return JsonResponse({'error': 'No packages found in requirements file'}, status=400)
+
+    def events():
         try:
-            # Read file content
-            content = requirements_file.read().decode('utf-8')
-            lines = content.strip().split('\n')
-            
-            # Filter out empty lines and comments
-            packages = [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
-            
-            if not packages:
-                return JsonResponse({'error': 'No packages found in requirements file'}, status=400)
-            
-            # Install packages one by one and collect output
-            service = DockerService()
-            outputs = []
-            
-            outputs.append(f"📦 Instalando {len(packages)} paquete(s)...\n")
-            
-            for package in packages:
-                outputs.append(f"\n→ Instalando {package}...")
-                
-                # Try pip3 first, then pip
-                for pip_cmd in ['pip3', 'pip']:
-                    command = f"{pip_cmd} install {package}"
-                    output = service.execute_command(instance, command)
-                    
-                    if '[Exit Code:' not in output or 'Exit Code: 0' in output:
-                        outputs.append(f"  ✓ {package} instalado correctamente")
-                        break
-                else:
-                    outputs.append(f"  ✗ Error instalando {package}")
-                    outputs.append(f"  {output[:200]}")
-            
-            outputs.append("\n✓ Proceso de instalación completado")
-            
-            return JsonResponse({
-                'success': True, 
-                'output': '\n'.join(outputs)
-            })
-            
+            for event in RequirementsInstaller().install(instance, content):
+                if event['type'] == 'result' and event['success']:
+                    # Kept on the instance so the next redeploy bakes them into its image
+                    from .image_builder import merge_requirements
+                    instance.python_requirements = merge_requirements(instance.python_requirements, content)
+                    instance.save(update_fields=['python_requirements'])
+                    event['saved'] = True
+                yield json.dumps(event) + '\n'
         except Exception as e:
-            return JsonResponse({
-                'success': False, 
-                'error': f'Error procesando requirements: {str(e)}'
-            })
-    
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
+            yield json.dumps({'type': 'result', 'success': False, 'error': f'Error procesando requirements: {str(e)}'}) + '\n'
+
+    response = StreamingHttpResponse(streaming_content(request, events()), content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def instance_dependencies(request, pk):
+    """Update the Python requirements and system packages baked into the image of an instance"""
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method == 'POST':
+        from .image_builder import parse_requirements, parse_system_packages, image_tag
+
+        try:
+            system_packages = parse_system_packages(request.POST.get('system_packages', ''))
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('instance-detail', pk=pk)
+
+        instance.python_requirements = '\n'.join(parse_requirements(request.POST.get('python_requirements', '')))
+        instance.system_packages = ' '.join(system_packages)
+        instance.save(update_fields=['python_requirements', 'system_packages'])
+        messages.success(request, f'Dependencias guardadas. Se aplicarán al volver a desplegar (imagen {image_tag(instance)})')
+
+    return redirect('instance-detail', pk=pk)
 
 @login_required
 def instance_configure_domain(request, pk):
@@ -484,9 +573,7 @@ def instance_install_module(request, pk):
         try:
             from .services import OdooModuleService
             
-            messages.info(request, 'Procesando módulo... Se agregará al repositorio y se desplegará. Esto puede tomar varios minutos.')
-            
-            # Install module from uploaded ZIP (adds to GitHub repo and deploys)
+            # Install module from uploaded ZIP (adds to GitHub repo and installs/upgrades only that module)
             success, message, module_name = OdooModuleService.install_module_from_zip(
                 instance, 
                 module_file
@@ -522,29 +609,37 @@ def instance_delete(request, pk):
 def instance_duplicate(request, pk):
     instance = get_object_or_404(Instance, pk=pk)
     
+    from .clone_profiles import list_clone_profiles
+    context = {'instance': instance, 'clone_profiles': list_clone_profiles()}
+    
     if request.method == 'GET':
         # Show the duplication form
-        return render(request, 'orchestrator/instance_duplicate.html', {'instance': instance})
+        return render(request, 'orchestrator/instance_duplicate.html', context)
     
     elif request.method == 'POST':
         # Process the duplication
         new_name = request.POST.get('new_name', '').strip()
+        profile = request.POST.get('profile', 'full')
         
         if not new_name:
             from django.contrib import messages
             messages.error(request, 'Debes proporcionar un nombre para la nueva instancia')
-            return render(request, 'orchestrator/instance_duplicate.html', {'instance': instance})
+            return render(request, 'orchestrator/instance_duplicate.html', context)
         
         # Check if name already exists
-        if Instance.objects.filter(name=new_name).exists():
+        existing = Instance.objects.filter(name=new_name).first()
+        if existing:
             from django.contrib import messages
-            messages.error(request, f'Ya existe una instancia con el nombre "{new_name}"')
-            return render(request, 'orchestrator/instance_duplicate.html', {'instance': instance})
+            if existing.source_instance_id == instance.pk:
+                messages.error(request, f'"{new_name}" ya es un duplicado de esta instancia. Usa "Refresh" en esa instancia para re-sincronizarla')
+            else:
+                messages.error(request, f'Ya existe una instancia con el nombre "{new_name}"')
+            return render(request, 'orchestrator/instance_duplicate.html', context)
         
         # Perform the duplication
         service = DockerService()
         try:
-            new_instance = service.copy_instance(instance, new_name)
+            new_instance = service.copy_instance(instance, new_name, profile=profile)
             
             # Send email notification
             from .email_notifications import send_instance_notification
@@ -556,7 +651,28 @@ def instance_duplicate(request, pk):
         except Exception as e:
             from django.contrib import messages
             messages.error(request, f'Error al duplicar instancia: {str(e)}')
-            return render(request, 'orchestrator/instance_duplicate.html', {'instance': instance})
+            return render(request, 'orchestrator/instance_duplicate.html', context)
+    
+    return redirect('instance-detail', pk=pk)
+
+@login_required
+def instance_refresh(request, pk):
+    """Re-sync a duplicate (database and filestore) from its source instance"""
+    instance = get_object_or_404(Instance, pk=pk)
+    
+    if request.method == 'POST':
+        from django.contrib import messages
+        if not instance.source_instance:
+            messages.error(request, 'Esta instancia no es un duplicado de otra instancia')
+            return redirect('instance-detail', pk=pk)
+        
+        neutralize = request.POST.get('neutralize') == 'on'
+        try:
+            service = DockerService()
+            service.refresh_instance(instance, neutralize=neutralize)
+            messages.success(request, f'Instancia re-sincronizada desde "{instance.source_instance.name}"')
+        except Exception as e:
+            messages.error(request, f'Error al re-sincronizar la instancia: {str(e)}')
     
     return redirect('instance-detail', pk=pk)
 
@@ -598,6 +714,16 @@ def metrics_view(request):
     instances_stopped = next((item['count'] for item in status_counts if item['status'] == 'stopped'), 0)
     instances_error = next((item['count'] for item in status_counts if item['status'] == 'error'), 0)
     
+    # WAL archive storage (raw vs compressed)
+    from .wal_models import WALArchive
+    from .wal_archiving import storage_stats
+    wal_storage = storage_stats(WALArchive.objects.all())
+    
+    # WAL archiver status of the running instances (batched, cached)
+    from .wal_stats import WALStatsChannel
+    wal_statuses = WALStatsChannel(client).collect(Instance.objects.filter(status='running'))
+    wal_reporting = [status for status in wal_statuses.values() if status['status'] == 'healthy']
+    
     context = {
         'metrics': {
             'cpu_percent': cpu_percent,
@@ -617,6 +743,14 @@ def metrics_view(request):
             'instances_deploying': instances_deploying,
             'instances_stopped': instances_stopped,
             'instances_error': instances_error,
+            'wal_files': wal_storage['count'],
+            'wal_raw_mb': wal_storage['raw_mb'],
+            'wal_stored_mb': wal_storage['stored_mb'],
+            'wal_saved_percent': wal_storage['saved_percent'],
+            'wal_ratio': wal_storage['ratio'],
+            'wal_instances_reporting': len(wal_reporting),
+            'wal_instances_failing': len([status for status in wal_reporting if status['archiving_failing']]),
+            'wal_instances_unreachable': len(wal_statuses) - len(wal_reporting),
         }
     }
     
@@ -648,6 +782,10 @@ def settings_view(request):
         config.auto_backup_frequency_unit = request.POST.get('auto_backup_frequency_unit', 'day')
         config.auto_backup_frequency_value = int(request.POST.get('auto_backup_frequency_value', 5))
         config.auto_backup_retention = int(request.POST.get('auto_backup_retention', 5))
+        config.auto_backup_keep_hourly = int(request.POST.get('auto_backup_keep_hourly', 0) or 0)
+        config.auto_backup_keep_daily = int(request.POST.get('auto_backup_keep_daily', 0) or 0)
+        config.auto_backup_keep_weekly = int(request.POST.get('auto_backup_keep_weekly', 0) or 0)
+        config.auto_backup_keep_monthly = int(request.POST.get('auto_backup_keep_monthly', 0) or 0)
         
         # Update domain and SSL configuration
         config.main_domain = request.POST.get('main_domain', '')
@@ -668,7 +806,6 @@ def run_auto_backups_view(request):
     from django.contrib import messages
     from .config_models import GitHubConfig
     from .services import DockerService
-    from .backup_models import Backup
     import traceback
     
     try:
@@ -698,24 +835,13 @@ def run_auto_backups_view(request):
                 success_count += 1
                 print(f"Backup created for {instance.name}: {backup_record.filename}")
                 
-                # Clean old backups based on retention policy (per instance)
-                retention = config.auto_backup_retention if config.auto_backup_retention else 5
-                instance_backups = Backup.objects.filter(instance=instance).order_by('-created_at')
-                
-                print(f"Instance {instance.name} has {instance_backups.count()} backups, retention limit: {retention}")
-                
-                if instance_backups.count() > retention:
-                    old_backups = instance_backups[retention:]
-                    for old_backup in old_backups:
-                        try:
-                            import os
-                            if os.path.exists(old_backup.file_path):
-                                os.remove(old_backup.file_path)
-                                print(f"Deleted old backup file: {old_backup.file_path}")
-                            old_backup.delete()
-                            print(f"Deleted old backup record: {old_backup.filename}")
-                        except Exception as e:
-                            print(f"Error deleting old backup {old_backup.filename}: {str(e)}")
+                # Clean old backups based on the retention policy (per instance)
+                from .retention_service import RetentionService
+                try:
+                    plan = RetentionService.prune(instance, config=config)
+                    print(f"Instance {instance.name}: kept {len(plan['keep'])} backups, pruned {len(plan['prune'])}")
+                except Exception as e:
+                    print(f"Error pruning old backups of {instance.name}: {str(e)}")
                 
             except Exception as e:
                 error_count += 1
@@ -879,26 +1005,69 @@ def instance_restore(request, pk):
 def instance_backups_list(request, pk):
     instance = get_object_or_404(Instance, pk=pk)
     from .backup_models import Backup
+    from .backup_profiles import get_backup_profiles
     backups = Backup.objects.filter(instance=instance)
     return render(request, 'orchestrator/instance_backups.html', {
         'instance': instance,
-        'backups': backups
+        'backups': backups,
+        'backup_profiles': [{'key': key, **profile} for key, profile in get_backup_profiles().items()]
     })
 
+@login_required
+def instance_backup_settings(request, pk):
+    """Update the backup profile, extra excluded tables and filestore size cap of an instance"""
+    instance = get_object_or_404(Instance, pk=pk)
+    
+    if request.method == 'POST':
+        from django.contrib import messages
+        from .backup_profiles import get_backup_profiles, parse_table_list
+        
+        profile = request.POST.get('backup_profile', 'full')
+        if profile not in get_backup_profiles():
+            messages.error(request, f'Perfil de backup desconocido: {profile}')
+            return redirect('instance-backups', pk=pk)
+        
+        max_mb = request.POST.get('backup_filestore_max_mb', '').strip()
+        try:
+            instance.backup_filestore_max_mb = float(max_mb) if max_mb else None
+        except ValueError:
+            messages.error(request, 'El tamaño máximo de archivo debe ser un número')
+            return redirect('instance-backups', pk=pk)
+        
+        instance.backup_profile = profile
+        instance.backup_exclude_tables = ', '.join(parse_table_list(request.POST.get('backup_exclude_tables', '')))
+        instance.save(update_fields=['backup_profile', 'backup_exclude_tables', 'backup_filestore_max_mb'])
+        messages.success(request, 'Configuración de backups actualizada')
+    
+    return redirect('instance-backups', pk=pk)
+
 @login_required
 def backup_download(request, backup_id):
     from .backup_models import Backup
     backup = get_object_or_404(Backup, pk=backup_id)
     
-    if not os.path.exists(backup.file_path):
+    if not backup.is_local:
+        # Archive moved to object storage: let the client download it directly from there
+        from .storage_backends import BackupStorageService
+        try:
+            url = BackupStorageService.download_url(backup)
+        except Exception as e:
+            url = None
+            print(f"Error generating download URL for {backup.filename}: {str(e)}")
+        if url:
+            return redirect(url)
+        
         from django.contrib import messages
         messages.error(request, 'El archivo de respaldo no existe')
         return redirect('instance-backups', pk=backup.instance.pk)
     
-    from django.http import FileResponse
-    response = FileResponse(open(backup.file_path, 'rb'), as_attachment=True)
-    response['Content-Disposition'] = f'attachment; filename="{backup.filename}"'
-    return response
+    # Range/ETag aware response so interrupted downloads can be resumed
+    from .download_service import DownloadService
+    if not backup.checksum_sha256:
+        # Older backups: hashed in the background, served without checksum headers meanwhile
+        DownloadService.schedule_backup_checksum(backup)
+    
+    return DownloadService.serve_file(request, backup.file_path, backup.filename, sha256=backup.checksum_sha256)
 
 @login_required
 def backup_delete(request, backup_id):
@@ -907,9 +1076,14 @@ def backup_delete(request, backup_id):
     instance_pk = backup.instance.pk
     
     if request.method == 'POST':
-        # Delete the file
-        if os.path.exists(backup.file_path):
-            os.remove(backup.file_path)
+        # Delete the archive (hot disk and remote storage)
+        from .storage_backends import BackupStorageService
+        try:
+            BackupStorageService.delete(backup)
+        except Exception as e:
+            from django.contrib import messages
+            messages.error(request, f'Error eliminando el archivo de respaldo: {str(e)}')
+            return redirect('instance-backups', pk=instance_pk)
         
         # Delete the record
         backup.delete()
@@ -927,8 +1101,9 @@ def backup_restore_action(request, backup_id):
     
     if request.method == 'POST':
         try:
+            from .storage_backends import BackupStorageService
             service = DockerService()
-            service.restore_instance(instance, backup.file_path)
+            service.restore_instance(instance, BackupStorageService.local_path(backup))
             
             from django.contrib import messages
             messages.success(request, f'Respaldo restaurado exitosamente desde {backup.filename}')
@@ -945,10 +1120,13 @@ def backup_create_instance(request, backup_id):
     import zipfile
     import json
     
+    from .clone_profiles import list_clone_profiles
+    
     backup = get_object_or_404(Backup, pk=backup_id)
     
     if request.method == 'POST':
         new_name = request.POST.get('name', '')
+        profile = request.POST.get('profile', 'full')
         
         if not new_name:
             from django.contrib import messages
@@ -962,8 +1140,12 @@ def backup_create_instance(request, backup_id):
             return redirect('instance-backups', pk=backup.instance.pk)
         
         try:
+            # Fetch the archive from remote storage if it is no longer on the hot disk
+            from .storage_backends import BackupStorageService
+            backup_path = BackupStorageService.local_path(backup)
+            
             # Read metadata from backup
-            with zipfile.ZipFile(backup.file_path, 'r') as zipf:
+            with zipfile.ZipFile(backup_path, 'r') as zipf:
                 metadata_content = zipf.read('metadata.json')
                 metadata = json.loads(metadata_content)
             
@@ -987,10 +1169,13 @@ def backup_create_instance(request, backup_id):
                 odoo_version=metadata.get('odoo_version', backup.instance.odoo_version),
                 github_repo=metadata.get('github_repo', backup.instance.github_repo),
                 github_branch=metadata.get('github_branch', backup.instance.github_branch),
+                python_requirements=metadata.get('python_requirements', ''),
+                system_packages=metadata.get('system_packages', ''),
                 database_name=original_db_name,
                 port=port,
                 status='deploying',
-                origin='backup'
+                origin='backup',
+                clone_profile=profile
             )
             
             from django.contrib import messages
@@ -1104,7 +1289,7 @@ def backup_create_instance(request, backup_id):
             
             # Restore the backup to the new instance
             print(f"Restoring backup {backup.filename} to instance {new_name}...")
-            service.restore_instance(new_instance, backup.file_path)
+            service.restore_instance(new_instance, backup_path, profile=profile)
             
             # Update instance status
             new_instance.status = 'running'
@@ -1139,7 +1324,8 @@ def backup_create_instance(request, backup_id):
     return render(request, 'orchestrator/backup_create_instance.html', {
         'backup': backup,
         'source_instance': backup.instance,
-        'suggested_name': suggested_name
+        'suggested_name': suggested_name,
+        'clone_profiles': list_clone_profiles()
     })
 
 # User Management Views
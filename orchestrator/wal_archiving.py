@@ -0,0 +1,140 @@
+import os
+from django.conf import settings
+
+
+# Mount point of the host WAL archive directory inside the database container
+WAL_ARCHIVE_MOUNT = '/wal-archive'
+
+# Suffix written by the archive_command for each compression
+COMPRESSION_SUFFIXES = {
+    'zstd': '.zst',
+    'gzip': '.gz',
+}
+
+
+def split_compression(file_name):
+    """'000000010000000000000003.gz' -> ('000000010000000000000003', 'gzip')"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if file_name.endswith(suffix):
+            return file_name[:-len(suffix)], compression
+    return file_name, ''
+
+
+def read_archived_file(path, compression):
+    """Contents of an archived file, decompressed (used for the small .history files)"""
+    if compression == 'gzip':
+        import gzip
+        with gzip.open(path, 'rb') as f:
+            return f.read()
+    if compression == 'zstd':
+        import subprocess
+        return subprocess.run(['zstd', '-dcq', path], check=True, capture_output=True).stdout
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def archive_command(compression=None):
+    """
+    archive_command for postgresql.conf.
+
+    Segments are written to a temporary name and renamed so the WAL scanner
+    never ingests a half-written file. A segment that is already archived
+    counts as success (PostgreSQL retries segments whose archiving it could
+    not confirm) and is never overwritten.
+    With 'zstd' the command falls back to gzip when the image has no zstd
+    binary (the official postgres images only ship gzip).
+    No single quotes: the value ends up inside a quoted setting.
+    """
+    compression = compression if compression is not None else getattr(settings, 'WAL_COMPRESSION', 'gzip')
+    target = f"{WAL_ARCHIVE_MOUNT}/%f"
+    level = getattr(settings, 'WAL_COMPRESSION_LEVEL', 0)
+    gzip_level = f" -{min(level, 9)}" if level else ''
+    gzip = f"gzip{gzip_level} -c %p > {target}.gz.tmp && mv {target}.gz.tmp {target}.gz"
+
+    if compression == 'zstd':
+        zstd_level = f" -{level}" if level else ''
+        zstd = f"zstd -q{zstd_level} -c %p > {target}.zst.tmp && mv {target}.zst.tmp {target}.zst"
+        return (
+            f"test -f {target}.zst || test -f {target}.gz || "
+            f"if command -v zstd >/dev/null 2>&1; then {zstd}; else {gzip}; fi"
+        )
+    if compression == 'gzip':
+        return f"test -f {target}.gz || {{ {gzip}; }}"
+    return f"test -f {target} || {{ cp %p {target}.tmp && mv {target}.tmp {target}; }}"
+
+
+def restore_command():
+    """
+    restore_command matching archive_command: decompresses whatever format the
+    segment was archived with, so archives made before a compression change
+    still replay.
+    """
+    source = f"{WAL_ARCHIVE_MOUNT}/%f"
+    return (
+        f"if [ -f {source}.zst ]; then zstd -q -d -c {source}.zst > %p; "
+        f"elif [ -f {source}.gz ]; then gzip -d -c {source}.gz > %p; "
+        f"else cp {source} %p; fi"
+    )
+
+
+def host_path(local_path):
+    """Docker-in-Docker: the daemon needs host paths (same rule as the Odoo volumes)"""
+    host_workdir = os.environ.get('HOST_WORKDIR')
+    if not host_workdir:
+        return local_path
+    return local_path.replace(str(settings.BASE_DIR), host_workdir)
+
+
+def archive_dir(instance):
+    return os.path.join(settings.BASE_DIR, 'backups', 'wal', instance.name)
+
+
+def postgres_command():
+    """Server arguments for the database container when WAL archiving is enabled"""
+    return [
+        'postgres',
+        '-c', 'wal_level=replica',
+        '-c', 'archive_mode=on',
+        '-c', f"archive_command={archive_command()}",
+        '-c', f"archive_timeout={getattr(settings, 'WAL_ARCHIVE_TIMEOUT', 60)}",
+    ]
+
+
+def db_container_options(instance):
+    """
+    Extra docker run kwargs (command, volumes) for an instance database
+    container. Empty when WAL_ARCHIVING_ENABLED is off.
+    """
+    if not getattr(settings, 'WAL_ARCHIVING_ENABLED', False):
+        return {}
+
+    path = archive_dir(instance)
+    os.makedirs(path, exist_ok=True)
+    # The postgres user of the image (uid 999) writes here
+    os.chmod(path, 0o777)
+    return {
+        'command': postgres_command(),
+        'volumes': {host_path(path): {'bind': WAL_ARCHIVE_MOUNT, 'mode': 'rw'}},
+    }
+
+
+def storage_stats(archives):
+    """Raw vs on-disk size of a WALArchive queryset (one aggregate query)"""
+    from django.db.models import Count, Sum
+    from django.db.models.functions import Coalesce
+
+    totals = archives.aggregate(
+        count=Count('id'),
+        raw=Sum('file_size'),
+        stored=Sum(Coalesce('compressed_size', 'file_size')),
+    )
+    raw = totals['raw'] or 0
+    stored = totals['stored'] or 0
+    return {
+        'count': totals['count'],
+        'raw_mb': round(raw / (1024 * 1024), 2),
+        'stored_mb': round(stored / (1024 * 1024), 2),
+        'saved_mb': round((raw - stored) / (1024 * 1024), 2),
+        'saved_percent': round((1 - stored / raw) * 100, 1) if raw else 0,
+        'ratio': round(raw / stored, 1) if stored else None,
+    }
@@ -0,0 +1,405 @@
+import os
+import io
+import re
+import time
+import tarfile
+import docker
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .throttle import Throttle, low_priority
+from .wal_scanner import parse_lsn
+
+
+class BaseBackupError(Exception):
+    """Raised when a base backup cannot be taken or a restore cannot be planned"""
+    pass
+
+
+class BaseBackupService:
+    """
+    Catalogue of physical base backups (pg_basebackup) for point-in-time
+    recovery. A restore starts from the newest base backup taken before the
+    target and replays only the archived WAL between that backup and the
+    target, instead of the whole archive.
+    """
+
+    PG_ENV = {"PGPASSWORD": "odoo"}
+    DATA_DIR = '/var/lib/postgresql/data'
+    BASE_MOUNT = '/base-backups'
+
+    # pg_basebackup -v progress lines
+    START_RE = re.compile(r'(?:write-ahead log|checkpoint|transaction log) start point: ([0-9A-F]+/[0-9A-F]+) on timeline (\d+)', re.I)
+    END_RE = re.compile(r'(?:write-ahead log|transaction log) end point: ([0-9A-F]+/[0-9A-F]+)', re.I)
+    # Timeline .history lines: parent timeline, switch point and reason
+    HISTORY_LINE_RE = re.compile(r'^\s*(\d+)\s+([0-9A-F]+/[0-9A-F]+)', re.I)
+
+    def __init__(self, client=None):
+        self.client = client or docker.from_env()
+        self.api = self.client.api
+
+    @staticmethod
+    def backup_dir(instance):
+        return os.path.join(settings.BASE_DIR, 'backups', 'basebackups', instance.name)
+
+    def create(self, instance, user=None):
+        """
+        Streams `pg_basebackup -Ft -z -D -` from the database container to a
+        file on the host (throttled like regular backups). -X fetch includes
+        the WAL needed to make the copy consistent on its own.
+        Returns the WALBaseBackup record.
+        """
+        from .wal_models import WALBaseBackup
+
+        db_container = self.client.containers.get(f"db_{instance.name}")
+        label = f"{instance.name}_{timezone.now():%Y%m%d_%H%M%S}"
+        os.makedirs(self.backup_dir(instance), exist_ok=True)
+        file_path = os.path.join(self.backup_dir(instance), f"{label}.tar.gz")
+
+        base_backup = WALBaseBackup.objects.create(
+            instance=instance, label=label, file_path=file_path, created_by=user
+        )
+        throttle = Throttle.for_instance(instance)
+        started = time.monotonic()
+        stderr = []
+        print(f"Taking base backup {label}...")
+
+        try:
+            exec_id = self.api.exec_create(
+                db_container.id,
+                low_priority(f"pg_basebackup -U odoo -D - -Ft -z -X fetch --checkpoint=fast -v -l {label}"),
+                environment=self.PG_ENV
+            )['Id']
+            with open(file_path, 'wb') as f:
+                for stdout, err in self.api.exec_start(exec_id, stream=True, demux=True):
+                    if err:
+                        stderr.append(err)
+                    if stdout:
+                        throttle.throttle(len(stdout))
+                        f.write(stdout)
+
+            output = b''.join(stderr).decode('utf-8', 'replace')
+            exit_code = self.api.exec_inspect(exec_id).get('ExitCode')
+            if exit_code:
+                raise BaseBackupError(f"pg_basebackup falló: {output[-1000:]}")
+
+            start = self.START_RE.search(output)
+            end = self.END_RE.search(output)
+            base_backup.start_lsn = start.group(1) if start else ''
+            base_backup.timeline_id = int(start.group(2)) if start else 1
+            base_backup.end_lsn = end.group(1) if end else ''
+            base_backup.file_size = os.path.getsize(file_path)
+            base_backup.status = 'completed'
+            base_backup.completed_at = timezone.now()
+            base_backup.duration_seconds = time.monotonic() - started
+            base_backup.save()
+            print(
+                f"Base backup {label} completed: {base_backup.file_size_mb} MB in {base_backup.duration_seconds:.1f}s "
+                f"(WAL {base_backup.start_lsn} - {base_backup.end_lsn}, timeline {base_backup.timeline_id})"
+            )
+            return base_backup
+
+        except Exception as e:
+            base_backup.status = 'failed'
+            base_backup.error_message = str(e)
+            base_backup.completed_at = timezone.now()
+            base_backup.save()
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            print(f"Error taking base backup of {instance.name}: {str(e)}")
+            raise
+
+    @staticmethod
+    def is_due(instance, now=None):
+        """True when the newest completed base backup is older than WAL_BASE_BACKUP_INTERVAL_HOURS"""
+        from .wal_models import WALBaseBackup
+
+        interval = getattr(settings, 'WAL_BASE_BACKUP_INTERVAL_HOURS', 24)
+        if not interval:
+            return False
+        now = now or timezone.now()
+        latest = WALBaseBackup.objects.filter(instance=instance, status='completed').order_by('-completed_at').first()
+        return latest is None or latest.completed_at <= now - timedelta(hours=interval)
+
+    @classmethod
+    def timeline_history(cls, instance):
+        """
+        {timeline: [(parent timeline, switch LSN), ...]} read from the archived
+        .history files. Each file lists all the ancestors of its timeline,
+        oldest first, with the LSN where the next timeline branched off.
+        """
+        from .wal_models import WALArchive
+        from .wal_archiving import read_archived_file
+
+        histories = {}
+        for archive in WALArchive.objects.filter(instance=instance, file_type='history'):
+            try:
+                content = read_archived_file(archive.file_path, archive.compression).decode('utf-8', 'replace')
+            except Exception as e:
+                print(f"Error reading timeline history {archive.wal_file_name}: {str(e)}")
+                continue
+            matches = (cls.HISTORY_LINE_RE.match(line) for line in content.splitlines())
+            histories[archive.timeline_id] = [(int(m.group(1)), parse_lsn(m.group(2))) for m in matches if m]
+        return histories
+
+    @staticmethod
+    def timeline_path(base_backup, target_timeline, histories):
+        """
+        Timelines recovery walks from the base backup to target_timeline, as
+        [(timeline, begin LSN, switch LSN)] (None at the open ends). Returns
+        None when the target does not descend from the backup timeline or
+        branched off it before the backup was taken.
+        """
+        if target_timeline == base_backup.timeline_id:
+            return [(target_timeline, None, None)]
+        ancestors = histories.get(target_timeline)
+        timelines = [timeline for timeline, _ in ancestors or []]
+        if base_backup.timeline_id not in timelines:
+            return None
+        ancestors = ancestors[timelines.index(base_backup.timeline_id):]
+        if ancestors[0][1] < parse_lsn(base_backup.start_lsn):
+            return None
+        path = []
+        begin = None
+        for timeline, switch_lsn in ancestors:
+            path.append((timeline, begin, switch_lsn))
+            begin = switch_lsn
+        path.append((target_timeline, begin, None))
+        return path
+
+    @classmethod
+    def latest_timeline(cls, base_backup, histories):
+        """Newest timeline descending from the base backup (what recovery_target_timeline = 'latest' follows)"""
+        return max(
+            [base_backup.timeline_id]
+            + [timeline for timeline in histories if cls.timeline_path(base_backup, timeline, histories)]
+        )
+
+    @classmethod
+    def base_backup_for(cls, instance, target_time, target_lsn=None, target_timeline=None, histories=None):
+        """
+        Newest completed base backup a restore to target_time (and target_lsn)
+        can start from. With target_timeline, only backups on that timeline or
+        one of its ancestors (before the branch point) qualify.
+        """
+        from .wal_models import WALBaseBackup
+
+        candidates = WALBaseBackup.objects.filter(
+            instance=instance, status='completed', completed_at__lte=target_time
+        ).exclude(start_lsn='').order_by('-completed_at')
+        for candidate in candidates:
+            if target_timeline is not None and cls.timeline_path(candidate, target_timeline, histories or {}) is None:
+                continue
+            # A restore point must lie after the end of the backup (on the same timeline LSNs are comparable)
+            if target_lsn is None or not candidate.end_lsn or parse_lsn(candidate.end_lsn) <= target_lsn:
+                return candidate
+        return None
+
+    @classmethod
+    def pinned_ids(cls, instance):
+        """
+        Base backups still needed by restore points younger than
+        WAL_RESTORE_POINT_KEEP_DAYS (each point replays from the base backup before it)
+        """
+        from .wal_models import WALRestorePoint
+
+        keep_days = getattr(settings, 'WAL_RESTORE_POINT_KEEP_DAYS', 30)
+        restore_points = WALRestorePoint.objects.filter(
+            instance=instance, created_at__gte=timezone.now() - timedelta(days=keep_days)
+        )
+        histories = cls.timeline_history(instance) if restore_points else {}
+        pinned = set()
+        for restore_point in restore_points:
+            target_lsn = parse_lsn(restore_point.wal_lsn) if restore_point.wal_lsn else None
+            base_backup = cls.base_backup_for(
+                instance, restore_point.created_at, target_lsn, restore_point.timeline_id, histories
+            )
+            if base_backup:
+                pinned.add(base_backup.pk)
+        return pinned
+
+    @classmethod
+    def prune(cls, instance, keep=None):
+        """
+        Keeps the newest `keep` completed base backups (WAL_BASE_BACKUP_KEEP) plus
+        those recent restore points depend on. Returns the number removed
+        """
+        from .wal_models import WALBaseBackup
+
+        keep = keep if keep is not None else getattr(settings, 'WAL_BASE_BACKUP_KEEP', 3)
+        pinned = cls.pinned_ids(instance)
+        completed = WALBaseBackup.objects.filter(instance=instance, status='completed').order_by('-completed_at')
+        old = [base_backup for base_backup in completed[max(keep, 1):] if base_backup.pk not in pinned]
+        old += list(WALBaseBackup.objects.filter(
+            instance=instance, status='failed', started_at__lt=timezone.now() - timedelta(days=1)
+        ))
+        for base_backup in old:
+            if os.path.exists(base_backup.file_path):
+                os.remove(base_backup.file_path)
+        WALBaseBackup.objects.filter(pk__in=[base_backup.pk for base_backup in old]).delete()
+        return len(old)
+
+    @classmethod
+    def plan(cls, instance, target_time=None, restore_point=None):
+        """
+        Picks the newest base backup before the target and the archived WAL
+        segments to replay from it. Only the timelines recovery follows from
+        the backup to the target are counted: on each one the segments up to
+        the point where the next timeline branched off (which is read from
+        the new timeline). Returns a dict with the base backup, the target
+        timeline, the segment range, missing segments and the expected replay
+        volume/time.
+        """
+        from django.db.models import Q
+        from .wal_models import WALArchive
+        from .wal_scanner import WALArchiveScanner
+
+        # Make sure the catalogue includes the newest archived segments
+        WALArchiveScanner(instance).scan()
+
+        segment_size = getattr(settings, 'WAL_SEGMENT_SIZE', 16 * 1024 * 1024)
+        histories = cls.timeline_history(instance)
+        if restore_point is not None:
+            target_time = restore_point.created_at
+            target_lsn = parse_lsn(restore_point.wal_lsn) if restore_point.wal_lsn else None
+            target_timeline = restore_point.timeline_id
+        else:
+            target_lsn = None
+            target_timeline = None
+
+        base_backup = cls.base_backup_for(instance, target_time, target_lsn, target_timeline, histories)
+        if base_backup is None:
+            raise BaseBackupError(
+                "No hay ningún backup base anterior al punto de restauración en su línea temporal. "
+                "Crea un backup base y vuelve a intentarlo con un punto posterior."
+            )
+        if target_timeline is None:
+            target_timeline = cls.latest_timeline(base_backup, histories)
+        path = cls.timeline_path(base_backup, target_timeline, histories)
+
+        # Segment range of each timeline on the path
+        first_segment = parse_lsn(base_backup.start_lsn) // segment_size
+        ranges = []
+        for timeline, begin, switch_lsn in path:
+            ranges.append((
+                timeline,
+                begin // segment_size if begin is not None else first_segment,
+                switch_lsn // segment_size - 1 if switch_lsn is not None else None,
+            ))
+        path_filter = Q()
+        for timeline, first, last in ranges:
+            condition = Q(timeline_id=timeline, segment_number__gte=first)
+            if last is not None:
+                condition &= Q(segment_number__lte=last)
+            path_filter |= condition
+        archives = WALArchive.objects.filter(path_filter, instance=instance, file_type__in=['segment', 'partial'])
+
+        if target_lsn is not None:
+            last_segment = target_lsn // segment_size
+        else:
+            # Segments archived before the target plus the one containing it
+            first_after = archives.filter(archived_at__gte=target_time).order_by('segment_number').first()
+            if first_after:
+                last_segment = first_after.segment_number
+            else:
+                last = archives.order_by('-segment_number').first()
+                last_segment = last.segment_number if last else first_segment
+        archives = archives.filter(segment_number__lte=last_segment)
+
+        rows = list(archives.values_list('timeline_id', 'segment_number', 'file_size', 'compressed_size'))
+        present = {(row[0], row[1]) for row in rows}
+        segments_per_log = 0x100000000 // segment_size
+        missing = [
+            f"{timeline:08X}{number // segments_per_log:08X}{number % segments_per_log:08X}"
+            for timeline, first, last in ranges
+            for number in range(first, min(last if last is not None else last_segment, last_segment) + 1)
+            if (timeline, number) not in present
+        ]
+        replay_bytes = sum(row[2] for row in rows)
+        stored_bytes = sum(row[3] if row[3] is not None else row[2] for row in rows)
+        replay_rate = getattr(settings, 'WAL_REPLAY_RATE_MB', 64) * 1024 * 1024
+
+        return {
+            'base_backup': base_backup,
+            'target_time': target_time,
+            'target_timeline': target_timeline,
+            'timelines': [timeline for timeline, _, _ in path],
+            'first_segment': first_segment,
+            'last_segment': last_segment,
+            'segments': len(rows),
+            'missing': missing,
+            'replay_bytes': replay_bytes,
+            'stored_bytes': stored_bytes,
+            # Extracting the base backup plus replaying the WAL
+            'estimated_seconds': (base_backup.file_size * 3 + replay_bytes) / replay_rate,
+        }
+
+    @staticmethod
+    def describe_plan(plan):
+        base_backup = plan['base_backup']
+        return (
+            f"Backup base {base_backup.label} ({base_backup.completed_at:%d/%m/%Y %H:%M}, {base_backup.file_size_mb} MB), "
+            f"{plan['segments']} segmentos WAL a reproducir ({plan['replay_bytes'] / (1024 * 1024):.0f} MB, "
+            f"{plan['stored_bytes'] / (1024 * 1024):.0f} MB en disco) en la línea temporal "
+            f"{' → '.join(str(timeline) for timeline in plan['timelines'])}, tiempo estimado {plan['estimated_seconds']:.0f}s"
+        )
+
+    def restore_base(self, instance, base_backup, recovery_settings):
+        """
+        Replaces the (stopped) database container data directory with the base
+        backup and prepares recovery: recovery.signal plus the recovery
+        settings in postgresql.auto.conf (PostgreSQL 12+ ignores recovery.conf).
+        Runs in a throwaway helper container sharing the data volume.
+        """
+        from .wal_archiving import host_path
+
+        db_container = self.client.containers.get(f"db_{instance.name}")
+        base_dir = os.path.dirname(base_backup.file_path)
+        auto_conf = ''.join(f"{key} = '{value}'\n" for key, value in recovery_settings.items())
+
+        # The data directory is the volume mount point, so the backup is extracted into a
+        # staging directory inside it and swapped in by renames (same filesystem) only once
+        # it is complete: a missing or corrupt archive or a full disk leaves the old data
+        new_dir = f"{self.DATA_DIR}/.restore.new"
+        old_dir = f"{self.DATA_DIR}/.restore.old"
+        script = (
+            "set -e\n"
+            f"rm -rf {new_dir} {old_dir}\n"
+            f"trap 'rm -rf {new_dir}' EXIT\n"
+            f"mkdir {new_dir}\n"
+            f"tar -xzf {self.BASE_MOUNT}/{os.path.basename(base_backup.file_path)} -C {new_dir}\n"
+            f"test -f {new_dir}/PG_VERSION\n"
+            f"cat /restore/recovery.auto.conf >> {new_dir}/postgresql.auto.conf\n"
+            f"touch {new_dir}/recovery.signal\n"
+            f"mkdir {old_dir}\n"
+            f"find {self.DATA_DIR} -mindepth 1 -maxdepth 1 ! -name .restore.new ! -name .restore.old -exec mv {{}} {old_dir}/ \\;\n"
+            f"find {new_dir} -mindepth 1 -maxdepth 1 -exec mv {{}} {self.DATA_DIR}/ \\;\n"
+            f"rm -rf {old_dir}\n"
+            f"chown -R postgres:postgres {self.DATA_DIR}\n"
+            f"chmod 700 {self.DATA_DIR}\n"
+        )
+
+        helper = self.client.containers.create(
+            db_container.image.id if db_container.image else "postgres:13",
+            command=["sh", "/restore/restore.sh"],
+            volumes_from=[db_container.id],
+            volumes={host_path(base_dir): {'bind': self.BASE_MOUNT, 'mode': 'ro'}},
+            user='root',
+            entrypoint=[],
+        )
+        try:
+            archive = io.BytesIO()
+            with tarfile.open(fileobj=archive, mode='w') as tar:
+                for name, content in (('restore/restore.sh', script), ('restore/recovery.auto.conf', auto_conf)):
+                    data = content.encode('utf-8')
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+            helper.put_archive('/', archive.getvalue())
+
+            helper.start()
+            result = helper.wait()
+            if result.get('StatusCode'):
+                raise BaseBackupError(f"Error restaurando el backup base: {helper.logs().decode('utf-8', 'replace')[-1000:]}")
+        finally:
+            helper.remove(force=True)
@@ -1,10 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
-from .models import Instance
 
 class WALRestorePoint(models.Model):
     """Model to track WAL restore points for PITR"""
-    instance = models.ForeignKey(Instance, on_delete=models.CASCADE, related_name='wal_restore_points')
+    instance = models.ForeignKey('Instance', on_delete=models.CASCADE, related_name='wal_restore_points')
     name = models.CharField(max_length=255, help_text="Nombre descriptivo del punto de restauración")
     description = models.TextField(blank=True)
     
@@ -50,24 +49,39 @@ class WALRestorePoint(models.Model):
 
 class WALArchive(models.Model):
     """Model to track WAL archive files"""
-    instance = models.ForeignKey(Instance, on_delete=models.CASCADE, related_name='wal_archives')
-    wal_file_name = models.CharField(max_length=255, unique=True)
+    instance = models.ForeignKey('Instance', on_delete=models.CASCADE, related_name='wal_archives')
+    wal_file_name = models.CharField(max_length=255)
     file_path = models.CharField(max_length=512)
-    file_size = models.BigIntegerField(help_text="Size in bytes")
+    file_size = models.BigIntegerField(help_text="Uncompressed size in bytes")
+    compressed_size = models.BigIntegerField(null=True, blank=True, help_text="Size on disk in bytes when stored compressed")
+    compression = models.CharField(max_length=10, blank=True, default='', help_text="gzip, zstd or empty when stored raw")
     
-    # WAL metadata
+    # WAL metadata (parsed from the file name)
+    file_type = models.CharField(
+        max_length=20,
+        choices=[
+            ('segment', 'Segmento'),
+            ('partial', 'Segmento parcial'),
+            ('history', 'Historial de timeline'),
+            ('backup', 'Etiqueta de backup'),
+        ],
+        default='segment'
+    )
     timeline_id = models.IntegerField(default=1)
+    segment_number = models.BigIntegerField(null=True, blank=True, help_text="Absolute segment number (log id * segments per log + segment)")
     start_lsn = models.CharField(max_length=100, blank=True)
     end_lsn = models.CharField(max_length=100, blank=True)
     
+    archived_at = models.DateTimeField(null=True, blank=True, help_text="Modification time of the archived file")
     created_at = models.DateTimeField(auto_now_add=True)
     is_backed_up = models.BooleanField(default=False, help_text="Si fue copiado a backup remoto")
     
     class Meta:
         ordering = ['-created_at']
+        unique_together = [('instance', 'wal_file_name')]
         indexes = [
             models.Index(fields=['instance', '-created_at']),
-            models.Index(fields=['wal_file_name']),
+            models.Index(fields=['instance', 'timeline_id', 'segment_number']),
         ]
     
     def __str__(self):
@@ -76,16 +90,89 @@ class WALArchive(models.Model):
     @property
     def file_size_mb(self):
         return round(self.file_size / (1024 * 1024), 2)
+    
+    @property
+    def stored_size(self):
+        """Bytes used on disk"""
+        return self.compressed_size if self.compressed_size is not None else self.file_size
+    
+    @property
+    def stored_size_mb(self):
+        return round(self.stored_size / (1024 * 1024), 2)
+    
+    @property
+    def compression_ratio(self):
+        return round(self.file_size / self.compressed_size, 1) if self.compressed_size else None
+
+
+class WALBaseBackup(models.Model):
+    """Physical base backup (pg_basebackup) that point-in-time restores start from"""
+    instance = models.ForeignKey('Instance', on_delete=models.CASCADE, related_name='wal_base_backups')
+    label = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=512, help_text="Compressed tar of the data directory on the host")
+    file_size = models.BigIntegerField(default=0, help_text="Size in bytes")
+    
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('running', 'En Progreso'),
+            ('completed', 'Completado'),
+            ('failed', 'Fallido'),
+        ],
+        default='running'
+    )
+    error_message = models.TextField(blank=True)
+    
+    # WAL range covered by the backup (reported by pg_basebackup)
+    timeline_id = models.IntegerField(default=1)
+    start_lsn = models.CharField(max_length=100, blank=True)
+    end_lsn = models.CharField(max_length=100, blank=True)
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['instance', 'status', '-completed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.instance.name} - {self.label} [{self.status}]"
+    
+    @property
+    def file_size_mb(self):
+        return round(self.file_size / (1024 * 1024), 2)
+
+
+class WALScanState(models.Model):
+    """High-water mark of the incremental WAL archive scanner"""
+    instance = models.OneToOneField('Instance', on_delete=models.CASCADE, related_name='wal_scan_state')
+    last_wal_file_name = models.CharField(max_length=255, blank=True, help_text="Last file name ingested (WAL names sort chronologically)")
+    files_tracked = models.IntegerField(default=0)
+    bytes_tracked = models.BigIntegerField(default=0)
+    last_scan_at = models.DateTimeField(null=True, blank=True)
+    last_full_scan_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.instance.name} - {self.last_wal_file_name or 'sin escanear'}"
 
 
 class PITRRestore(models.Model):
     """Model to track PITR restore operations"""
-    instance = models.ForeignKey(Instance, on_delete=models.CASCADE, related_name='pitr_restores')
+    instance = models.ForeignKey('Instance', on_delete=models.CASCADE, related_name='pitr_restores')
     restore_target = models.DateTimeField(help_text="Target timestamp for restoration")
     target_lsn = models.CharField(max_length=100, blank=True, help_text="Target LSN if specified")
     
     # Restore point reference
     restore_point = models.ForeignKey(WALRestorePoint, on_delete=models.SET_NULL, null=True, blank=True)
+    base_backup = models.ForeignKey(WALBaseBackup, on_delete=models.SET_NULL, null=True, blank=True)
+    
+    # Replay estimate made before starting
+    estimated_replay_bytes = models.BigIntegerField(null=True, blank=True)
+    estimated_replay_seconds = models.FloatField(null=True, blank=True)
     
     # Status
     status = models.CharField(
@@ -112,6 +199,25 @@ class PITRRestore(models.Model):
     recovery_logs = models.TextField(blank=True)
     wal_files_replayed = models.IntegerField(default=0)
     
+    # Live progress, parsed from the database container log while recovering
+    phase = models.CharField(
+        max_length=20,
+        choices=[
+            ('', '-'),
+            ('base', 'Restaurando backup base'),
+            ('replay', 'Reproduciendo WAL'),
+            ('promote', 'Finalizando recuperación'),
+            ('done', 'Terminado'),
+        ],
+        default='',
+        blank=True
+    )
+    wal_files_expected = models.IntegerField(default=0)
+    current_wal_file = models.CharField(max_length=255, blank=True)
+    replay_lsn = models.CharField(max_length=100, blank=True)
+    seconds_remaining = models.FloatField(null=True, blank=True)
+    last_progress_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         ordering = ['-started_at']
         indexes = [
@@ -121,3 +227,9 @@ class PITRRestore(models.Model):
     
     def __str__(self):
         return f"{self.instance.name} - PITR to {self.restore_target} [{self.status}]"
+    
+    @property
+    def progress_percent(self):
+        if not self.wal_files_expected:
+            return None
+        return min(100, round(self.wal_files_replayed * 100 / self.wal_files_expected))
@@ -0,0 +1,189 @@
+import re
+import time
+import queue
+import threading
+from collections import deque
+from django.conf import settings
+from django.utils import timezone
+
+
+class RecoveryError(Exception):
+    """Raised when PostgreSQL archive recovery fails or stops making progress"""
+    pass
+
+
+# PostgreSQL startup process messages (lc_messages = C, as in the official images)
+RESTORED_RE = re.compile(r'restored log file "([0-9A-F]{24})" from archive')
+REDO_STARTS_RE = re.compile(r'redo starts at ([0-9A-F]+/[0-9A-F]+)')
+REDO_PROGRESS_RE = re.compile(r'redo in progress, elapsed time: .*current LSN: ([0-9A-F]+/[0-9A-F]+)')
+REDO_DONE_RE = re.compile(r'redo done at ([0-9A-F]+/[0-9A-F]+)')
+STOPPING_RE = re.compile(r'recovery stopping (.*)')
+READY_RE = re.compile(r'database system is ready to accept connections')
+TARGET_NOT_REACHED_RE = re.compile(r'recovery ended before configured recovery target was reached')
+ERROR_RE = re.compile(r'\b(FATAL|PANIC):\s+(.*)')
+# FATALs sent to clients connecting while the server starts; not recovery errors
+CLIENT_FATAL_RE = re.compile(r'the database system is (starting up|not yet accepting connections|in recovery mode|shutting down)')
+
+
+class RecoveryMonitor:
+    """
+    Follows the database container log during archive recovery and keeps the
+    PITRRestore record up to date: WAL files replayed, current file/LSN,
+    phase, the log tail and an estimate of the time remaining from the replay
+    rate so far.
+
+    There is no overall timeout: a long recovery is fine as long as it keeps
+    restoring segments. It fails when no progress is logged for
+    WAL_RECOVERY_STALL_SECONDS, when PostgreSQL reports the target was not
+    reached or when the container stops.
+    """
+
+    LOG_LINES = 200
+    SAVE_INTERVAL = 2
+
+    def __init__(self, container, pitr_restore, since=None):
+        self.container = container
+        self.pitr_restore = pitr_restore
+        self.since = since
+        self.lines = deque(maxlen=self.LOG_LINES)
+        self.replay_started = None
+        self.last_error = ''
+        self.stall_seconds = getattr(settings, 'WAL_RECOVERY_STALL_SECONDS', 600)
+
+    def _read(self, stream, lines):
+        """Reader thread: splits the log stream into lines; None marks the end of the stream"""
+        buffer = b''
+        try:
+            for chunk in stream:
+                buffer += chunk
+                *complete, buffer = buffer.split(b'\n')
+                for line in complete:
+                    lines.put(line.decode('utf-8', 'replace').rstrip('\r'))
+        except Exception:
+            pass
+        if buffer:
+            lines.put(buffer.decode('utf-8', 'replace'))
+        lines.put(None)
+
+    def _save(self):
+        restore = self.pitr_restore
+        restore.recovery_logs = '\n'.join(self.lines)
+        restore.save(update_fields=[
+            'phase', 'wal_files_replayed', 'current_wal_file', 'replay_lsn',
+            'seconds_remaining', 'last_progress_at', 'recovery_logs'
+        ])
+
+    def _estimate_remaining(self):
+        restore = self.pitr_restore
+        if not self.replay_started or not restore.wal_files_replayed or not restore.wal_files_expected:
+            return None
+        elapsed = time.monotonic() - self.replay_started
+        if elapsed < 1:
+            # Too early for a meaningful rate
+            return None
+        rate = restore.wal_files_replayed / elapsed
+        return max(restore.wal_files_expected - restore.wal_files_replayed, 0) / rate
+
+    def handle_line(self, line):
+        """Updates the progress from one log line. Returns True once the server accepts connections"""
+        restore = self.pitr_restore
+        self.lines.append(line)
+
+        restored = RESTORED_RE.search(line)
+        if restored:
+            if self.replay_started is None:
+                self.replay_started = time.monotonic()
+            restore.phase = 'replay'
+            restore.wal_files_replayed += 1
+            restore.current_wal_file = restored.group(1)
+            restore.last_progress_at = timezone.now()
+            restore.seconds_remaining = self._estimate_remaining()
+            return False
+
+        for regex in (REDO_STARTS_RE, REDO_PROGRESS_RE):
+            match = regex.search(line)
+            if match:
+                if self.replay_started is None:
+                    self.replay_started = time.monotonic()
+                restore.phase = 'replay'
+                restore.replay_lsn = match.group(1)
+                restore.last_progress_at = timezone.now()
+                return False
+
+        done = REDO_DONE_RE.search(line)
+        if done:
+            restore.phase = 'promote'
+            restore.replay_lsn = done.group(1)
+            restore.seconds_remaining = 0
+            restore.last_progress_at = timezone.now()
+            return False
+
+        if STOPPING_RE.search(line):
+            restore.last_progress_at = timezone.now()
+            return False
+
+        if READY_RE.search(line):
+            restore.phase = 'done'
+            restore.seconds_remaining = 0
+            return True
+
+        if TARGET_NOT_REACHED_RE.search(line):
+            raise RecoveryError(
+                "La recuperación terminó antes de alcanzar el objetivo: faltan archivos WAL posteriores al backup base"
+            )
+
+        error = ERROR_RE.search(line)
+        if error and not CLIENT_FATAL_RE.search(line):
+            self.last_error = error.group(2)
+            if error.group(1) == 'PANIC':
+                raise RecoveryError(f"PostgreSQL: {self.last_error}")
+        return False
+
+    def follow(self):
+        """Blocks until recovery finishes. Raises RecoveryError on failure or stall"""
+        stream = self.container.logs(stream=True, follow=True, since=self.since)
+        lines = queue.Queue()
+        reader = threading.Thread(target=self._read, args=(stream, lines), daemon=True)
+        reader.start()
+
+        restore = self.pitr_restore
+        restore.last_progress_at = timezone.now()
+        last_save = 0
+        try:
+            while True:
+                try:
+                    line = lines.get(timeout=1)
+                except queue.Empty:
+                    line = ''
+
+                if line is None:
+                    # Log stream ends when the container stops
+                    self.container.reload()
+                    raise RecoveryError(
+                        "PostgreSQL se detuvo durante la recuperación"
+                        + (f": {self.last_error}" if self.last_error else f" (estado {self.container.status})")
+                    )
+
+                finished = self.handle_line(line) if line else False
+                if finished:
+                    self._save()
+                    return restore
+
+                if (timezone.now() - restore.last_progress_at).total_seconds() > self.stall_seconds:
+                    raise RecoveryError(
+                        f"La recuperación no avanza desde hace {self.stall_seconds}s "
+                        f"(último archivo WAL: {restore.current_wal_file or '-'})"
+                    )
+
+                if time.monotonic() - last_save >= self.SAVE_INTERVAL:
+                    if restore.phase == 'replay':
+                        restore.seconds_remaining = self._estimate_remaining()
+                    self._save()
+                    last_save = time.monotonic()
+        finally:
+            # Unblocks the reader thread
+            try:
+                stream.close()
+            except Exception:
+                pass
+            self._save()
@@ -0,0 +1,137 @@
+import os
+from django.conf import settings
+
+
+class WALRetention:
+    """
+    Reachability-based garbage collection of an instance WAL archive.
+
+    A point-in-time restore always starts from a base backup and replays the
+    WAL from that backup's start segment onwards, so for every timeline the
+    oldest segment still needed is the start of the oldest retained base
+    backup on that timeline or an earlier one (replays follow timeline
+    switches forward, never backward). Anything older can never be replayed.
+    Restore points keep their WAL reachable by pinning the base backup they
+    depend on (see BaseBackupService.prune).
+
+    Timeline history files are always kept. Without any base backup nothing
+    is reachable yet, and nothing is deleted.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, instance):
+        self.instance = instance
+
+    def cutoffs(self):
+        """{timeline_id: first segment number to keep}, {} when there is no base backup"""
+        from .wal_models import WALBaseBackup
+        from .wal_scanner import parse_lsn
+
+        segment_size = getattr(settings, 'WAL_SEGMENT_SIZE', 16 * 1024 * 1024)
+        starts = {}
+        for timeline_id, start_lsn in WALBaseBackup.objects.filter(
+            instance=self.instance, status='completed'
+        ).exclude(start_lsn='').values_list('timeline_id', 'start_lsn'):
+            segment = parse_lsn(start_lsn) // segment_size
+            starts[timeline_id] = min(segment, starts.get(timeline_id, segment))
+        return starts
+
+    @staticmethod
+    def _cutoff_for(timeline_id, starts):
+        """First segment to keep on a timeline: oldest start of base backups on it or earlier timelines"""
+        eligible = [segment for timeline, segment in starts.items() if timeline <= timeline_id]
+        return min(eligible) if eligible else None
+
+    def unreachable(self, archive_dir):
+        """(path, size, wal_file_name) of the archived files no retained base backup can replay"""
+        from .wal_scanner import parse_wal_file_name
+        from .wal_archiving import split_compression
+
+        starts = self.cutoffs()
+        if not starts or not os.path.isdir(archive_dir):
+            return []
+
+        files = []
+        with os.scandir(archive_dir) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                name, _ = split_compression(entry.name)
+                parsed = parse_wal_file_name(name)
+                if parsed is None or parsed['file_type'] == 'history':
+                    continue
+                cutoff = self._cutoff_for(parsed['timeline_id'], starts)
+                if cutoff is None or parsed['segment_number'] < cutoff:
+                    files.append((entry.path, entry.stat(follow_symlinks=False).st_size, name))
+        return files
+
+    def collect(self, dry_run=False):
+        """
+        Deletes the unreachable files and their WALArchive rows in batches.
+        Returns a dict with the cutoffs, files/rows deleted and bytes reclaimed.
+        """
+        from django.db.models import Count, Sum, Q
+        from django.db.models.functions import Coalesce
+        from .wal_models import WALArchive, WALScanState
+        from .wal_scanner import WALArchiveScanner, format_lsn
+
+        # Rows for files archived since the last scan must exist before deciding
+        scanner = WALArchiveScanner(self.instance)
+        scanner.scan()
+
+        starts = self.cutoffs()
+        files = self.unreachable(scanner.archive_dir)
+        stats = {
+            'cutoffs': {
+                timeline: format_lsn(self._cutoff_for(timeline, starts) * getattr(settings, 'WAL_SEGMENT_SIZE', 16 * 1024 * 1024))
+                for timeline in starts
+            },
+            'files': len(files),
+            'bytes_reclaimed': sum(size for _, size, _ in files),
+            'rows': 0,
+            'errors': 0,
+            'dry_run': dry_run,
+        }
+        if not starts:
+            stats['message'] = 'Sin backups base: no se elimina ningún archivo WAL'
+            return stats
+        if dry_run:
+            return stats
+
+        for path, size, _ in files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                stats['errors'] += 1
+                stats['bytes_reclaimed'] -= size
+                print(f"Error deleting WAL file {path}: {e}")
+
+        # Rows below the cutoff of their timeline, one DELETE per timeline and batch
+        unreachable = Q()
+        for timeline_id in WALArchive.objects.filter(instance=self.instance).values_list('timeline_id', flat=True).order_by().distinct():
+            cutoff = self._cutoff_for(timeline_id, starts)
+            if cutoff is None:
+                unreachable |= Q(timeline_id=timeline_id)
+            else:
+                unreachable |= Q(timeline_id=timeline_id, segment_number__lt=cutoff)
+        if unreachable:
+            archives = WALArchive.objects.filter(instance=self.instance).exclude(file_type='history').filter(unreachable)
+            pks = list(archives.values_list('pk', flat=True))
+            for i in range(0, len(pks), self.BATCH_SIZE):
+                WALArchive.objects.filter(pk__in=pks[i:i + self.BATCH_SIZE]).delete()
+            stats['rows'] = len(pks)
+
+        totals = WALArchive.objects.filter(instance=self.instance).aggregate(
+            count=Count('id'), size=Sum(Coalesce('compressed_size', 'file_size'))
+        )
+        WALScanState.objects.filter(instance=self.instance).update(
+            files_tracked=totals['count'] or 0, bytes_tracked=totals['size'] or 0
+        )
+        print(
+            f"WAL GC {self.instance.name}: {stats['files']} files, "
+            f"{stats['bytes_reclaimed'] / (1024 * 1024):.1f} MB reclaimed (keep from {stats['cutoffs']})"
+        )
+        return stats
@@ -0,0 +1,218 @@
+import os
+import re
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+
+
+SEGMENT_RE = re.compile(r'^([0-9A-F]{8})([0-9A-F]{8})([0-9A-F]{8})(?:\.(partial)|\.([0-9A-F]{8})\.(backup))?$')
+HISTORY_RE = re.compile(r'^([0-9A-F]{8})\.history$')
+
+
+def format_lsn(lsn):
+    """Integer LSN to PostgreSQL's 'X/X' notation"""
+    return f"{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}"
+
+
+def parse_lsn(value):
+    """PostgreSQL's 'X/X' notation to an integer LSN"""
+    high, low = value.strip().split('/')
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def parse_wal_file_name(name, segment_size=None):
+    """
+    Parses an archived WAL file name (without compression suffix).
+
+    Segments are named TTTTTTTTXXXXXXXXYYYYYYYY (timeline, log id and segment
+    within the log, in hex), so timeline and LSN range come from the name
+    alone. Also recognises .partial segments, .backup labels and timeline
+    .history files. Returns a dict or None for files that are not WAL.
+    """
+    segment_size = segment_size or getattr(settings, 'WAL_SEGMENT_SIZE', 16 * 1024 * 1024)
+
+    history = HISTORY_RE.match(name)
+    if history:
+        return {
+            'file_type': 'history',
+            'timeline_id': int(history.group(1), 16),
+            'segment_number': None,
+            'start_lsn': '',
+            'end_lsn': '',
+        }
+
+    segment = SEGMENT_RE.match(name)
+    if not segment:
+        return None
+
+    timeline, log_id, log_segment, partial, backup_offset, backup = segment.groups()
+    segments_per_log = 0x100000000 // segment_size
+    segment_number = int(log_id, 16) * segments_per_log + int(log_segment, 16)
+    start = segment_number * segment_size
+    end = start + segment_size
+
+    if backup:
+        file_type = 'backup'
+        start += int(backup_offset, 16)
+    else:
+        file_type = 'partial' if partial else 'segment'
+
+    return {
+        'file_type': file_type,
+        'timeline_id': int(timeline, 16),
+        'segment_number': segment_number,
+        'start_lsn': format_lsn(start),
+        'end_lsn': format_lsn(end),
+    }
+
+
+def uncompressed_size(path, compression, parsed, stat):
+    """
+    Original size of an archived file. Segments always have the segment size;
+    small files (history, backup labels) compressed with gzip carry it in the
+    gzip trailer.
+    """
+    if not compression:
+        return stat.st_size
+    if parsed['file_type'] in ('segment', 'partial'):
+        return getattr(settings, 'WAL_SEGMENT_SIZE', 16 * 1024 * 1024)
+    if compression == 'gzip' and stat.st_size >= 4:
+        try:
+            with open(path, 'rb') as f:
+                f.seek(-4, os.SEEK_END)
+                return int.from_bytes(f.read(4), 'little')
+        except OSError:
+            pass
+    return stat.st_size
+
+
+class WALArchiveScanner:
+    """
+    Incremental ingestion of an instance WAL archive directory into WALArchive.
+
+    WAL file names sort in archive order, so only names at or after the
+    high-water mark stored in WALScanState are looked at: a scan of an archive
+    with thousands of segments costs one directory listing, one query for the
+    candidates and a few bulk inserts. A full scan also picks up size changes
+    and removes rows whose file is gone.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, instance):
+        self.instance = instance
+        self.archive_dir = self.archive_path(instance)
+
+    @staticmethod
+    def archive_path(instance):
+        from .wal_archiving import archive_dir
+        return archive_dir(instance)
+
+    def _list_files(self, after=None):
+        """{name: stat} of the WAL files in the archive, optionally only those >= after"""
+        files = {}
+        with os.scandir(self.archive_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or (after and entry.name < after):
+                    continue
+                if entry.is_file(follow_symlinks=False):
+                    files[entry.name] = entry.stat(follow_symlinks=False)
+        return files
+
+    def scan(self, full=False):
+        """Returns a dict with created/updated/deleted counts"""
+        from django.db.models import Sum, Count
+        from django.db.models.functions import Coalesce
+        from django.utils import timezone as dj_timezone
+        from .wal_models import WALArchive, WALScanState
+        from .wal_archiving import split_compression
+
+        started = time.monotonic()
+        stats = {'created': 0, 'updated': 0, 'deleted': 0, 'skipped': 0}
+        if not os.path.isdir(self.archive_dir):
+            stats['seconds'] = time.monotonic() - started
+            return stats
+
+        state, _ = WALScanState.objects.get_or_create(instance=self.instance)
+        high_water_mark = None if full else state.last_wal_file_name or None
+        files = self._list_files(after=high_water_mark)
+
+        archives = WALArchive.objects.filter(instance=self.instance)
+        if high_water_mark:
+            archives = archives.filter(wal_file_name__gte=split_compression(high_water_mark)[0])
+        existing = {
+            name: (pk, file_path, stored_size)
+            for pk, name, file_path, stored_size in archives.values_list(
+                'pk', 'wal_file_name', 'file_path', Coalesce('compressed_size', 'file_size')
+            )
+        }
+
+        to_create = []
+        to_update = []
+        seen = set()
+        wal_names = []
+        for file_name, stat in files.items():
+            name, compression = split_compression(file_name)
+            parsed = parse_wal_file_name(name)
+            if parsed is None:
+                # Temporary files of an archive_command in progress, READMEs...
+                stats['skipped'] += 1
+                continue
+            wal_names.append(file_name)
+            if name in seen:
+                # Same segment archived raw and compressed (compression changed): keep the first
+                continue
+            seen.add(name)
+
+            path = os.path.join(self.archive_dir, file_name)
+            archived_at = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+            sizes = {
+                'file_size': uncompressed_size(path, compression, parsed, stat),
+                'compressed_size': stat.st_size if compression else None,
+                'compression': compression,
+            }
+            if name in existing:
+                pk, file_path, stored_size = existing[name]
+                if stored_size != stat.st_size or file_path != path:
+                    to_update.append(WALArchive(pk=pk, file_path=path, archived_at=archived_at, **sizes))
+                continue
+
+            to_create.append(WALArchive(
+                instance=self.instance,
+                wal_file_name=name,
+                file_path=path,
+                archived_at=archived_at,
+                **sizes,
+                **parsed
+            ))
+
+        if to_create:
+            WALArchive.objects.bulk_create(to_create, batch_size=self.BATCH_SIZE, ignore_conflicts=True)
+            stats['created'] = len(to_create)
+        if to_update:
+            WALArchive.objects.bulk_update(
+                to_update, ['file_path', 'file_size', 'compressed_size', 'compression', 'archived_at'],
+                batch_size=self.BATCH_SIZE
+            )
+            stats['updated'] = len(to_update)
+
+        if full:
+            vanished = [pk for name, (pk, _, _) in existing.items() if name not in seen]
+            for i in range(0, len(vanished), self.BATCH_SIZE):
+                WALArchive.objects.filter(pk__in=vanished[i:i + self.BATCH_SIZE]).delete()
+            stats['deleted'] = len(vanished)
+            state.last_full_scan_at = dj_timezone.now()
+
+        if wal_names:
+            state.last_wal_file_name = max(wal_names + ([high_water_mark] if high_water_mark else []))
+        if stats['created'] or stats['updated'] or stats['deleted'] or full:
+            totals = WALArchive.objects.filter(instance=self.instance).aggregate(
+                count=Count('id'), size=Sum(Coalesce('compressed_size', 'file_size'))
+            )
+            state.files_tracked = totals['count'] or 0
+            state.bytes_tracked = totals['size'] or 0
+        state.last_scan_at = dj_timezone.now()
+        state.save()
+
+        stats['seconds'] = time.monotonic() - started
+        return stats
@@ -2,7 +2,7 @@ import docker
 import os
 from django.conf import settings
 from datetime import datetime, timezone
-from .wal_models import WALRestorePoint, WALArchive, PITRRestore
+from .wal_models import WALRestorePoint, PITRRestore
 
 class WALService:
     """Service for managing WAL archiving and Point-in-Time Recovery"""
@@ -10,38 +10,15 @@ class WALService:
     def __init__(self):
         self.client = docker.from_env()
     
-    def create_restore_point(self, instance, name, description='', user=None):
+    def create_restore_point(self, instance, name, description='', user=None, restore_point_type='manual'):
         """
         Creates a named restore point in PostgreSQL
         This allows for easy restoration to this specific point
         """
         try:
-            db_container = self.client.containers.get(f"db_{instance.name}")
-            
-            # Create restore point in PostgreSQL
-            result = db_container.exec_run(
-                f"psql -U odoo -d postgres -c \"SELECT pg_create_restore_point('{name}');\"",
-                environment={"PGPASSWORD": "odoo"}
-            )
-            
-            if result.exit_code != 0:
-                raise Exception(f"Failed to create restore point: {result.output.decode('utf-8')}")
-            
-            # Get current WAL position
-            lsn_result = db_container.exec_run(
-                "psql -U odoo -d postgres -t -c \"SELECT pg_current_wal_lsn();\"",
-                environment={"PGPASSWORD": "odoo"}
-            )
-            
-            wal_lsn = lsn_result.output.decode('utf-8').strip()
-            
-            # Get current WAL file
-            wal_file_result = db_container.exec_run(
-                "psql -U odoo -d postgres -t -c \"SELECT pg_walfile_name(pg_current_wal_lsn());\"",
-                environment={"PGPASSWORD": "odoo"}
-            )
-            
-            wal_file = wal_file_result.output.decode('utf-8').strip()
+            # Restore point, its LSN and WAL file in a single statement
+            from .wal_stats import WALStatsChannel
+            wal_lsn, wal_file = WALStatsChannel(self.client).create_restore_point(instance, name)
             
             # Get Git information if available
             git_commit = ''
@@ -63,7 +40,7 @@ class WALService:
                 description=description,
                 wal_lsn=wal_lsn,
                 wal_file=wal_file,
-                restore_point_type='manual',
+                restore_point_type=restore_point_type,
                 created_by=user,
                 git_commit=git_commit,
                 git_branch=git_branch
@@ -76,88 +53,115 @@ class WALService:
             print(f"❌ Error creating restore point: {str(e)}")
             raise e
     
-    def get_current_wal_status(self, instance):
+    def create_pre_deploy_restore_point(self, instance, reason='deploy', description='', user=None):
         """
-        Gets the current WAL archiving status
+        Restore point taken right before a deploy or module install (one SQL
+        call, no backup). Records the addons commit so the deploy can be rolled
+        back as a whole. Returns None when there is nothing to protect yet
+        (WAL archiving off, or the database is not running).
         """
+        if not getattr(settings, 'WAL_ARCHIVING_ENABLED', False) or not getattr(settings, 'WAL_PRE_DEPLOY_RESTORE_POINTS', True):
+            return None
         try:
             db_container = self.client.containers.get(f"db_{instance.name}")
-            
-            # Get current LSN
-            lsn_result = db_container.exec_run(
-                "psql -U odoo -d postgres -t -c \"SELECT pg_current_wal_lsn();\"",
-                environment={"PGPASSWORD": "odoo"}
-            )
-            current_lsn = lsn_result.output.decode('utf-8').strip()
-            
-            # Get last archived WAL
-            last_archived_result = db_container.exec_run(
-                "psql -U odoo -d postgres -t -c \"SELECT last_archived_wal, last_archived_time FROM pg_stat_archiver;\"",
-                environment={"PGPASSWORD": "odoo"}
-            )
-            last_archived = last_archived_result.output.decode('utf-8').strip()
-            
-            # Get archive status
-            archive_status_result = db_container.exec_run(
-                "psql -U odoo -d postgres -t -c \"SELECT archived_count, failed_count FROM pg_stat_archiver;\"",
-                environment={"PGPASSWORD": "odoo"}
-            )
-            archive_status = archive_status_result.output.decode('utf-8').strip()
-            
-            return {
-                'current_lsn': current_lsn,
-                'last_archived': last_archived,
-                'archive_status': archive_status,
-                'status': 'healthy' if lsn_result.exit_code == 0 else 'error'
-            }
-            
-        except Exception as e:
-            print(f"Error getting WAL status: {str(e)}")
-            return {'status': 'error', 'message': str(e)}
+        except docker.errors.NotFound:
+            return None
+        if db_container.status != 'running':
+            return None
+        
+        name = f"pre-{reason}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}"
+        return self.create_restore_point(
+            instance, name, description or f"Automático antes de {reason}", user=user, restore_point_type='pre-deploy'
+        )
     
-    def scan_wal_archives(self, instance):
+    def rollback_last_deploy(self, instance, user=None):
         """
-        Scans the WAL archive directory and updates database records
+        Rolls back the last deploy: resets the addons checkout to the commit
+        recorded by the latest pre-deploy restore point, then restores the
+        database to that point. The checkout is put back if the database
+        restore fails. Returns the restore point used.
         """
-        wal_archive_path = os.path.join(settings.BASE_DIR, 'backups', 'wal', instance.name)
+        restore_point = WALRestorePoint.objects.filter(
+            instance=instance, restore_point_type='pre-deploy'
+        ).order_by('-created_at').first()
+        if restore_point is None:
+            raise Exception("No hay ningún punto de restauración previo a un deploy")
         
-        if not os.path.exists(wal_archive_path):
-            return []
+        previous_commit = None
+        addons_path = os.path.join(settings.BASE_DIR, 'instances', instance.name, 'addons')
+        if restore_point.git_commit and os.path.exists(addons_path):
+            import git
+            repo = git.Repo(addons_path)
+            previous_commit = repo.head.commit.hexsha
+            if previous_commit != restore_point.git_commit:
+                try:
+                    repo.commit(restore_point.git_commit)
+                except ValueError:
+                    # Shallow clones may not have it anymore
+                    repo.git.fetch('origin', restore_point.git_commit, depth=1)
+                print(f"⏪ Resetting addons to {restore_point.git_commit[:7]}...")
+                repo.git.reset('--hard', restore_point.git_commit)
         
-        wal_files = []
-        for filename in os.listdir(wal_archive_path):
-            if not filename.startswith('.'):
-                file_path = os.path.join(wal_archive_path, filename)
-                file_size = os.path.getsize(file_path)
-                
-                # Create or update WAL archive record
-                wal_archive, created = WALArchive.objects.get_or_create(
-                    instance=instance,
-                    wal_file_name=filename,
-                    defaults={
-                        'file_path': file_path,
-                        'file_size': file_size
-                    }
-                )
-                
-                if not created:
-                    wal_archive.file_size = file_size
-                    wal_archive.save()
-                
-                wal_files.append(wal_archive)
+        try:
+            self.restore_to_point(instance, restore_point=restore_point, user=user)
+        except Exception:
+            if previous_commit and previous_commit != restore_point.git_commit:
+                print(f"Database restore failed, putting addons back to {previous_commit[:7]}")
+                git.Repo(addons_path).git.reset('--hard', previous_commit)
+            raise
         
-        return wal_files
+        return restore_point
+    
+    def get_current_wal_status(self, instance, use_cache=True):
+        """
+        Gets the current WAL archiving status (one query, cached, see WALStatsChannel)
+        """
+        from .wal_stats import WALStatsChannel
+        status = WALStatsChannel(self.client).status(instance, use_cache=use_cache)
+        if status['status'] != 'healthy':
+            print(f"Error getting WAL status: {status.get('message')}")
+        return status
+    
+    def scan_wal_archives(self, instance, full=False):
+        """
+        Ingests new files of the WAL archive directory into WALArchive records
+        (incremental, see WALArchiveScanner). Returns the scan stats
+        """
+        from .wal_scanner import WALArchiveScanner
+        return WALArchiveScanner(instance).scan(full=full)
     
     def restore_to_point(self, instance, restore_point=None, target_time=None, user=None):
         """
-        Restores database to a specific restore point or timestamp (PITR)
+        Restores database to a specific restore point or timestamp (PITR).
+
+        Recovery starts from the newest base backup taken before the target
+        (see BaseBackupService.plan), so only the WAL archived since that
+        backup is replayed.
         """
+        import time
+        from .wal_basebackup import BaseBackupService, BaseBackupError
+        from .wal_archiving import restore_command
+        from .wal_recovery import RecoveryMonitor
+
+        base_backups = BaseBackupService(self.client)
+        plan = base_backups.plan(instance, target_time=target_time, restore_point=restore_point)
+        if plan['missing']:
+            raise BaseBackupError(
+                f"Faltan {len(plan['missing'])} segmentos WAL entre el backup base y el objetivo "
+                f"(primero: {plan['missing'][0]}). La restauración no llegaría al punto pedido."
+            )
+        print(f"📋 Restore plan: {base_backups.describe_plan(plan)}")
+
         # Create PITR restore record
         pitr_restore = PITRRestore.objects.create(
             instance=instance,
             restore_target=target_time if target_time else restore_point.created_at,
             target_lsn=restore_point.wal_lsn if restore_point else '',
             restore_point=restore_point,
+            base_backup=plan['base_backup'],
+            estimated_replay_bytes=plan['replay_bytes'],
+            estimated_replay_seconds=plan['estimated_seconds'],
+            wal_files_expected=plan['segments'],
             status='pending',
             initiated_by=user
         )
@@ -179,106 +183,43 @@ class WALService:
             
             # 2. Stop PostgreSQL
             print("🛑 Stopping PostgreSQL...")
+            from .wal_stats import WALStatsChannel
+            WALStatsChannel.close(instance)
+            WALStatsChannel.invalidate(instance)
             db_container.stop()
             db_container.wait()
             
-            # 3. Create recovery configuration
-            print("⚙️ Creating recovery configuration...")
-            wal_archive_path = os.path.join(settings.BASE_DIR, 'backups', 'wal', instance.name)
-            
-            recovery_conf = ""
+            # 3. Replace the data directory with the base backup and configure recovery
+            # (PostgreSQL 12+: recovery.signal + settings in postgresql.auto.conf)
+            print(f"📦 Restoring base backup {plan['base_backup'].label}...")
+            recovery_settings = {'restore_command': restore_command()}
             if restore_point:
-                # Restore to named restore point
-                recovery_conf = f"""
-restore_command = 'cp /wal-archive/%f %p'
-recovery_target_name = '{restore_point.name}'
-recovery_target_action = 'promote'
-"""
-            elif target_time:
-                # Restore to timestamp
-                target_time_str = target_time.strftime('%Y-%m-%d %H:%M:%S')
-                recovery_conf = f"""
-restore_command = 'cp /wal-archive/%f %p'
-recovery_target_time = '{target_time_str}'
-recovery_target_action = 'promote'
-"""
-            
-            # Write recovery configuration
-            recovery_signal_path = os.path.join(
-                settings.BASE_DIR, 
-                'backups', 
-                'recovery_temp', 
-                f'recovery_{instance.name}.conf'
-            )
-            os.makedirs(os.path.dirname(recovery_signal_path), exist_ok=True)
-            
-            with open(recovery_signal_path, 'w') as f:
-                f.write(recovery_conf)
-            
-            # 4. Copy recovery.conf to data directory
-            print("📋 Copying recovery configuration...")
-            # We need to mount and copy the recovery.conf file
-            # This is a simplified approach - in production you'd want to handle this more robustly
-            
-            # Create recovery.signal file (PostgreSQL 12+)
-            import tarfile
-            import io
-            
-            tar_stream = io.BytesIO()
-            tar = tarfile.open(fileobj=tar_stream, mode='w')
-            
-            # Add recovery.signal
-            signal_info = tarfile.TarInfo(name='recovery.signal')
-            signal_info.size = 0
-            tar.addfile(signal_info, io.BytesIO(b''))
-            
-            # Add recovery configuration to postgresql.auto.conf
-            conf_data = recovery_conf.encode('utf-8')
-            conf_info = tarfile.TarInfo(name='recovery.conf')
-            conf_info.size = len(conf_data)
-            tar.addfile(conf_info, io.BytesIO(conf_data))
-            
-            tar.close()
-            tar_stream.seek(0)
-            
-            # Start container temporarily to copy files
+                recovery_settings['recovery_target_name'] = restore_point.name.replace("'", "''")
+            else:
+                recovery_settings['recovery_target_time'] = target_time.isoformat(sep=' ')
+            # Follow the same timelines the plan checked
+            recovery_settings['recovery_target_timeline'] = str(plan['target_timeline'])
+            recovery_settings['recovery_target_action'] = 'promote'
+            pitr_restore.phase = 'base'
+            pitr_restore.save(update_fields=['phase'])
+            base_backups.restore_base(instance, plan['base_backup'], recovery_settings)
+            
+            # 4. Start PostgreSQL: it replays the archived WAL up to the target and promotes
+            print("🔄 Starting PostgreSQL for recovery...")
+            log_since = int(time.time())
             db_container.start()
-            import time
-            time.sleep(2)
             
-            db_container.put_archive('/var/lib/postgresql/data', tar_stream.read())
+            # 5. Follow the recovery in the container log (no fixed timeout while it progresses)
+            print(f"⏳ Replaying WAL (~{plan['estimated_seconds']:.0f}s estimated)...")
+            RecoveryMonitor(db_container, pitr_restore, since=log_since).follow()
             
-            # 5. Restart PostgreSQL to trigger recovery
-            print("🔄 Restarting PostgreSQL for recovery...")
-            db_container.restart()
-            
-            # 6. Wait for recovery to complete
-            print("⏳ Waiting for recovery to complete...")
-            max_wait = 120  # 2 minutes
-            waited = 0
-            recovery_complete = False
-            
-            while waited < max_wait:
-                time.sleep(5)
-                waited += 5
-                
-                try:
-                    # Check if recovery is complete
-                    check_result = db_container.exec_run(
-                        "psql -U odoo -d postgres -t -c \"SELECT pg_is_in_recovery();\"",
-                        environment={"PGPASSWORD": "odoo"}
-                    )
-                    
-                    if check_result.exit_code == 0:
-                        is_recovering = check_result.output.decode('utf-8').strip()
-                        if is_recovering == 'f':  # false = not in recovery = complete
-                            recovery_complete = True
-                            break
-                except:
-                    continue
-            
-            if not recovery_complete:
-                raise Exception("Recovery timeout - took longer than expected")
+            # 6. Drop the recovery target so later restarts don't try to recover again
+            db_container.exec_run(
+                "psql -U odoo -d postgres -c \"ALTER SYSTEM RESET recovery_target_name; "
+                "ALTER SYSTEM RESET recovery_target_time; ALTER SYSTEM RESET recovery_target_action; "
+                "ALTER SYSTEM RESET recovery_target_timeline;\"",
+                environment={"PGPASSWORD": "odoo"}
+            )
             
             # 7. Restart Odoo
             print("🚀 Restarting Odoo...")
@@ -291,7 +232,10 @@ recovery_target_action = 'promote'
             # Update restore record
             pitr_restore.status = 'completed'
             pitr_restore.completed_at = datetime.now(timezone.utc)
-            pitr_restore.recovery_logs = "Recovery completed successfully"
+            pitr_restore.recovery_logs += (
+                f"\nRecovery completed successfully from base backup {plan['base_backup'].label} "
+                f"({pitr_restore.wal_files_replayed} WAL files replayed)"
+            )
             pitr_restore.save()
             
             print("✅ PITR restore completed successfully!")
@@ -312,9 +256,9 @@ recovery_target_action = 'promote'
         """
         try:
             instance = restore_point.instance
-            db_container = self.client.containers.get(f"db_{instance.name}")
             
-            # Check if WAL file exists
+            # Check if WAL file exists (raw or compressed)
+            from .wal_archiving import COMPRESSION_SUFFIXES
             wal_archive_path = os.path.join(
                 settings.BASE_DIR, 
                 'backups', 
@@ -323,16 +267,11 @@ recovery_target_action = 'promote'
                 restore_point.wal_file
             )
             
-            if not os.path.exists(wal_archive_path):
+            if not any(os.path.exists(wal_archive_path + suffix) for suffix in ('',) + tuple(COMPRESSION_SUFFIXES.values())):
                 return False, "WAL file not found"
             
             # Verify PostgreSQL is accessible
-            result = db_container.exec_run(
-                "psql -U odoo -d postgres -c 'SELECT 1;'",
-                environment={"PGPASSWORD": "odoo"}
-            )
-            
-            if result.exit_code != 0:
+            if self.get_current_wal_status(instance, use_cache=False)['status'] != 'healthy':
                 return False, "Database not accessible"
             
             restore_point.is_verified = True
@@ -344,37 +283,10 @@ recovery_target_action = 'promote'
         except Exception as e:
             return False, str(e)
     
-    def cleanup_old_wal_files(self, instance, keep_days=7):
+    def cleanup_old_wal_files(self, instance, dry_run=False):
         """
-        Removes WAL files older than specified days
-        Keeps files that are referenced by restore points
+        Removes the WAL files no retained base backup or restore point can
+        replay anymore (see WALRetention). Returns the GC stats
         """
-        from datetime import timedelta
-        
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=keep_days)
-        
-        # Get WAL files to keep (referenced by restore points)
-        protected_wal_files = set(
-            WALRestorePoint.objects.filter(
-                instance=instance,
-                created_at__gte=cutoff_date
-            ).values_list('wal_file', flat=True)
-        )
-        
-        # Delete old WAL archives
-        old_archives = WALArchive.objects.filter(
-            instance=instance,
-            created_at__lt=cutoff_date
-        ).exclude(wal_file_name__in=protected_wal_files)
-        
-        deleted_count = 0
-        for archive in old_archives:
-            try:
-                if os.path.exists(archive.file_path):
-                    os.remove(archive.file_path)
-                archive.delete()
-                deleted_count += 1
-            except Exception as e:
-                print(f"Error deleting WAL file {archive.wal_file_name}: {e}")
-        
-        return deleted_count
+        from .wal_retention import WALRetention
+        return WALRetention(instance).collect(dry_run=dry_run)
@@ -0,0 +1,251 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Everything the WAL pages need in one round-trip. pg_current_wal_lsn() and
+# pg_walfile_name() fail on a server in recovery, hence the CASE guards.
+STATUS_SQL = """
+SELECT
+    pg_is_in_recovery() AS in_recovery,
+    CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END::text AS current_lsn,
+    CASE WHEN pg_is_in_recovery() THEN NULL ELSE pg_walfile_name(pg_current_wal_lsn()) END AS current_wal_file,
+    current_setting('archive_mode') AS archive_mode,
+    a.archived_count,
+    a.last_archived_wal,
+    a.last_archived_time,
+    a.failed_count,
+    a.last_failed_wal,
+    a.last_failed_time,
+    a.stats_reset
+FROM pg_stat_archiver a
+"""
+
+RESTORE_POINT_SQL = """
+SELECT lsn::text AS lsn, pg_walfile_name(lsn) AS wal_file
+FROM pg_create_restore_point(%s) AS lsn
+"""
+
+# psql field separator for the docker exec fallback (never appears in the values)
+FIELD_SEPARATOR = '\x1f'
+
+
+def _literal(value):
+    """SQL string literal (standard_conforming_strings is on by default)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value == 't'
+    return bool(value)
+
+
+def _to_int(value):
+    return int(value) if value not in (None, '') else 0
+
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value) if value else None
+    return value
+
+
+class WALStatsChannel:
+    """
+    Lightweight stats channel to the instance database containers.
+
+    Queries go over a persistent psycopg2 connection to the container IP on
+    the instance network (one per instance, reused between requests); when the
+    orchestrator cannot reach that network they fall back to a single
+    `docker exec psql`. WAL status is cached for WAL_STATUS_CACHE_SECONDS so
+    pages and dashboards polling it don't hit the containers every time.
+    """
+
+    PG_USER = 'odoo'
+    PG_PASSWORD = 'odoo'
+    # After a failed direct connection, use docker exec for this long before retrying
+    RETRY_DIRECT_AFTER = 60
+
+    _connections = {}
+    _unreachable = {}
+    _lock = threading.Lock()
+
+    def __init__(self, client=None):
+        import docker
+        self.client = client or docker.from_env()
+
+    @staticmethod
+    def cache_key(instance):
+        return f"wal_status:{instance.pk}"
+
+    # -- transport --
+
+    def _container_ip(self, container, instance):
+        networks = container.attrs.get('NetworkSettings', {}).get('Networks', {})
+        network = networks.get(f"net_{instance.name}") or next(iter(networks.values()), {})
+        return network.get('IPAddress')
+
+    def _connection(self, instance, container):
+        """Open (or reused) direct connection, None when the container is not reachable"""
+        if not getattr(settings, 'WAL_STATS_DIRECT_CONNECTION', True):
+            return None
+
+        name = instance.name
+        with self._lock:
+            if time.monotonic() - self._unreachable.get(name, -self.RETRY_DIRECT_AFTER) < self.RETRY_DIRECT_AFTER:
+                return None
+            host = self._container_ip(container, instance)
+            cached = self._connections.get(name)
+            if cached and cached[0] == host and not cached[1].closed:
+                return cached[1]
+
+        if not host:
+            return None
+        try:
+            import psycopg2
+            conn = psycopg2.connect(
+                host=host, port=5432, dbname='postgres', user=self.PG_USER, password=self.PG_PASSWORD,
+                connect_timeout=2, application_name='orchestrator-stats'
+            )
+            conn.autocommit = True
+        except Exception:
+            with self._lock:
+                self._unreachable[name] = time.monotonic()
+            return None
+
+        with self._lock:
+            previous = self._connections.get(name)
+            if previous and not previous[1].closed:
+                previous[1].close()
+            self._connections[name] = (host, conn)
+        return conn
+
+    @classmethod
+    def close(cls, instance=None):
+        """Closes the direct connection of an instance (e.g. before stopping its database), or all of them"""
+        with cls._lock:
+            names = [instance.name] if instance else list(cls._connections)
+            for name in names:
+                host_conn = cls._connections.pop(name, None)
+                if host_conn and not host_conn[1].closed:
+                    host_conn[1].close()
+
+    def _query_direct(self, conn, sql, params):
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            columns = [column.name for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _query_exec(self, container, sql, params):
+        if params:
+            sql = sql % tuple(_literal(param) for param in params)
+        result = container.exec_run(
+            ['psql', '-U', self.PG_USER, '-d', 'postgres', '-X', '-A', '-q',
+             '-F', FIELD_SEPARATOR, '-P', 'footer=off', '-v', 'ON_ERROR_STOP=1', '-c', sql],
+            environment={"PGPASSWORD": self.PG_PASSWORD}
+        )
+        output = result.output.decode('utf-8', 'replace')
+        if result.exit_code != 0:
+            raise Exception(output.strip())
+        lines = output.splitlines()
+        if not lines:
+            return []
+        columns = lines[0].split(FIELD_SEPARATOR)
+        # Empty fields are NULLs (the queries here never return empty strings)
+        return [
+            {column: (value if value != '' else None) for column, value in zip(columns, line.split(FIELD_SEPARATOR))}
+            for line in lines[1:]
+        ]
+
+    def query(self, instance, sql, params=()):
+        """Rows of `sql` (%s placeholders) as dicts; values are strings when the exec fallback was used"""
+        container = self.client.containers.get(f"db_{instance.name}")
+        conn = self._connection(instance, container)
+        if conn is not None:
+            try:
+                return self._query_direct(conn, sql, params)
+            except Exception as e:
+                import psycopg2
+                if not isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                    raise
+                # Server restarted or connection dropped: retry once through exec
+                self.close(instance)
+        return self._query_exec(container, sql, params)
+
+    # -- WAL status --
+
+    def _collect(self, instance):
+        try:
+            rows = self.query(instance, STATUS_SQL)
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+        if not rows:
+            return {'status': 'error', 'message': 'pg_stat_archiver returned no rows'}
+
+        row = rows[0]
+        status = {
+            'status': 'healthy',
+            'in_recovery': _to_bool(row['in_recovery']),
+            'current_lsn': row['current_lsn'] or '',
+            'current_wal_file': row['current_wal_file'] or '',
+            'archive_mode': row['archive_mode'],
+            'archived_count': _to_int(row['archived_count']),
+            'last_archived_wal': row['last_archived_wal'] or '',
+            'last_archived_time': _to_datetime(row['last_archived_time']),
+            'failed_count': _to_int(row['failed_count']),
+            'last_failed_wal': row['last_failed_wal'] or '',
+            'last_failed_time': _to_datetime(row['last_failed_time']),
+            'stats_reset': _to_datetime(row['stats_reset']),
+            'collected_at': datetime.now().astimezone(),
+        }
+        # Archiving is failing when the last failure is newer than the last success
+        status['archiving_failing'] = bool(
+            status['last_failed_time'] and (
+                not status['last_archived_time'] or status['last_failed_time'] > status['last_archived_time']
+            )
+        )
+        return status
+
+    def status(self, instance, use_cache=True):
+        """WAL/archiver status of an instance (cached)"""
+        key = self.cache_key(instance)
+        if use_cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        status = self._collect(instance)
+        cache.set(key, status, getattr(settings, 'WAL_STATUS_CACHE_SECONDS', 10))
+        return status
+
+    def collect(self, instances, use_cache=True):
+        """{instance.pk: status} for many instances, uncached ones queried in parallel"""
+        instances = list(instances)
+        keys = {self.cache_key(instance): instance for instance in instances}
+        cached = cache.get_many(keys) if use_cache else {}
+        results = {keys[key].pk: status for key, status in cached.items()}
+
+        missing = [instance for key, instance in keys.items() if key not in cached]
+        if missing:
+            workers = min(len(missing), getattr(settings, 'WAL_STATS_WORKERS', 8))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                collected = list(executor.map(self._collect, missing))
+            cache.set_many(
+                {self.cache_key(instance): status for instance, status in zip(missing, collected)},
+                getattr(settings, 'WAL_STATUS_CACHE_SECONDS', 10)
+            )
+            results.update({instance.pk: status for instance, status in zip(missing, collected)})
+        return results
+
+    @classmethod
+    def invalidate(cls, instance):
+        cache.delete(cls.cache_key(instance))
+
+    def create_restore_point(self, instance, name):
+        """pg_create_restore_point plus LSN and WAL file name in one statement. Returns (lsn, wal_file)"""
+        rows = self.query(instance, RESTORE_POINT_SQL, (name,))
+        self.invalidate(instance)
+        return rows[0]['lsn'], rows[0]['wal_file']
@@ -0,0 +1,255 @@
+from datetime import datetime
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse
+from django.utils import timezone
+from .models import Instance
+from .wal_models import WALRestorePoint, WALArchive, WALBaseBackup, PITRRestore
+from .wal_scanner import WALArchiveScanner
+from .wal_archiving import storage_stats
+
+
+@login_required
+def instance_wal(request, pk):
+    """WAL archiving status, restore points and archived segments of an instance"""
+    instance = get_object_or_404(Instance, pk=pk)
+
+    # Cheap: only files past the last scanned segment are ingested
+    try:
+        WALArchiveScanner(instance).scan()
+    except Exception as e:
+        print(f"Error scanning WAL archive of {instance.name}: {str(e)}")
+
+    try:
+        from .wal_service import WALService
+        wal_status = WALService().get_current_wal_status(instance)
+    except Exception as e:
+        wal_status = {'status': 'error', 'message': str(e)}
+
+    wal_archives = WALArchive.objects.filter(instance=instance).order_by('-wal_file_name')
+    wal_storage = storage_stats(wal_archives)
+
+    # What a WAL GC would free right now
+    from .wal_retention import WALRetention
+    unreachable = WALRetention(instance).unreachable(WALArchiveScanner.archive_path(instance))
+    wal_reclaimable = {
+        'files': len(unreachable),
+        'mb': round(sum(size for _, size, _ in unreachable) / (1024 * 1024), 2),
+    }
+
+    return render(request, 'orchestrator/instance_wal.html', {
+        'instance': instance,
+        'wal_status': wal_status,
+        'wal_count': wal_storage['count'],
+        'total_wal_size_mb': wal_storage['stored_mb'],
+        'wal_storage': wal_storage,
+        'wal_reclaimable': wal_reclaimable,
+        'restore_points': WALRestorePoint.objects.filter(instance=instance).select_related('created_by'),
+        'wal_archives': wal_archives,
+        'base_backups': WALBaseBackup.objects.filter(instance=instance).select_related('created_by'),
+        'last_restore': PITRRestore.objects.filter(instance=instance).first(),
+        'last_deploy_point': WALRestorePoint.objects.filter(instance=instance, restore_point_type='pre-deploy').first(),
+    })
+
+
+@login_required
+def create_restore_point(request, pk):
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method == 'POST':
+        name = request.POST.get('name', '').strip()
+        if not name:
+            messages.error(request, 'Debes indicar un nombre para el punto de restauración')
+            return redirect('instance-wal', pk=pk)
+        try:
+            from .wal_service import WALService
+            WALService().create_restore_point(instance, name, request.POST.get('description', ''), user=request.user)
+            messages.success(request, f'Punto de restauración "{name}" creado')
+        except Exception as e:
+            messages.error(request, f'Error creando el punto de restauración: {str(e)}')
+
+    return redirect('instance-wal', pk=pk)
+
+
+@login_required
+def restore_to_point(request, pk):
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method == 'POST':
+        restore_point = get_object_or_404(WALRestorePoint, pk=request.POST.get('restore_point_id'), instance=instance)
+        try:
+            from .wal_service import WALService
+            WALService().restore_to_point(instance, restore_point=restore_point, user=request.user)
+            messages.success(request, f'Instancia restaurada al punto "{restore_point.name}"')
+        except Exception as e:
+            messages.error(request, f'Error en la restauración: {str(e)}')
+
+    return redirect('instance-wal', pk=pk)
+
+
+def _parse_target_datetime(value):
+    """datetime-local input value to an aware datetime, None if invalid"""
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%dT%H:%M'))
+    except ValueError:
+        return None
+
+
+@login_required
+def rollback_deploy(request, pk):
+    """Database back to the last pre-deploy restore point and addons back to its commit"""
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method == 'POST':
+        try:
+            from .wal_service import WALService
+            restore_point = WALService().rollback_last_deploy(instance, user=request.user)
+            commit = f" (commit {restore_point.git_commit[:7]})" if restore_point.git_commit else ''
+            messages.success(request, f'Deploy revertido al punto "{restore_point.name}"{commit}')
+        except Exception as e:
+            messages.error(request, f'Error revirtiendo el deploy: {str(e)}')
+
+    return redirect('instance-wal', pk=pk)
+
+
+@login_required
+def restore_to_timestamp(request, pk):
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method == 'POST':
+        target_time = _parse_target_datetime(request.POST.get('target_datetime', ''))
+        if target_time is None:
+            messages.error(request, 'Fecha y hora no válidas')
+            return redirect('instance-wal', pk=pk)
+
+        try:
+            from .wal_service import WALService
+            WALService().restore_to_point(instance, target_time=target_time, user=request.user)
+            messages.success(request, f'Instancia restaurada a {target_time:%d/%m/%Y %H:%M}')
+        except Exception as e:
+            messages.error(request, f'Error en la restauración: {str(e)}')
+
+    return redirect('instance-wal', pk=pk)
+
+
+@login_required
+def wal_restore_plan(request, pk):
+    """
+    JSON: base backup, WAL to replay and estimated duration of a restore to
+    ?restore_point=<id> or ?target=<datetime-local>, shown before confirming
+    """
+    instance = get_object_or_404(Instance, pk=pk)
+    from .wal_basebackup import BaseBackupService, BaseBackupError
+
+    restore_point = None
+    target_time = None
+    if request.GET.get('restore_point'):
+        restore_point = get_object_or_404(WALRestorePoint, pk=request.GET['restore_point'], instance=instance)
+    else:
+        target_time = _parse_target_datetime(request.GET.get('target', ''))
+        if target_time is None:
+            return JsonResponse({'error': 'Fecha y hora no válidas'}, status=400)
+
+    try:
+        plan = BaseBackupService.plan(instance, target_time=target_time, restore_point=restore_point)
+    except BaseBackupError as e:
+        return JsonResponse({'error': str(e)}, status=409)
+
+    base_backup = plan['base_backup']
+    return JsonResponse({
+        'base_backup': {
+            'label': base_backup.label,
+            'completed_at': base_backup.completed_at.isoformat(),
+            'size_mb': base_backup.file_size_mb,
+            'start_lsn': base_backup.start_lsn,
+            'timeline_id': base_backup.timeline_id,
+        },
+        'timelines': plan['timelines'],
+        'segments': plan['segments'],
+        'missing': plan['missing'],
+        'replay_mb': round(plan['replay_bytes'] / (1024 * 1024), 2),
+        'stored_mb': round(plan['stored_bytes'] / (1024 * 1024), 2),
+        'estimated_seconds': round(plan['estimated_seconds']),
+        'summary': BaseBackupService.describe_plan(plan),
+    })
+
+
+@login_required
+def pitr_restore_status(request, pk):
+    """JSON progress of the latest point-in-time restore of an instance (polled while it runs)"""
+    instance = get_object_or_404(Instance, pk=pk)
+    restore = PITRRestore.objects.filter(instance=instance).first()
+    if restore is None:
+        return JsonResponse({'status': None})
+
+    return JsonResponse({
+        'status': restore.status,
+        'phase': restore.phase,
+        'phase_display': restore.get_phase_display(),
+        'wal_files_replayed': restore.wal_files_replayed,
+        'wal_files_expected': restore.wal_files_expected,
+        'progress_percent': restore.progress_percent,
+        'current_wal_file': restore.current_wal_file,
+        'replay_lsn': restore.replay_lsn,
+        'seconds_remaining': round(restore.seconds_remaining) if restore.seconds_remaining is not None else None,
+        'started_at': restore.started_at.isoformat(),
+        'error_message': restore.error_message,
+        'log_tail': restore.recovery_logs.splitlines()[-20:],
+    })
+
+
+@login_required
+def create_base_backup(request, pk):
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method == 'POST':
+        try:
+            from .wal_basebackup import BaseBackupService
+            base_backup = BaseBackupService().create(instance, user=request.user)
+            BaseBackupService.prune(instance)
+            from .wal_retention import WALRetention
+            WALRetention(instance).collect()
+            messages.success(request, f'Backup base "{base_backup.label}" creado ({base_backup.file_size_mb} MB)')
+        except Exception as e:
+            messages.error(request, f'Error creando el backup base: {str(e)}')
+
+    return redirect('instance-wal', pk=pk)
+
+
+@login_required
+def verify_restore_point(request, pk):
+    """pk is the restore point"""
+    restore_point = get_object_or_404(WALRestorePoint, pk=pk)
+    try:
+        from .wal_service import WALService
+        ok, message = WALService().verify_restore_point(restore_point)
+    except Exception as e:
+        ok, message = False, str(e)
+
+    if ok:
+        messages.success(request, f'"{restore_point.name}": {message}')
+    else:
+        messages.error(request, f'"{restore_point.name}": {message}')
+    return redirect('instance-wal', pk=restore_point.instance_id)
+
+
+@login_required
+def cleanup_wal_files(request, pk):
+    instance = get_object_or_404(Instance, pk=pk)
+
+    if request.method == 'POST':
+        try:
+            from .wal_service import WALService
+            stats = WALService().cleanup_old_wal_files(instance)
+            if stats.get('message'):
+                messages.warning(request, stats['message'])
+            else:
+                messages.success(
+                    request,
+                    f"{stats['files']} archivos WAL eliminados, {stats['bytes_reclaimed'] / (1024 * 1024):.1f} MB liberados"
+                )
+        except Exception as e:
+            messages.error(request, f'Error limpiando archivos WAL: {str(e)}')
+
+    return redirect('instance-wal', pk=pk)
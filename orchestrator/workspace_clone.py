@@ -0,0 +1,199 @@
+import os
+import time
+import errno
+import shutil
+from django.conf import settings
+
+
+# ioctl request number of FICLONE (linux/fs.h), shares all extents of a file (copy-on-write)
+FICLONE = 0x40049409
+
+# Errors that mean "this filesystem / pair of paths can't do it", not a real failure
+UNSUPPORTED_ERRNOS = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM}
+
+
+class WorkspaceCloner:
+    """
+    Clones an instance workspace (instances/<name>).
+
+    Filestore blobs are content-addressed (named after their SHA-1) and never
+    modified in place by Odoo, so they are shared instead of copied: reflinks
+    (copy-on-write) where the filesystem supports them (btrfs, XFS, ZFS 2.2+),
+    hardlinks otherwise. Everything else (sessions, addons checkout, config)
+    is a regular copy because it is mutable.
+
+    blob_filter is an optional callable(path, stat) -> bool used by clone
+    profiles to leave old or large blobs out of test copies.
+    """
+
+    STRATEGIES = ('auto', 'reflink', 'hardlink', 'copy')
+
+    def __init__(self, strategy=None, blob_filter=None):
+        self.strategy = strategy or getattr(settings, 'CLONE_FILESTORE_STRATEGY', 'auto')
+        if self.strategy not in self.STRATEGIES:
+            raise ValueError(f"Estrategia de clonado desconocida: {self.strategy}")
+        # Resolved on the first blob when 'auto'
+        self.blob_method = None if self.strategy == 'auto' else self.strategy
+        self.blob_filter = blob_filter
+        self.stats = {
+            'reflinked': 0, 'hardlinked': 0, 'copied': 0, 'bytes_shared': 0, 'bytes_copied': 0,
+            'skipped': 0, 'bytes_skipped': 0,
+        }
+
+    @staticmethod
+    def filestore_root(workspace):
+        return os.path.join(workspace, 'data', 'filestore')
+
+    def clone(self, source, target):
+        """Clones source into target (which must not exist). Returns the stats dict"""
+        started = time.monotonic()
+        filestore_root = self.filestore_root(source) + os.sep
+
+        for root, dirs, files in os.walk(source):
+            target_root = os.path.join(target, os.path.relpath(root, source))
+            os.makedirs(target_root, exist_ok=True)
+
+            for name in list(dirs):
+                source_path = os.path.join(root, name)
+                if os.path.islink(source_path):
+                    os.symlink(os.readlink(source_path), os.path.join(target_root, name))
+                    dirs.remove(name)
+
+            for name in files:
+                source_path = os.path.join(root, name)
+                target_path = os.path.join(target_root, name)
+                if os.path.islink(source_path):
+                    os.symlink(os.readlink(source_path), target_path)
+                elif source_path.startswith(filestore_root):
+                    if self._keep_blob(source_path):
+                        self.clone_blob(source_path, target_path)
+                else:
+                    self._copy(source_path, target_path)
+
+            shutil.copystat(root, target_root)
+
+        self.stats['seconds'] = time.monotonic() - started
+        return self.stats
+
+    def sync(self, source, target):
+        """
+        Mirrors source into target like `rsync --delete`: only new or changed
+        files are cloned and files missing from source are removed.
+        Meant for filestore directories (blobs are compared by size and mtime).
+        Returns the stats dict with 'unchanged' and 'deleted' counts.
+        """
+        started = time.monotonic()
+        self.stats.update({'unchanged': 0, 'deleted': 0})
+        os.makedirs(target, exist_ok=True)
+        seen = set()
+
+        for root, dirs, files in os.walk(source):
+            relative_root = os.path.relpath(root, source)
+            target_root = os.path.normpath(os.path.join(target, relative_root))
+            os.makedirs(target_root, exist_ok=True)
+            for name in files:
+                source_path = os.path.join(root, name)
+                target_path = os.path.join(target_root, name)
+                if not self._keep_blob(source_path):
+                    # Not added to `seen`: a copy left from a previous sync is removed
+                    continue
+                seen.add(os.path.normpath(os.path.join(relative_root, name)))
+
+                if os.path.lexists(target_path):
+                    source_stat = os.stat(source_path)
+                    target_stat = os.lstat(target_path)
+                    same_inode = (source_stat.st_ino, source_stat.st_dev) == (target_stat.st_ino, target_stat.st_dev)
+                    if same_inode or (
+                        source_stat.st_size == target_stat.st_size
+                        and int(source_stat.st_mtime) == int(target_stat.st_mtime)
+                    ):
+                        self.stats['unchanged'] += 1
+                        continue
+                    os.remove(target_path)
+                self.clone_blob(source_path, target_path)
+
+        for root, dirs, files in os.walk(target, topdown=False):
+            relative_root = os.path.relpath(root, target)
+            for name in files:
+                if os.path.normpath(os.path.join(relative_root, name)) not in seen:
+                    os.remove(os.path.join(root, name))
+                    self.stats['deleted'] += 1
+            if root != target and not os.listdir(root):
+                os.rmdir(root)
+
+        self.stats['seconds'] = time.monotonic() - started
+        return self.stats
+
+    def _keep_blob(self, source_path):
+        if self.blob_filter is None:
+            return True
+        stat = os.stat(source_path)
+        if self.blob_filter(source_path, stat):
+            return True
+        self.stats['skipped'] += 1
+        self.stats['bytes_skipped'] += stat.st_size
+        return False
+
+    def clone_blob(self, source_path, target_path):
+        """Shares a filestore blob with the cheapest method available"""
+        if self.blob_method in (None, 'reflink'):
+            if self._reflink(source_path, target_path):
+                self.blob_method = 'reflink'
+                self.stats['reflinked'] += 1
+                self.stats['bytes_shared'] += os.path.getsize(target_path)
+                return
+            if self.strategy == 'auto' and self.blob_method is None:
+                print("Reflinks not supported on this filesystem, falling back to hardlinks for filestore blobs")
+            self.blob_method = 'hardlink' if self.strategy == 'auto' else 'copy'
+
+        if self.blob_method == 'hardlink':
+            try:
+                os.link(source_path, target_path)
+                self.stats['hardlinked'] += 1
+                self.stats['bytes_shared'] += os.path.getsize(source_path)
+                return
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS and e.errno != errno.EMLINK:
+                    raise
+                if self.strategy == 'auto':
+                    print(f"Hardlinks not possible ({e.strerror}), copying filestore blobs")
+                    self.blob_method = 'copy'
+
+        self._copy(source_path, target_path)
+
+    def _copy(self, source_path, target_path):
+        shutil.copy2(source_path, target_path)
+        self.stats['copied'] += 1
+        self.stats['bytes_copied'] += os.path.getsize(target_path)
+
+    @staticmethod
+    def _reflink(source_path, target_path):
+        """Creates target_path as a copy-on-write clone. Returns False if unsupported"""
+        try:
+            import fcntl
+        except ImportError:
+            return False
+
+        try:
+            with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError as e:
+            if os.path.exists(target_path):
+                os.remove(target_path)
+            if e.errno in UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        shutil.copystat(source_path, target_path)
+        return True
+
+    def summary(self):
+        shared_mb = self.stats['bytes_shared'] / (1024 * 1024)
+        copied_mb = self.stats['bytes_copied'] / (1024 * 1024)
+        summary = (
+            f"{self.stats['reflinked']} reflinked, {self.stats['hardlinked']} hardlinked "
+            f"({shared_mb:.2f} MB shared), {self.stats['copied']} copied ({copied_mb:.2f} MB)"
+        )
+        if self.stats['skipped']:
+            skipped_mb = self.stats['bytes_skipped'] / (1024 * 1024)
+            summary += f", {self.stats['skipped']} skipped by profile ({skipped_mb:.2f} MB)"
+        return summary + f" in {self.stats.get('seconds', 0):.1f}s"